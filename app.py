@@ -1,26 +1,45 @@
 import os
 
 from dotenv import load_dotenv
+
+# Load .env before the imports below, whose module-level settings read the environment.
+load_dotenv()
+
 from flask import Flask
-from flask_pymongo import PyMongo
 from flask_cors import CORS
 
 from routes.booking_routes import booking_bp
 from routes.bus_route_routes import bus_route_bp
 from routes.bus_routes import bus_bp
 from routes.bus_trip_routes import bus_trip_bp
+from routes.journey_routes import journey_bp
+from routes.trip_schedule_routes import trip_schedule_bp
 from routes.user_routes import user_bp
-
-load_dotenv()
+from storage import init_storage
+from utils.hold_reaper import start_hold_reaper
+from utils.json_provider import FastJSONProvider
+from utils.migrations import migrate
 
 app = Flask(__name__)
 app.config["MONGO_URI"] = os.getenv("MONGO_URI")
+app.config["STORAGE_BACKEND"] = os.getenv("STORAGE_BACKEND", "mongo")
 app.config["SECRET_KEY"] = os.getenv("SECRET_KEY")
 ver = os.getenv("VERSION", "v1")
 app.config["VERSION"] = ver
+app.config["SEAT_HOLD_SECONDS"] = int(os.getenv("SEAT_HOLD_SECONDS", 300))
+app.config["ACCESS_TOKEN_MINUTES"] = int(os.getenv("ACCESS_TOKEN_MINUTES", 15))
+app.config["REFRESH_TOKEN_DAYS"] = int(os.getenv("REFRESH_TOKEN_DAYS", 7))
+
+app.config["JSON_SORT_KEYS"] = os.getenv("JSON_SORT_KEYS", "false").lower() == "true"
+app.config["JSON_PRETTY"] = os.getenv("JSON_PRETTY", "false").lower() == "true"
 
-mongo = PyMongo(app)
-app.mongo = mongo
+storage = init_storage(app)
+# Set after the storage backend, replacing the provider PyMongo installs
+app.json = FastJSONProvider(app)
+
+# Apply pending migrations (indexes and backfills) at startup when enabled
+if os.getenv("MIGRATE_ON_STARTUP", "false").lower() == "true":
+    migrate(storage.db)
 
 # Enable CORS for all routes
 CORS(app)
@@ -31,6 +50,13 @@ app.register_blueprint(bus_bp, url_prefix=base_url)
 app.register_blueprint(bus_route_bp, url_prefix=base_url)
 app.register_blueprint(bus_trip_bp, url_prefix=base_url)
 app.register_blueprint(booking_bp, url_prefix=base_url)
+app.register_blueprint(trip_schedule_bp, url_prefix=base_url)
+app.register_blueprint(journey_bp, url_prefix=base_url)
+
+# Release expired seat holds in the background
+hold_reaper_interval = int(os.getenv("HOLD_REAPER_INTERVAL", 15))
+if hold_reaper_interval > 0:
+    start_hold_reaper(app, hold_reaper_interval, int(os.getenv("HOLD_REAPER_BATCH_SIZE", 500)))
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,89 @@
+# benchmarks/bulk_import.py
+"""
+Measures bulk import throughput for buses, routes and trips against creating rows one by one.
+
+    python -m benchmarks.bulk_import [--rows 100000] [--single-rows 2000]
+"""
+import argparse
+import json
+import os
+
+from bson.objectid import ObjectId
+
+from benchmarks.common import EXAMPLES_DIR, app, count_operations, elapsed
+from facade.bus_facade import BusFacade
+from facade.bus_route_facade import BusRouteFacade
+from facade.bus_trip_facade import BusTripFacade
+from storage import get_db
+from utils.bulk_import import load_rows
+
+GENERATED_FIELDS = ("createdBy", "createdAt", "updatedAt", "_id")
+
+
+def example(name):
+    with open(os.path.join(EXAMPLES_DIR, f"{name}.json"), encoding="utf-8") as f:
+        row = json.load(f)
+    for field in GENERATED_FIELDS:
+        row.pop(field, None)
+    return row
+
+
+def generate_rows(count):
+    """
+    Returns NDJSON text for ``count`` buses, routes and trips, each trip on one of the routes.
+    """
+    bus, route, trip = example("bus"), example("bus_route"), example("bus_trip")
+    routeIds = [str(ObjectId()) for _ in range(max(1, count // 100))]
+    buses = [dict(bus, registration=f"UP61-{i:06d}") for i in range(count)]
+    routes = [dict(route, _id=routeIds[i] if i < len(routeIds) else str(ObjectId()), routeNo=i) for i in range(count)]
+    trips = [dict(trip, routeId=routeIds[i % len(routeIds)], date=f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}")
+             for i in range(count)]
+    return {kind: "\n".join(json.dumps(row) for row in rows) for kind, rows in
+            (("bus", buses), ("bus_route", routes), ("bus_trip", trips))}
+
+
+def create_one_by_one(kind, rows):
+    for row in rows:
+        if kind == "bus":
+            BusFacade.create_bus(row["travel"], row["isAc"], row["isSleeper"], row["registration"], row["totalSeat"],
+                                 row["insuranceValidTill"], row["permitValidTill"], "bench")
+        elif kind == "bus_route":
+            BusRouteFacade.create_route(row["route"], row["routeNo"], row["distance"], "bench")
+        else:
+            BusTripFacade.create_trip(row["routeId"], row["date"], row["frequency"], row["timing"], row["fare"],
+                                      row["stops"], "bench")
+
+
+def run(rows, single_rows):
+    importers = {
+        "bus": BusFacade.import_buses,
+        "bus_route": BusRouteFacade.import_routes,
+        "bus_trip": BusTripFacade.import_trips,
+    }
+    counts = [count_operations(get_db()[name]) for name in ("buses", "bus_routes", "bus_trips")]
+
+    def operations():
+        return sum(sum(collection_counts.values()) for collection_counts in counts)
+
+    texts = generate_rows(rows)
+    for kind, text in texts.items():
+        before = operations()
+        report, seconds = elapsed(lambda: importers[kind](load_rows(text), createdBy="bench"))
+        print(f"{kind:<10} import {report['inserted']:>7} rows in {seconds:6.2f}s {report['inserted'] / seconds:>8.0f} rows/s"
+              f" {operations() - before:>7} operations ({len(report['errors'])} errors)")
+        sample = load_rows(text)[:single_rows]
+        for row in sample:
+            row.pop("_id", None)
+        before = operations()
+        _, seconds = elapsed(lambda: create_one_by_one(kind, sample))
+        print(f"{kind:<10} create {len(sample):>7} rows in {seconds:6.2f}s {len(sample) / seconds:>8.0f} rows/s"
+              f" {operations() - before:>7} operations")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000, help="Rows imported of each kind.")
+    parser.add_argument("--single-rows", type=int, default=2000, help="Rows created one by one for comparison.")
+    args = parser.parse_args()
+    with app.app_context():
+        run(args.rows, args.single_rows)
@@ -0,0 +1,85 @@
+# benchmarks/common.py
+import json
+import os
+import time
+import timeit
+from datetime import datetime
+
+from bson.objectid import ObjectId
+
+# Benchmarks run against the in-memory backend unless STORAGE_BACKEND (and MONGO_URI) say
+# otherwise. The app reads its settings at import time, so they are set before importing it.
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ["HOLD_REAPER_INTERVAL"] = "0"
+
+from app import app
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "example")
+
+
+def stored_document(name):
+    """
+    Returns an example document as MongoDB returns it, with an ObjectId and datetimes.
+    """
+    with open(os.path.join(EXAMPLES_DIR, f"{name}.json"), encoding="utf-8") as f:
+        document = json.load(f)
+    document["_id"] = ObjectId()
+    for field in ("createdAt", "updatedAt"):
+        document[field] = datetime.fromisoformat(document.get(field, "2023-10-01T12:00:00Z").replace("Z", "+00:00"))
+    return document
+
+
+def per_call(function, number, repeat=5):
+    """
+    Returns the best time of ``repeat`` runs of ``number`` calls, in seconds per call.
+    """
+    return min(timeit.repeat(function, number=number, repeat=repeat)) / number
+
+
+def elapsed(function):
+    """
+    Calls ``function`` once and returns its result and the seconds it took.
+    """
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def report(label, seconds, per=""):
+    """
+    Prints one timing line, scaled to a readable unit.
+    """
+    for unit, scale in (("s", 1), ("ms", 1e3), ("us", 1e6)):
+        if seconds * scale >= 1 or unit == "us":
+            print(f"{label:<44} {seconds * scale:>10.2f} {unit}{per}")
+            return
+
+
+def count_operations(collection):
+    """
+    Counts the calls made to a collection's read and write methods, a stand-in for database
+    round trips. Only the in-memory backend reuses collection objects, so elsewhere the
+    counts stay at zero.
+
+    :return: A dict of method names to call counts, updated as calls are made.
+    """
+    counts = {}
+    # Methods that call each other, like find_one calling find, count once.
+    depth = [0]
+    for name in ("find", "find_one", "find_one_and_update", "insert_one", "insert_many",
+                 "update_one", "update_many", "delete_many", "bulk_write", "count_documents"):
+        method = getattr(collection, name)
+
+        def counted(*args, _name=name, _method=method, **kwargs):
+            if not depth[0]:
+                counts[_name] = counts.get(_name, 0) + 1
+            depth[0] += 1
+            try:
+                return _method(*args, **kwargs)
+            finally:
+                depth[0] -= 1
+
+        setattr(collection, name, counted)
+    return counts
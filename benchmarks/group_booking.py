@@ -0,0 +1,54 @@
+# benchmarks/group_booking.py
+"""
+Compares booking a group of seats one request at a time with one create_bookings call.
+
+    python -m benchmarks.group_booking [--trips 200] [--seats 20]
+"""
+import argparse
+
+from benchmarks.common import app, count_operations, elapsed, report
+from facade.booking_facade import MAX_GROUP_SEATS, BookingFacade
+from storage import get_db
+
+
+def create_trips(count, totalSeat):
+    db = get_db()
+    busId = str(db.buses.insert_one({"registration": "BENCH", "totalSeat": totalSeat}).inserted_id)
+    result = db.bus_trips.insert_many([
+        {"routeId": "route", "date": "2025-01-15", "timing": "20:00", "fare": 500, "busId": busId,
+         "stops": [{"stop": "Lanka", "time": "20:00"}, {"stop": "Kanpur", "time": "02:00"}]}
+        for _ in range(count)
+    ])
+    return [str(tripId) for tripId in result.inserted_ids]
+
+
+def book_one_by_one(tripIds, seatNumbers):
+    for tripId in tripIds:
+        for seatNumber in seatNumbers:
+            BookingFacade.create_booking(tripId, "bench", seatNumber, "booked")
+
+
+def book_as_group(tripIds, seatNumbers):
+    for tripId in tripIds:
+        BookingFacade.create_bookings(tripId, "bench", seatNumbers, "booked")
+
+
+def run(trips, seats):
+    seatNumbers = list(range(1, seats + 1))
+    print(f"{trips} trips, {seats} seats per group")
+    for label, book in (("one create_booking per seat", book_one_by_one), ("one create_bookings per group", book_as_group)):
+        tripIds = create_trips(trips, seats)
+        counts = {name: count_operations(get_db()[name]) for name in ("bookings", "trip_seats", "bus_trips", "buses")}
+        _, seconds = elapsed(lambda: book(tripIds, seatNumbers))
+        operations = sum(sum(collection_counts.values()) for collection_counts in counts.values())
+        report(label, seconds / trips, " per group")
+        print(f"{'':<44} {operations / trips:>10.1f} database operations per group")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--trips", type=int, default=200)
+    parser.add_argument("--seats", type=int, default=MAX_GROUP_SEATS)
+    args = parser.parse_args()
+    with app.app_context():
+        run(args.trips, args.seats)
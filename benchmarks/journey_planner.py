@@ -0,0 +1,69 @@
+# benchmarks/journey_planner.py
+"""
+Measures building a date's journey timetable and planning journeys on a synthetic network.
+
+    python -m benchmarks.journey_planner [--trips 10000] [--cities 300] [--queries 200]
+"""
+import argparse
+import random
+from datetime import date
+
+from benchmarks.common import app, elapsed, report
+from facade.journey_facade import MIN_TRANSFER_MINUTES, JourneyFacade
+from storage import get_db
+from utils.journey_planner import journey_planner_cache
+from utils.stop_index import normalize_city
+
+DAY = date(2025, 1, 15)
+STOPS_PER_TRIP = 4
+
+
+def create_network(trips, cities, rng):
+    """
+    Inserts ``trips`` trips on the benchmark date and the next, each calling at
+    ``STOPS_PER_TRIP`` random cities an hour or two apart.
+    """
+    names = [f"City {i}" for i in range(cities)]
+    trip_docs = []
+    for i in range(trips):
+        minutes = rng.randrange(0, 20 * 60)
+        stops = []
+        for city in rng.sample(names, STOPS_PER_TRIP):
+            stops.append({"stop": city, "time": f"{minutes // 60 % 24:02d}:{minutes % 60:02d}"})
+            minutes += rng.randrange(60, 120)
+        trip_docs.append({"routeId": "route", "date": (DAY if i % 2 else DAY.replace(day=16)).isoformat(),
+                          "timing": stops[0]["time"], "fare": 500, "stops": stops})
+    get_db().bus_trips.insert_many(trip_docs)
+    return names
+
+
+def run(trips, cities, queries):
+    rng = random.Random(42)
+    names = create_network(trips, cities, rng)
+    journey_planner_cache.invalidate()
+    timetable, seconds = elapsed(lambda: JourneyFacade._load_timetable(DAY))
+    print(f"{trips} trips over {cities} cities, {len(timetable.connections)} connections in the timetable")
+    report("timetable build", seconds)
+
+    pairs = [rng.sample(names, 2) for _ in range(queries)]
+    keys = [(normalize_city(origin), normalize_city(destination)) for origin, destination in pairs]
+    found, seconds = elapsed(lambda: sum(
+        timetable.earliest_arrival(origin, destination, 8 * 60, MIN_TRANSFER_MINUTES) is not None
+        for origin, destination in keys
+    ))
+    report("connection scan query", seconds / queries)
+    _, seconds = elapsed(lambda: [
+        JourneyFacade.plan_journey(origin, destination, DAY.isoformat(), "08:00") for origin, destination in pairs
+    ])
+    report("plan_journey with a cached timetable", seconds / queries)
+    print(f"{found} of {queries} city pairs connected")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--trips", type=int, default=10000)
+    parser.add_argument("--cities", type=int, default=300)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    with app.app_context():
+        run(args.trips, args.cities, args.queries)
@@ -0,0 +1,41 @@
+# benchmarks/json_provider.py
+"""
+Compares building JSON responses for list pages with the app's FastJSONProvider and with the
+BSONProvider that Flask-PyMongo installs.
+
+    python -m benchmarks.json_provider [--rows 100] [--number 500]
+"""
+import argparse
+
+from flask_pymongo.helpers import BSONProvider
+
+from benchmarks.common import app, per_call, report, stored_document
+from models.booking import Booking
+from models.bus_trip import BusTrip
+from utils.json_provider import FastJSONProvider, orjson
+
+
+def list_pages(rows):
+    trips = [BusTrip.serialize(stored_document("bus_trip")) for _ in range(rows)]
+    bookings = [Booking.serialize(stored_document("booking")) for _ in range(rows)]
+    return (
+        ("/bus_trip/list", {"trips": trips, "pageSize": rows, "totalData": rows * 10, "currentPage": 1}),
+        ("/booking/list", {"bookings": bookings, "pageSize": rows, "totalData": rows * 10, "currentPage": 1}),
+    )
+
+
+def run(rows, number):
+    providers = (("BSONProvider", BSONProvider(app)), ("FastJSONProvider", FastJSONProvider(app)))
+    print(f"{rows}-row pages, FastJSONProvider encoding with {'orjson' if orjson else 'the standard library'}")
+    for path, page in list_pages(rows):
+        for name, provider in providers:
+            report(f"{path} response, {name}", per_call(lambda: provider.response(page), number))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--number", type=int, default=500, help="Responses per timing run.")
+    args = parser.parse_args()
+    with app.app_context():
+        run(args.rows, args.number)
@@ -0,0 +1,98 @@
+# benchmarks/password_hashing.py
+"""
+Runs a login storm through the API and reports how the bounded hashing pool sheds it, and how
+quickly other requests are served meanwhile. The pool is configured by the PASSWORD_HASH_*
+settings, e.g. PASSWORD_HASH_WORKERS=2 PASSWORD_HASH_MAX_PENDING=4.
+
+    python -m benchmarks.password_hashing [--clients 32] [--logins 5]
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+
+from benchmarks.common import app, per_call, report
+from storage import get_db
+from utils.passwords import default_hasher, password_pool
+
+PASSWORD = "benchmark"
+BASE_URL = f"/{app.config['VERSION']}/api"
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0
+
+
+def storm(clients, logins):
+    """
+    Logs in ``logins`` times from each of ``clients`` threads, while another thread keeps
+    requesting a route that does no hashing.
+
+    :return: The ``(status, seconds)`` of every login and the seconds of every other request.
+    """
+    results, other = [], []
+    done = threading.Event()
+    barrier = threading.Barrier(clients + 1)
+
+    def log_in():
+        client = app.test_client()
+        barrier.wait()
+        for _ in range(logins):
+            start = time.perf_counter()
+            response = client.post(f"{BASE_URL}/user/login", json={"username": "bench", "password": PASSWORD})
+            results.append((response.status_code, time.perf_counter() - start))
+
+    def request_other():
+        client = app.test_client()
+        barrier.wait()
+        while not done.is_set():
+            start = time.perf_counter()
+            client.get(f"{BASE_URL}/")
+            other.append(time.perf_counter() - start)
+            time.sleep(0.005)
+
+    threads = [threading.Thread(target=log_in) for _ in range(clients)]
+    watcher = threading.Thread(target=request_other)
+    for thread in threads + [watcher]:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    done.set()
+    watcher.join()
+    return results, other
+
+
+def run(clients, logins):
+    get_db().users.insert_one({"firstName": "Bench", "lastName": "User", "email": "bench@example.com",
+                               "userType": ["user"], "userGroup": [], "username": "bench",
+                               "password": default_hasher.hash(PASSWORD), "mobile": "9876543210"})
+    workers = int(os.getenv("PASSWORD_HASH_WORKERS", 0)) or os.cpu_count()
+    print(f"scrypt n={default_hasher.n}, {workers} workers, admission timeout {password_pool.admission_timeout}s")
+    report("one hash", per_call(lambda: default_hasher.hash(PASSWORD), 1, repeat=5))
+
+    start = time.perf_counter()
+    results, other = storm(clients, logins)
+    seconds = time.perf_counter() - start
+    served = [latency for status, latency in results if status == 200]
+    shed = [latency for status, latency in results if status == 503]
+    print(f"{clients} clients x {logins} logins in {seconds:.2f}s: {len(served)} served "
+          f"({len(served) / seconds:.1f}/s), {len(shed)} shed with 503")
+    if served:
+        report("served login, median", statistics.median(served))
+        report("served login, p99", percentile(served, 0.99))
+    if shed:
+        report("shed login, median", statistics.median(shed))
+    if other:
+        report("other request during the storm, median", statistics.median(other))
+        report("other request during the storm, p99", percentile(other, 0.99))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--logins", type=int, default=5, help="Logins per client.")
+    args = parser.parse_args()
+    with app.app_context():
+        run(args.clients, args.logins)
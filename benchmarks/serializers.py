@@ -0,0 +1,33 @@
+# benchmarks/serializers.py
+"""
+Compares serializing stored documents through model instances with the models' direct
+serialize, per document.
+
+    python -m benchmarks.serializers [--number 20000]
+"""
+import argparse
+
+from benchmarks.common import per_call, report, stored_document
+from models.booking import Booking
+from models.bus import Bus
+from models.bus_route import BusRoute
+from models.bus_trip import BusTrip
+from models.user import User
+
+MODELS = (("booking", Booking), ("bus", Bus), ("bus_route", BusRoute), ("bus_trip", BusTrip), ("user", User))
+
+
+def run(number):
+    for name, model in MODELS:
+        document = stored_document(name)
+        if model.serialize(document) != model.from_dict(document).to_dict():
+            raise SystemExit(f"{model.__name__}.serialize differs from from_dict().to_dict()")
+        report(f"{model.__name__} from_dict().to_dict()", per_call(lambda: model.from_dict(document).to_dict(), number))
+        report(f"{model.__name__} serialize()", per_call(lambda: model.serialize(document), number))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000, help="Calls per timing run.")
+    args = parser.parse_args()
+    run(args.number)
@@ -0,0 +1,47 @@
+# benchmarks/token_cache.py
+"""
+Measures token_required with the verified-claims cache warm and cold, and jwt.decode alone.
+
+    python -m benchmarks.token_cache [--number 20000]
+"""
+import argparse
+
+import jwt
+from bson.objectid import ObjectId
+
+from benchmarks.common import app, per_call, report
+from decorators import token_required
+from facade.user_facade import UserFacade
+from models.user import User
+from utils.token_cache import token_claims_cache
+
+
+@token_required
+def view(current_user, current_user_role):
+    return current_user
+
+
+def run(number):
+    user = User(firstName="Bench", lastName="User", email="bench@example.com", userType=["user"], userGroup=[],
+                username="bench", password=None)
+    user._id = str(ObjectId())
+    token = UserFacade._issue_tokens(user)["token"]
+    secret = app.config["SECRET_KEY"]
+    with app.test_request_context(headers={"Authorization": f"Bearer {token}"}):
+        view()
+
+        def cold():
+            token_claims_cache.clear()
+            return view()
+
+        report("jwt.decode", per_call(lambda: jwt.decode(token, secret, algorithms=["HS256"]), number))
+        report("token_required, claims cache cold", per_call(cold, number))
+        report("token_required, claims cache warm", per_call(view, number))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000, help="Calls per timing run.")
+    args = parser.parse_args()
+    with app.app_context():
+        run(args.number)
@@ -0,0 +1,34 @@
+# benchmarks/validation.py
+"""
+Measures request body validation with the precompiled schemas, against compiling the schema on
+every request.
+
+    python -m benchmarks.validation [--number 20000]
+"""
+import argparse
+
+from benchmarks.common import per_call, report
+from routes.booking_routes import SEATS_SCHEMA
+from routes.user_routes import CREATE_USER_SCHEMA
+from utils.validation import compile_schema
+
+BODIES = (
+    ("group hold", SEATS_SCHEMA, {"tripId": "60d5ec49f1d2c2a1d4e8b457", "seatNumbers": [4, 5, 6, 7], "fromStop": 0, "toStop": 2}),
+    ("group hold, invalid", SEATS_SCHEMA, {"seatNumbers": [4, "5", 0], "fromStop": -1}),
+    ("create user", CREATE_USER_SCHEMA, {"firstName": "John", "lastName": "Doe", "email": "john.doe@example.com",
+                                         "username": "johndoe", "password": "secret", "mobile": "1234567890"}),
+)
+
+
+def run(number):
+    for label, schema, body in BODIES:
+        validate = compile_schema(schema)
+        report(f"{label}, precompiled", per_call(lambda: validate(body), number))
+        report(f"{label}, compiled per request", per_call(lambda: compile_schema(schema)(body), number))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000, help="Calls per timing run.")
+    args = parser.parse_args()
+    run(args.number)
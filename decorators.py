@@ -1,25 +1,51 @@
+import logging
+import os
+import time
 from functools import wraps
-from flask import request, jsonify
+from flask import request, jsonify, g
 import jwt
 from flask import current_app
+from facade.user_facade import UserFacade
+from utils.rate_limit import parse_budget, rate_limiter
+from utils.token_cache import token_cache_key, token_claims_cache
+from utils.validation import compile_schema
 
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
         token = None
-        if 'Authorization' in request.headers:
-            auth_header = request.headers['Authorization']
-            token = auth_header.split(" ")[1] if len(auth_header.split(" ")) > 1 else None
+        auth_header = request.headers.get('Authorization')
+        if auth_header:
+            parts = auth_header.split(" ")
+            token = parts[1] if len(parts) > 1 else None
         if not token:
             return jsonify({'message': 'Token is missing!'}), 401
+        secret = current_app.config['SECRET_KEY']
+        cache_key = token_cache_key(token, secret)
+        data = token_claims_cache.get(cache_key)
+        if data is not None and data.get('exp', float('inf')) <= time.time():
+            return jsonify({'message': 'Token has expired!'}), 401
         try:
-            data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=["HS256"])
+            if data is None:
+                data = jwt.decode(token, secret, algorithms=["HS256"])
+                token_claims_cache.set(cache_key, data)
             current_user = data['user_id']
             current_user_role = data['roles']
         except jwt.ExpiredSignatureError:
             return jsonify({'message': 'Token has expired!'}), 401
         except jwt.InvalidTokenError:
             return jsonify({'message': 'Token is invalid!'}), 401
+        if data.get('type', 'access') != 'access':
+            return jsonify({'message': 'Token is invalid!'}), 401
+        try:
+            revoked = bool(data.get('jti')) and UserFacade.is_token_revoked(data['jti'])
+        except Exception as e:
+            # Without the revocation check a revoked token could get through, so fail closed.
+            logging.error("Error checking token revocation: %s", e)
+            return jsonify({'message': 'Token could not be checked, retry later!'}), 503, {'Retry-After': '1'}
+        if revoked:
+            return jsonify({'message': 'Token has been revoked!'}), 401
+        g.token_claims = data
         kwargs['current_user'] = current_user
         kwargs['current_user_role'] = current_user_role
         return f(*args, **kwargs)
@@ -35,4 +61,41 @@ def permission_required(required_role):
                 return jsonify({'message': 'Permission denied!'}), 403
             return f(*args, **kwargs)
         return decorated_function
-    return decorator
\ No newline at end of file
+    return decorator
+def rate_limit(name, budget):
+    """
+    Limits how often a route may be called, per user when the request is authenticated and
+    per client IP otherwise. Place it below token_required so that the user is known.
+
+    :param name: The name of the budget; ``RATE_LIMIT_<NAME>`` overrides it.
+    :param budget: The default budget as ``"<requests>/<seconds>"``.
+    """
+    capacity, period = parse_budget(os.getenv(f"RATE_LIMIT_{name.upper()}", budget))
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            client = kwargs.get('current_user') or request.remote_addr
+            allowed, retry_after = rate_limiter.hit(f"{name}:{client}", capacity, period)
+            if not allowed:
+                return jsonify({'message': 'Too many requests!'}), 429, {'Retry-After': str(retry_after)}
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+def validate_json(schema):
+    """
+    Rejects requests whose JSON body does not match ``schema`` with a 400 listing every invalid
+    field, before the view runs. The schema is compiled once, when the view is decorated.
+    """
+    validate = compile_schema(schema)
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            errors = validate(request.get_json(silent=True))
+            if errors:
+                return jsonify({'error': 'Invalid request body', 'details': errors}), 400
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
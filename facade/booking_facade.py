@@ -1,40 +1,338 @@
 # facade/booking_facade.py
 import logging
+import uuid
+from datetime import datetime, timedelta, timezone
 from flask import current_app
+from bson.int64 import Int64
 from bson.objectid import ObjectId
-from models.booking import Booking
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from models.booking import ACTIVE_STATUSES, UPDATE_STATUSES, Booking
+from storage import get_db
+from utils.export import EXPORT_BATCH_SIZE, parse_export_date
+from utils.fields import build_projection
+from utils.pagination import find_page
+from utils.seat_map import SeatMap, seat_map_cache
+from utils.segments import segment_mask
+from utils.totals import count_total
+
+MAX_GROUP_SEATS = 20
+UPDATE_BOOKING_ATTEMPTS = 3
+
+
+class SeatUnavailableError(Exception):
+    pass
+
 
 class BookingFacade:
     @staticmethod
-    def create_booking(tripId, userId, seatNumber, status):
+    def _claim_seats(tripId, seatNumbers, mask):
+        """
+        Atomically claims seats on a trip for the segments in ``mask``, all or nothing.
+
+        Seat occupancy lives in one ``trip_seats`` document per trip, keyed by the trip ID, where
+        each seat holds the bitset of the segments it is taken on. The conditional upsert sets
+        the segment bits on an existing document where none of them are taken yet, or inserts
+        the document; when any seat overlaps the insert collides on ``_id`` and raises
+        DuplicateKeyError. The second attempt covers two requests racing to create the same trip
+        document for different seats.
+        """
+        if not mask:
+            return
+        query = {"_id": tripId, "$and": [
+            {"$or": [
+                {f"seats.{seatNumber}": {"$exists": False}},
+                {f"seats.{seatNumber}": {"$bitsAllClear": Int64(mask)}}
+            ]}
+            for seatNumber in seatNumbers
+        ]}
+        update = {"$bit": {f"seats.{seatNumber}": {"or": Int64(mask)} for seatNumber in seatNumbers}}
+        for attempt in range(2):
+            try:
+                get_db().trip_seats.update_one(query, update, upsert=True)
+                for seatNumber in seatNumbers:
+                    seat_map_cache.mark(tripId, seatNumber, mask, True)
+                return
+            except DuplicateKeyError:
+                if attempt:
+                    taken = BookingFacade._taken_seats(tripId, seatNumbers, mask)
+                    if len(taken) == 1:
+                        raise SeatUnavailableError(f"Seat {taken[0]} is already booked")
+                    raise SeatUnavailableError(
+                        f"Seats {', '.join(str(seat) for seat in taken)} are already booked"
+                    )
+
+    @staticmethod
+    def _taken_seats(tripId, seatNumbers, mask):
+        projection = {f"seats.{seatNumber}": 1 for seatNumber in seatNumbers}
+        seats_doc = get_db().trip_seats.find_one({"_id": tripId}, projection) or {}
+        seats = seats_doc.get("seats", {})
+        return [seat for seat in seatNumbers if int(seats.get(str(seat), 0)) & mask] or list(seatNumbers)
+
+    @staticmethod
+    def _release_seats(tripId, seatNumbers, mask):
+        if not mask:
+            return
+        get_db().trip_seats.update_one(
+            {"_id": tripId},
+            {"$bit": {f"seats.{seatNumber}": {"and": Int64(~mask)} for seatNumber in seatNumbers}}
+        )
+        for seatNumber in seatNumbers:
+            seat_map_cache.mark(tripId, seatNumber, mask, False)
+
+    @staticmethod
+    def _load_seat_map(tripId):
+        """
+        Returns the trip's seat map from the process cache, rebuilding it from the
+        trip's seat-state document and its bus capacity on a miss. The rebuilt map is not
+        cached if seats were claimed or released while it was read.
+        """
+        seat_map = seat_map_cache.get(tripId)
+        if seat_map is not None:
+            return seat_map
+        version = seat_map_cache.version(tripId)
+        db = get_db()
+        seats_doc = db.trip_seats.find_one({"_id": tripId}, {"seats": 1})
+        totalSeat = None
+        if ObjectId.is_valid(tripId):
+            trip = db.bus_trips.find_one({"_id": ObjectId(tripId)}, {"busId": 1})
+            if trip and trip.get("busId") and ObjectId.is_valid(trip["busId"]):
+                bus = db.buses.find_one({"_id": ObjectId(trip["busId"])}, {"totalSeat": 1})
+                totalSeat = int(bus["totalSeat"]) if bus and bus.get("totalSeat") else None
+        seat_map = SeatMap.from_seats((seats_doc or {}).get("seats", {}), totalSeat)
+        seat_map_cache.put(tripId, seat_map, version)
+        return seat_map
+
+    @staticmethod
+    def _check_journey(tripId, seatNumbers, fromStop=None, toStop=None):
+        """
+        Checks that the trip exists, that the stops are within its stop list and that the seats
+        exist on its bus, before any of them is claimed. Trips without stops or without a bus of
+        known capacity skip the matching check.
+
+        :raises ValueError: If the trip, a stop or a seat does not exist.
+        """
+        db = get_db()
+        trip = None
+        if isinstance(tripId, str) and ObjectId.is_valid(tripId):
+            trip = db.bus_trips.find_one({"_id": ObjectId(tripId)}, {"stops": 1, "busId": 1})
+        if not trip:
+            raise ValueError("Trip not found")
+        stops = trip.get("stops") or []
+        if stops and ((fromStop is not None and fromStop >= len(stops) - 1)
+                      or (toStop is not None and toStop > len(stops) - 1)):
+            raise ValueError(f"The trip has stops 0 to {len(stops) - 1}")
+        if trip.get("busId") and ObjectId.is_valid(trip["busId"]):
+            bus = db.buses.find_one({"_id": ObjectId(trip["busId"])}, {"totalSeat": 1})
+            totalSeat = int(bus["totalSeat"]) if bus and bus.get("totalSeat") else None
+            if totalSeat and any(seatNumber > totalSeat for seatNumber in seatNumbers):
+                raise ValueError(f"The bus has seats 1 to {totalSeat}")
+
+    @staticmethod
+    def create_booking(tripId, userId, seatNumber, status, fromStop=None, toStop=None, expiresAt=None):
+        mask = segment_mask(fromStop, toStop)
+        BookingFacade._check_journey(tripId, [seatNumber], fromStop, toStop)
         try:
             booking = Booking(
                 tripId=tripId,
                 userId=userId,
                 seatNumber=seatNumber,
-                status=status
+                fromStop=fromStop,
+                toStop=toStop,
+                status=status,
+                expiresAt=expiresAt
             )
-            result = current_app.mongo.db.bookings.insert_one(booking.to_dict())
+            claimed = mask if status in ACTIVE_STATUSES else 0
+            BookingFacade._claim_seats(tripId, [seatNumber], claimed)
+            try:
+                result = get_db().bookings.insert_one(booking.to_dict())
+            except Exception:
+                BookingFacade._release_seats(tripId, [seatNumber], claimed)
+                raise
             booking._id = str(result.inserted_id)
             return booking.to_dict()
+        except SeatUnavailableError:
+            raise
         except Exception as e:
             logging.error("Error creating booking: %s", e)
             raise
 
     @staticmethod
-    def get_booking(booking_id):
+    def create_bookings(tripId, userId, seatNumbers, status, fromStop=None, toStop=None, expiresAt=None):
+        """
+        Books several seats on one trip for a user, all or nothing.
+
+        The seats are claimed with a single conditional write and the bookings are persisted
+        with one bulk insert; if the insert fails the claimed seats are released again.
+
+        :param tripId: The ID of the trip to book.
+        :param userId: The ID of the user making the booking.
+        :param seatNumbers: The list of seat numbers to book.
+        :param status: The status of the bookings.
+        :param fromStop: The index of the boarding stop (default is the first stop).
+        :param toStop: The index of the alighting stop (default is the last stop).
+        :param expiresAt: When the bookings expire, for held seats.
+        :return: The list of newly created bookings.
+        """
+        if not isinstance(seatNumbers, list) or not seatNumbers:
+            raise ValueError("seatNumbers must be a non-empty list")
+        if len(seatNumbers) > MAX_GROUP_SEATS:
+            raise ValueError(f"At most {MAX_GROUP_SEATS} seats can be booked at once")
+        if any(not isinstance(seat, int) or isinstance(seat, bool) or seat < 1 for seat in seatNumbers):
+            raise ValueError("Seat numbers must be positive integers")
+        if len(set(seatNumbers)) != len(seatNumbers):
+            raise ValueError("Seat numbers must be unique")
+        mask = segment_mask(fromStop, toStop)
+        BookingFacade._check_journey(tripId, seatNumbers, fromStop, toStop)
+
+        try:
+            bookings = [
+                Booking(tripId=tripId, userId=userId, seatNumber=seatNumber, status=status,
+                        fromStop=fromStop, toStop=toStop, expiresAt=expiresAt)
+                for seatNumber in seatNumbers
+            ]
+            claimed = mask if status in ACTIVE_STATUSES else 0
+            BookingFacade._claim_seats(tripId, seatNumbers, claimed)
+            booking_docs = []
+            for booking in bookings:
+                booking_doc = booking.to_dict()
+                booking_doc["_id"] = ObjectId()
+                booking_docs.append(booking_doc)
+            try:
+                get_db().bookings.insert_many(booking_docs)
+            except Exception:
+                get_db().bookings.delete_many({"_id": {"$in": [doc["_id"] for doc in booking_docs]}})
+                BookingFacade._release_seats(tripId, seatNumbers, claimed)
+                raise
+            for booking, booking_doc in zip(bookings, booking_docs):
+                booking._id = str(booking_doc["_id"])
+            return [booking.to_dict() for booking in bookings]
+        except SeatUnavailableError:
+            raise
+        except Exception as e:
+            logging.error("Error creating bookings: %s", e)
+            raise
+
+    @staticmethod
+    def hold_seats(tripId, userId, seatNumbers, fromStop=None, toStop=None):
+        """
+        Holds seats on a trip for a user until payment, all or nothing.
+
+        Held seats count as occupied until the hold is confirmed or expires after
+        ``SEAT_HOLD_SECONDS``; expired holds are released by ``release_expired_holds``.
+
+        :param tripId: The ID of the trip.
+        :param userId: The ID of the user holding the seats.
+        :param seatNumbers: The list of seat numbers to hold.
+        :param fromStop: The index of the boarding stop (default is the first stop).
+        :param toStop: The index of the alighting stop (default is the last stop).
+        :return: The list of held bookings.
+        """
+        hold_seconds = current_app.config.get("SEAT_HOLD_SECONDS", 300)
+        expiresAt = datetime.now(timezone.utc) + timedelta(seconds=hold_seconds)
+        return BookingFacade.create_bookings(
+            tripId, userId, seatNumbers, "held", fromStop=fromStop, toStop=toStop, expiresAt=expiresAt
+        )
+
+    @staticmethod
+    def confirm_hold(booking_id, userId):
+        """
+        Turns a live hold into a booking.
+
+        :param booking_id: The ID of the held booking.
+        :param userId: The ID of the user who holds the seat.
+        :return: The confirmed booking, or None if there is no live hold for the user.
+        """
+        try:
+            now = datetime.now(timezone.utc)
+            booking_data = get_db().bookings.find_one_and_update(
+                {"_id": ObjectId(booking_id), "userId": userId, "status": "held", "expiresAt": {"$gt": now}},
+                {"$set": {"status": "booked", "updatedAt": now}, "$unset": {"expiresAt": ""}},
+                return_document=ReturnDocument.AFTER
+            )
+            if booking_data:
+                return Booking.serialize(booking_data)
+            return None
+        except Exception as e:
+            logging.error("Error confirming hold: %s", e)
+            raise
+
+    @staticmethod
+    def release_expired_holds(batch_size=500):
+        """
+        Expires held bookings past their ``expiresAt`` and frees their seats.
+
+        Holds are processed in batches: each batch marks its bookings as expired with one
+        update and releases all of their seat claims with one unordered bulk write. The update
+        stamps the bookings with a token unique to the batch, so that when reapers in several
+        workers race on the same holds, each claim is released only by the reaper that expired
+        it.
+
+        :param batch_size: The maximum number of holds to release per batch.
+        :return: The number of holds released.
+        """
+        try:
+            db = get_db()
+            released = 0
+            while True:
+                now = datetime.now(timezone.utc)
+                expired = list(db.bookings.find(
+                    {"status": "held", "expiresAt": {"$lte": now}},
+                    {"tripId": 1, "seatNumber": 1, "fromStop": 1, "toStop": 1}
+                ).limit(batch_size))
+                if not expired:
+                    break
+                batch_ids = [booking["_id"] for booking in expired]
+                reap_token = uuid.uuid4().hex
+                result = db.bookings.update_many(
+                    {"_id": {"$in": batch_ids}, "status": "held"},
+                    {"$set": {"status": "expired", "reapedBy": reap_token, "updatedAt": now}}
+                )
+                released_holds = expired
+                if result.modified_count < len(expired):
+                    # Some holds were confirmed or expired by another reaper since they were
+                    # read; only free the seats of the bookings this batch actually expired.
+                    expired_ids = {
+                        booking["_id"] for booking in
+                        db.bookings.find({"_id": {"$in": batch_ids}, "reapedBy": reap_token}, {"_id": 1})
+                    }
+                    released_holds = [booking for booking in expired if booking["_id"] in expired_ids]
+                masks = [segment_mask(booking.get("fromStop"), booking.get("toStop")) for booking in released_holds]
+                if released_holds:
+                    db.trip_seats.bulk_write([
+                        UpdateOne(
+                            {"_id": booking["tripId"]},
+                            {"$bit": {f"seats.{booking['seatNumber']}": {"and": Int64(~mask)}}}
+                        )
+                        for booking, mask in zip(released_holds, masks)
+                    ], ordered=False)
+                for booking, mask in zip(released_holds, masks):
+                    seat_map_cache.mark(booking["tripId"], booking["seatNumber"], mask, False)
+                released += len(released_holds)
+                if len(expired) < batch_size:
+                    break
+            return released
+        except Exception as e:
+            logging.error("Error releasing expired holds: %s", e)
+            raise
+
+    @staticmethod
+    def get_booking(booking_id, fields=None):
         try:
-            booking_data = current_app.mongo.db.bookings.find_one({"_id": ObjectId(booking_id)})
+            booking_data = get_db().bookings.find_one(
+                {"_id": ObjectId(booking_id)}, build_projection(fields, Booking.FIELDS)
+            )
             if booking_data:
-                booking = Booking.from_dict(booking_data)
-                return booking.to_dict()
+                return Booking.serialize(booking_data, fields)
             return None
         except Exception as e:
             logging.error("Error getting booking: %s", e)
             raise
 
     @staticmethod
-    def update_booking(booking_id, tripId=None, userId=None, seatNumber=None, status=None, updatedAt=None):
+    def update_booking(booking_id, tripId=None, userId=None, seatNumber=None, status=None, fromStop=None, toStop=None, updatedAt=None):
+        if status and status not in UPDATE_STATUSES:
+            raise ValueError(f"The status must be one of {', '.join(UPDATE_STATUSES)}")
         try:
             update_fields = {}
             if tripId:
@@ -45,12 +343,67 @@ class BookingFacade:
                 update_fields["seatNumber"] = seatNumber
             if status:
                 update_fields["status"] = status
+            if fromStop is not None:
+                update_fields["fromStop"] = fromStop
+            if toStop is not None:
+                update_fields["toStop"] = toStop
             if updatedAt:
                 update_fields["updatedAt"] = updatedAt
-            result = current_app.mongo.db.bookings.update_one(
-                {"_id": ObjectId(booking_id)}, {"$set": update_fields}
-            )
-            return result.modified_count > 0
+
+            update = {"$set": update_fields}
+            if status:
+                update["$unset"] = {"expiresAt": ""}
+
+            for attempt in range(UPDATE_BOOKING_ATTEMPTS):
+                existing = get_db().bookings.find_one(
+                    {"_id": ObjectId(booking_id)},
+                    {"tripId": 1, "seatNumber": 1, "status": 1, "fromStop": 1, "toStop": 1}
+                )
+                if not existing:
+                    return False
+
+                # Work out which segment bits the booking holds before and after the update, then
+                # claim the new bits before touching the booking so that a conflicting change is
+                # rejected without leaving the booking half-updated.
+                old_seat = (existing.get("tripId"), existing.get("seatNumber"))
+                new_seat = (update_fields.get("tripId", old_seat[0]), update_fields.get("seatNumber", old_seat[1]))
+                old_mask = 0
+                if existing.get("status") in ACTIVE_STATUSES:
+                    old_mask = segment_mask(existing.get("fromStop"), existing.get("toStop"))
+                new_mask = 0
+                if update_fields.get("status", existing.get("status")) in ACTIVE_STATUSES:
+                    new_mask = segment_mask(
+                        update_fields.get("fromStop", existing.get("fromStop")),
+                        update_fields.get("toStop", existing.get("toStop"))
+                    )
+                if any(field in update_fields for field in ("tripId", "seatNumber", "fromStop", "toStop")):
+                    BookingFacade._check_journey(
+                        new_seat[0], [new_seat[1]],
+                        update_fields.get("fromStop", existing.get("fromStop")),
+                        update_fields.get("toStop", existing.get("toStop"))
+                    )
+                if new_seat == old_seat:
+                    claimed, released = new_mask & ~old_mask, old_mask & ~new_mask
+                else:
+                    claimed, released = new_mask, old_mask
+                BookingFacade._claim_seats(new_seat[0], [new_seat[1]], claimed)
+                # Only write if the booking still holds what the masks were worked out from;
+                # otherwise another request changed it in between and released would be wrong.
+                query = {"_id": existing["_id"]}
+                for field in ("tripId", "seatNumber", "status", "fromStop", "toStop"):
+                    query[field] = existing.get(field)
+                try:
+                    result = get_db().bookings.update_one(query, update)
+                except Exception:
+                    BookingFacade._release_seats(new_seat[0], [new_seat[1]], claimed)
+                    raise
+                if result.matched_count:
+                    BookingFacade._release_seats(old_seat[0], [old_seat[1]], released)
+                    return result.modified_count > 0
+                BookingFacade._release_seats(new_seat[0], [new_seat[1]], claimed)
+            raise SeatUnavailableError("The booking was changed by another request, please try again")
+        except SeatUnavailableError:
+            raise
         except Exception as e:
             logging.error("Error updating booking: %s", e)
             raise
@@ -58,35 +411,90 @@ class BookingFacade:
     @staticmethod
     def delete_booking(booking_id):
         try:
-            result = current_app.mongo.db.bookings.delete_one({"_id": ObjectId(booking_id)})
-            return result.deleted_count > 0
+            booking_data = get_db().bookings.find_one_and_delete({"_id": ObjectId(booking_id)})
+            if not booking_data:
+                return False
+            if booking_data.get("status") in ACTIVE_STATUSES:
+                BookingFacade._release_seats(
+                    booking_data["tripId"], [booking_data["seatNumber"]],
+                    segment_mask(booking_data.get("fromStop"), booking_data.get("toStop"))
+                )
+            return True
         except Exception as e:
             logging.error("Error deleting booking: %s", e)
             raise
 
     @staticmethod
-    def get_all_bookings(page, size):
+    def get_all_bookings(page, size, after=None, with_total=True, fields=None):
         try:
-            skip = (page - 1) * size
-            bookings_cursor = current_app.mongo.db.bookings.find().skip(skip).limit(size)
-            bookings = [Booking.from_dict(booking).to_dict() for booking in bookings_cursor]
-            total_bookings = current_app.mongo.db.bookings.count_documents({})
-            return {
+            bookings_docs, next_cursor = find_page(
+                get_db().bookings, {}, page, size, after, build_projection(fields, Booking.FIELDS)
+            )
+            bookings = [Booking.serialize(booking, fields) for booking in bookings_docs]
+            bookings_data = {
                 "bookings": bookings,
-                "pageSize": size,
-                "currentPage": page,
-                "totalData": total_bookings
+                "pageSize": size
             }
+            if with_total:
+                bookings_data["totalData"], bookings_data["totalExact"] = count_total(get_db().bookings, {})
+            if after is None:
+                bookings_data["currentPage"] = page
+            else:
+                bookings_data["nextCursor"] = next_cursor
+            return bookings_data
         except Exception as e:
             logging.error("Error getting all bookings: %s", e)
             raise
 
     @staticmethod
-    def get_available_seats(tripId):
+    def export_bookings(tripId=None, date_from=None, date_to=None):
+        """
+        Iterates over all bookings matching the filters for export.
+
+        The filters are validated before iteration starts; the documents are then read through
+        a single server-side cursor in batches of ``EXPORT_BATCH_SIZE``.
+
+        :param tripId: Only export bookings of this trip.
+        :param date_from: Only export bookings created at or after this ISO date.
+        :param date_to: Only export bookings created before this ISO date.
+        :return: A generator of serialized bookings.
+        """
+        query = {}
+        if tripId:
+            query["tripId"] = tripId
+        created_from, created_to = parse_export_date(date_from), parse_export_date(date_to)
+        if created_from or created_to:
+            query["createdAt"] = {}
+            if created_from:
+                query["createdAt"]["$gte"] = created_from
+            if created_to:
+                query["createdAt"]["$lt"] = created_to
+        bookings_cursor = get_db().bookings.find(query).batch_size(EXPORT_BATCH_SIZE)
+        return (Booking.serialize(booking) for booking in bookings_cursor)
+
+    @staticmethod
+    def get_available_seats(tripId, fromStop=None, toStop=None):
+        """
+        Returns the seat numbers of a trip that are taken on any segment between the boarding
+        and alighting stops (default is the whole trip).
+        """
+        mask = segment_mask(fromStop, toStop)
         try:
-            booked_seats = current_app.mongo.db.bookings.find({"tripId": tripId, "status": "booked"})
-            booked_seat_numbers = [booking["seatNumber"] for booking in booked_seats]
-            return booked_seat_numbers
+            return BookingFacade._load_seat_map(tripId).booked_seats(mask)
         except Exception as e:
             logging.error("Error getting available seats: %s", e)
-            raise
\ No newline at end of file
+            raise
+
+    @staticmethod
+    def get_free_seats(tripId, fromStop=None, toStop=None):
+        """
+        Returns the seat numbers of a trip that are free on every segment between the boarding
+        and alighting stops (default is the whole trip), or None when the trip has no bus
+        assigned and its capacity is unknown.
+        """
+        mask = segment_mask(fromStop, toStop)
+        try:
+            return BookingFacade._load_seat_map(tripId).free_seats(mask)
+        except Exception as e:
+            logging.error("Error getting free seats: %s", e)
+            raise
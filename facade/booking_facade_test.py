@@ -0,0 +1,275 @@
+import threading
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from bson.objectid import ObjectId
+
+from facade.booking_facade import BookingFacade, SeatUnavailableError
+from facade.testing import AppTestCase, app
+from utils.segments import segment_mask
+
+THREADS = 20
+
+
+class StaleCursor(list):
+    """
+    Stands in for a cursor over bookings read before a concurrent change.
+    """
+
+    def limit(self, limit):
+        return self
+
+
+class BookingFacadeConcurrencyTest(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tripId = self.create_trip(stops=("Delhi", "Agra", "Gwalior", "Jhansi", "Bhopal"))
+
+    def race(self, book, count=THREADS):
+        """
+        Runs ``book(i)`` in ``count`` threads released at once and returns what each returned
+        or raised.
+        """
+        barrier = threading.Barrier(count)
+        outcomes = [None] * count
+
+        def run(i):
+            with app.app_context():
+                barrier.wait(timeout=10)
+                try:
+                    outcomes[i] = book(i)
+                except Exception as e:
+                    outcomes[i] = e
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=30)
+            self.assertFalse(thread.is_alive())
+        return outcomes
+
+    def seat_word(self, seatNumber):
+        seats_doc = self.db.trip_seats.find_one({"_id": self.tripId}) or {}
+        return int(seats_doc.get("seats", {}).get(str(seatNumber), 0))
+
+    def test_one_booking_wins_a_seat(self):
+        outcomes = self.race(lambda i: BookingFacade.create_booking(self.tripId, f"user{i}", 7, "booked", 0, 4))
+
+        booked = [outcome for outcome in outcomes if isinstance(outcome, dict)]
+        rejected = [outcome for outcome in outcomes if isinstance(outcome, SeatUnavailableError)]
+        self.assertEqual(len(booked), 1)
+        self.assertEqual(len(rejected), THREADS - 1)
+        self.assertEqual(self.db.bookings.count_documents({"tripId": self.tripId, "seatNumber": 7}), 1)
+        self.assertEqual(self.seat_word(7), segment_mask(0, 4))
+
+    def test_one_group_booking_wins_a_shared_seat(self):
+        outcomes = self.race(
+            lambda i: BookingFacade.create_bookings(self.tripId, f"user{i}", [i + 1, 21 + i % 2], "booked")
+        )
+
+        booked = [outcome for outcome in outcomes if isinstance(outcome, list)]
+        rejected = [outcome for outcome in outcomes if isinstance(outcome, SeatUnavailableError)]
+        self.assertEqual(len(booked), 2)
+        self.assertEqual(len(rejected), THREADS - 2)
+        self.assertEqual(self.db.bookings.count_documents({"tripId": self.tripId}), 4)
+
+    def test_overlapping_segments_are_booked_once(self):
+        journeys = [(0, 2), (1, 3), (2, 4), (0, 4), (1, 2), (3, 4)]
+        outcomes = self.race(
+            lambda i: BookingFacade.create_booking(self.tripId, f"user{i}", 7, "booked", *journeys[i]),
+            count=len(journeys)
+        )
+
+        booked = [journeys[i] for i, outcome in enumerate(outcomes) if isinstance(outcome, dict)]
+        rejected = [outcome for outcome in outcomes if not isinstance(outcome, dict)]
+        self.assertTrue(booked)
+        self.assertTrue(all(isinstance(outcome, SeatUnavailableError) for outcome in rejected))
+        masks = [segment_mask(*journey) for journey in booked]
+        for i, mask in enumerate(masks):
+            for other in masks[i + 1:]:
+                self.assertFalse(mask & other, f"{booked} overlap")
+        combined = 0
+        for mask in masks:
+            combined |= mask
+        self.assertEqual(self.seat_word(7), combined)
+        self.assertEqual(self.db.bookings.count_documents({"tripId": self.tripId}), len(booked))
+
+    def test_disjoint_segments_are_all_booked(self):
+        journeys = [(0, 1), (1, 2), (2, 3), (3, 4)]
+        outcomes = self.race(
+            lambda i: BookingFacade.create_booking(self.tripId, f"user{i}", 7, "booked", *journeys[i]),
+            count=len(journeys)
+        )
+
+        self.assertTrue(all(isinstance(outcome, dict) for outcome in outcomes), outcomes)
+        self.assertEqual(self.seat_word(7), segment_mask(0, 4))
+
+    def test_rejected_booking_leaves_claims_untouched(self):
+        BookingFacade.create_booking(self.tripId, "user0", 7, "booked", 1, 3)
+
+        with self.assertRaises(SeatUnavailableError):
+            BookingFacade.create_booking(self.tripId, "user1", 7, "booked", 2, 4)
+        self.assertEqual(self.seat_word(7), segment_mask(1, 3))
+        BookingFacade.create_booking(self.tripId, "user1", 7, "booked", 3, 4)
+        self.assertEqual(self.seat_word(7), segment_mask(1, 4))
+
+
+class BookingRoutesTest(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.create_user("traveller")
+        self.token = self.login("traveller")["token"]
+        self.tripId = self.create_trip()
+
+    def book(self, seatNumber, fromStop=None, toStop=None):
+        body = {"tripId": self.tripId, "seatNumber": seatNumber}
+        if fromStop is not None:
+            body.update(fromStop=fromStop, toStop=toStop)
+        return self.call("post", "/booking/create", self.token, json=body)
+
+    def test_taken_seat_is_a_conflict(self):
+        self.assertEqual(self.book(3, 0, 2).status_code, 200)
+
+        response = self.book(3, 1, 3)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.get_json(), {"error": "Seat 3 is already booked"})
+        self.assertEqual(self.book(3, 2, 3).status_code, 200)
+
+    def test_unknown_trip_stops_and_seats_are_rejected(self):
+        self.assertEqual(self.book(3, 0, 40).status_code, 400)
+        self.assertEqual(self.book(9999).status_code, 400)
+        self.tripId = "000000000000000000000000"
+        self.assertEqual(self.book(3).status_code, 400)
+        self.assertIsNone(self.db.trip_seats.find_one({}))
+
+    def test_group_booking_is_all_or_nothing(self):
+        self.assertEqual(self.book(2).status_code, 200)
+
+        response = self.call("post", "/booking/create_bulk", self.token, json={"tripId": self.tripId, "seatNumbers": [1, 2, 3]})
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.db.bookings.count_documents({}), 1)
+        self.assertEqual(self.book(1).status_code, 200)
+        self.assertEqual(self.book(3).status_code, 200)
+
+    def test_moving_a_booking_frees_its_old_seat(self):
+        booking = self.book(3, 0, 2).get_json()
+        self.assertEqual(self.book(4, 1, 3).status_code, 200)
+
+        self.assertEqual(self.call("put", f"/booking/{booking['_id']}", self.token, json={"seatNumber": 4}).status_code, 409)
+        self.assertEqual(self.call("put", f"/booking/{booking['_id']}", self.token, json={"seatNumber": 5}).status_code, 200)
+        self.assertEqual(self.book(3).status_code, 200)
+
+    def test_update_cannot_hold_a_seat(self):
+        booking = self.book(3).get_json()
+
+        for status in ("held", "bokked"):
+            response = self.call("put", f"/booking/{booking['_id']}", self.token, json={"status": status})
+            self.assertEqual(response.status_code, 400)
+        with self.assertRaises(ValueError):
+            BookingFacade.update_booking(booking["_id"], status="held")
+        self.assertEqual(self.db.bookings.find_one({})["status"], "booked")
+        self.assertEqual(self.call("put", f"/booking/{booking['_id']}", self.token, json={"status": "cancelled"}).status_code, 200)
+        self.assertEqual(self.book(3).status_code, 200)
+
+    def test_update_retries_when_the_booking_changes_under_it(self):
+        booking = BookingFacade.create_booking(self.tripId, "traveller", 3, "booked", 0, 2)
+        find_one = self.db.bookings.find_one
+        raced = []
+
+        def find_one_then_race(*args, **kwargs):
+            found = find_one(*args, **kwargs)
+            if not raced:
+                raced.append(True)
+                BookingFacade.update_booking(booking["_id"], seatNumber=4)
+            return found
+
+        self.db.bookings.find_one = find_one_then_race
+        self.assertTrue(BookingFacade.update_booking(booking["_id"], fromStop=0, toStop=3))
+        seats = self.db.trip_seats.find_one({"_id": self.tripId})["seats"]
+        self.assertEqual(int(seats["3"]), 0)
+        self.assertEqual(int(seats["4"]), segment_mask(0, 3))
+
+
+class SeatMapCacheTest(AppTestCase):
+    def test_claim_during_a_cache_miss_is_not_lost(self):
+        tripId = self.create_trip()
+        find_one = self.db.trip_seats.find_one
+        raced = []
+
+        def find_one_then_claim(*args, **kwargs):
+            found = find_one(*args, **kwargs)
+            if not raced:
+                raced.append(True)
+                BookingFacade.create_booking(tripId, "other", 1, "booked")
+            return found
+
+        self.db.trip_seats.find_one = find_one_then_claim
+        self.assertIn(1, BookingFacade.get_free_seats(tripId))
+        self.db.trip_seats.find_one = find_one
+
+        self.assertNotIn(1, BookingFacade.get_free_seats(tripId))
+
+
+class SeatHoldTest(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tripId = self.create_trip()
+
+    def hold(self, seatNumbers, expired=False):
+        bookings = BookingFacade.hold_seats(self.tripId, "traveller", seatNumbers)
+        if expired:
+            self.db.bookings.update_many(
+                {"_id": {"$in": [ObjectId(booking["_id"]) for booking in bookings]}},
+                {"$set": {"expiresAt": datetime.now(timezone.utc) - timedelta(seconds=1)}}
+            )
+        return bookings
+
+    def test_held_seat_cannot_be_booked(self):
+        self.hold([5])
+
+        with self.assertRaises(SeatUnavailableError):
+            BookingFacade.create_booking(self.tripId, "other", 5, "booked")
+        self.assertEqual(BookingFacade.release_expired_holds(), 0)
+
+    def test_confirmed_hold_is_kept_by_the_reaper(self):
+        booking = self.hold([5])[0]
+
+        self.assertEqual(BookingFacade.confirm_hold(booking["_id"], "traveller")["status"], "booked")
+        self.assertIsNone(BookingFacade.confirm_hold(booking["_id"], "traveller"))
+        self.assertEqual(BookingFacade.release_expired_holds(), 0)
+        self.assertEqual(BookingFacade.get_available_seats(self.tripId), [5])
+
+    def test_reaper_releases_expired_holds(self):
+        expired = self.hold([5, 6], expired=True)
+        self.hold([7])
+
+        self.assertEqual(BookingFacade.release_expired_holds(batch_size=1), 2)
+        self.assertEqual(BookingFacade.get_available_seats(self.tripId), [7])
+        self.assertIsNone(BookingFacade.confirm_hold(expired[0]["_id"], "traveller"))
+        self.assertEqual(self.db.bookings.count_documents({"status": "expired"}), 2)
+        BookingFacade.create_booking(self.tripId, "other", 5, "booked")
+
+    def test_reaper_with_a_stale_batch_keeps_rebooked_seats(self):
+        self.hold([5], expired=True)
+        stale = list(self.db.bookings.find({"status": "held"}, {"tripId": 1, "seatNumber": 1, "fromStop": 1, "toStop": 1}))
+        self.assertEqual(BookingFacade.release_expired_holds(), 1)
+        BookingFacade.create_booking(self.tripId, "other", 5, "booked")
+
+        # A second reaper read the same holds before the first expired them.
+        find = self.db.bookings.find
+
+        def find_stale(query, *args, **kwargs):
+            if query.get("status") == "held":
+                return StaleCursor(stale)
+            return find(query, *args, **kwargs)
+
+        self.db.bookings.find = find_stale
+        self.assertEqual(BookingFacade.release_expired_holds(), 0)
+        with self.assertRaises(SeatUnavailableError):
+            BookingFacade.create_booking(self.tripId, "third", 5, "booked")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,12 @@
 # facade/bus_facade.py
 import logging
-from flask import current_app
 from bson.objectid import ObjectId
 from models.bus import Bus
+from storage import get_db
+from utils.bulk_import import IMPORT_CHUNK_SIZE, bulk_insert, keep_id, require_fields
+from utils.fields import build_projection
+from utils.pagination import find_page
+from utils.totals import count_total
 
 class BusFacade:
     @staticmethod
@@ -18,7 +22,7 @@ class BusFacade:
                 permitValidTill=permitValidTill,
                 createdBy=createdBy
             )
-            result = current_app.mongo.db.buses.insert_one(bus.to_dict())
+            result = get_db().buses.insert_one(bus.to_dict())
             bus._id = str(result.inserted_id)
             return bus.to_dict()
         except Exception as e:
@@ -26,12 +30,13 @@ class BusFacade:
             raise
 
     @staticmethod
-    def get_bus(bus_id):
+    def get_bus(bus_id, fields=None):
         try:
-            bus_data = current_app.mongo.db.buses.find_one({"_id": ObjectId(bus_id)})
+            bus_data = get_db().buses.find_one(
+                {"_id": ObjectId(bus_id)}, build_projection(fields, Bus.FIELDS)
+            )
             if bus_data:
-                bus = Bus.from_dict(bus_data)
-                return bus.to_dict()
+                return Bus.serialize(bus_data, fields)
             return None
         except Exception as e:
             logging.error("Error getting bus: %s", e)
@@ -57,7 +62,7 @@ class BusFacade:
                 update_fields["permitValidTill"] = permitValidTill
             if updatedAt:
                 update_fields["updatedAt"] = updatedAt
-            result = current_app.mongo.db.buses.update_one(
+            result = get_db().buses.update_one(
                 {"_id": ObjectId(bus_id)}, {"$set": update_fields}
             )
             return result.modified_count > 0
@@ -68,25 +73,54 @@ class BusFacade:
     @staticmethod
     def delete_bus(bus_id):
         try:
-            result = current_app.mongo.db.buses.delete_one({"_id": ObjectId(bus_id)})
+            result = get_db().buses.delete_one({"_id": ObjectId(bus_id)})
             return result.deleted_count > 0
         except Exception as e:
             logging.error("Error deleting bus: %s", e)
             raise
 
     @staticmethod
-    def get_all_buses(page, size):
+    def get_all_buses(page, size, after=None, with_total=True, fields=None):
         try:
-            skip = (page - 1) * size
-            buses_cursor = current_app.mongo.db.buses.find().skip(skip).limit(size)
-            buses = [Bus.from_dict(bus).to_dict() for bus in buses_cursor]
-            total_buses = current_app.mongo.db.buses.count_documents({})
-            return {
+            buses_docs, next_cursor = find_page(
+                get_db().buses, {}, page, size, after, build_projection(fields, Bus.FIELDS)
+            )
+            buses = [Bus.serialize(bus, fields) for bus in buses_docs]
+            buses_data = {
                 "buses": buses,
-                "pageSize": size,
-                "currentPage": page,
-                "totalData": total_buses
+                "pageSize": size
             }
+            if with_total:
+                buses_data["totalData"], buses_data["totalExact"] = count_total(get_db().buses, {})
+            if after is None:
+                buses_data["currentPage"] = page
+            else:
+                buses_data["nextCursor"] = next_cursor
+            return buses_data
         except Exception as e:
             logging.error("Error getting all buses: %s", e)
-            raise
\ No newline at end of file
+            raise
+
+    @staticmethod
+    def import_buses(rows, createdBy=None, chunk_size=IMPORT_CHUNK_SIZE):
+        """
+        Bulk imports buses, validating each row through the Bus model.
+
+        :param rows: An iterable of bus rows shaped like ``tests/example/bus.json``.
+        :param createdBy: The importing user, overriding the rows' createdBy when set.
+        :param chunk_size: The number of buses per bulk insert.
+        :return: A report with the inserted count and the per-row errors.
+        """
+        def build(row):
+            require_fields(row, ("travel", "isAc", "isSleeper", "registration", "totalSeat",
+                                 "insuranceValidTill", "permitValidTill"))
+            if not isinstance(row["totalSeat"], int) or row["totalSeat"] < 1:
+                raise ValueError("totalSeat must be a positive integer")
+            bus = Bus.from_dict({**row, "createdBy": createdBy or row.get("createdBy")})
+            return keep_id(row, bus.to_dict())
+
+        try:
+            return bulk_insert(get_db().buses, rows, build, chunk_size)
+        except Exception as e:
+            logging.error("Error importing buses: %s", e)
+            raise
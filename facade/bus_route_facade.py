@@ -1,8 +1,13 @@
 # facade/bus_route_facade.py
 import logging
-from flask import current_app
 from bson.objectid import ObjectId
 from models.bus_route import BusRoute
+from storage import get_db
+from utils.bulk_import import IMPORT_CHUNK_SIZE, bulk_insert, keep_id, require_fields
+from utils.city_index import city_index
+from utils.fields import build_projection
+from utils.pagination import find_page
+from utils.totals import count_total
 
 class BusRouteFacade:
 
@@ -10,19 +15,24 @@ class BusRouteFacade:
     def add_city(name):
         try:
             city = {"name": name}
-            result = current_app.mongo.db.cities.insert_one(city)
+            result = get_db().cities.insert_one(city)
             city["_id"] = str(result.inserted_id)
+            city_index.add(city)
             return city
         except Exception as e:
             logging.error("Error adding city: %s", e)
             raise
 
     @staticmethod
-    def list_cities(query):
+    def list_cities(query, limit=10):
+        """
+        Autocompletes city names from the in-memory ``city_index``, loading the cities from the
+        database only when the index is empty or stale.
+        """
         try:
-            cities_cursor = current_app.mongo.db.cities.find({"name": {"$regex": query, "$options": "i"}})
-            cities = [{"_id": str(city["_id"]), "name": city["name"]} for city in cities_cursor]
-            return cities
+            if city_index.is_stale():
+                city_index.load(get_db().cities.find({}, {"name": 1}))
+            return city_index.search(query, limit)
         except Exception as e:
             logging.error("Error listing cities: %s", e)
             raise
@@ -35,7 +45,7 @@ class BusRouteFacade:
                 distance=distance,
                 createdBy=createdBy
             )
-            result = current_app.mongo.db.bus_routes.insert_one(bus_route.to_dict())
+            result = get_db().bus_routes.insert_one(bus_route.to_dict())
             bus_route._id = str(result.inserted_id)
             return bus_route.to_dict()
         except Exception as e:
@@ -43,12 +53,13 @@ class BusRouteFacade:
             raise
 
     @staticmethod
-    def get_route(route_id):
+    def get_route(route_id, fields=None):
         try:
-            route_data = current_app.mongo.db.bus_routes.find_one({"_id": ObjectId(route_id)})
+            route_data = get_db().bus_routes.find_one(
+                {"_id": ObjectId(route_id)}, build_projection(fields, BusRoute.FIELDS)
+            )
             if route_data:
-                bus_route = BusRoute.from_dict(route_data)
-                return bus_route.to_dict()
+                return BusRoute.serialize(route_data, fields)
             return None
         except Exception as e:
             logging.error("Error getting bus route: %s", e)
@@ -66,7 +77,7 @@ class BusRouteFacade:
                 update_fields["distance"] = distance
             if updatedAt:
                 update_fields["updatedAt"] = updatedAt
-            result = current_app.mongo.db.bus_routes.update_one(
+            result = get_db().bus_routes.update_one(
                 {"_id": ObjectId(route_id)}, {"$set": update_fields}
             )
             return result.modified_count > 0
@@ -77,25 +88,53 @@ class BusRouteFacade:
     @staticmethod
     def delete_route(route_id):
         try:
-            result = current_app.mongo.db.bus_routes.delete_one({"_id": ObjectId(route_id)})
+            result = get_db().bus_routes.delete_one({"_id": ObjectId(route_id)})
             return result.deleted_count > 0
         except Exception as e:
             logging.error("Error deleting bus route: %s", e)
             raise
 
     @staticmethod
-    def get_all_routes(page, size):
+    def get_all_routes(page, size, after=None, with_total=True, fields=None):
         try:
-            skip = (page - 1) * size
-            routes_cursor = current_app.mongo.db.bus_routes.find().skip(skip).limit(size)
-            routes = [BusRoute.from_dict(route).to_dict() for route in routes_cursor]
-            total_routes = current_app.mongo.db.bus_routes.count_documents({})
-            return {
+            routes_docs, next_cursor = find_page(
+                get_db().bus_routes, {}, page, size, after, build_projection(fields, BusRoute.FIELDS)
+            )
+            routes = [BusRoute.serialize(route, fields) for route in routes_docs]
+            routes_data = {
                 "routes": routes,
-                "pageSize": size,
-                "currentPage": page,
-                "totalData": total_routes
+                "pageSize": size
             }
+            if with_total:
+                routes_data["totalData"], routes_data["totalExact"] = count_total(get_db().bus_routes, {})
+            if after is None:
+                routes_data["currentPage"] = page
+            else:
+                routes_data["nextCursor"] = next_cursor
+            return routes_data
         except Exception as e:
             logging.error("Error getting all bus routes: %s", e)
-            raise
\ No newline at end of file
+            raise
+
+    @staticmethod
+    def import_routes(rows, createdBy=None, chunk_size=IMPORT_CHUNK_SIZE):
+        """
+        Bulk imports bus routes, validating each row through the BusRoute model.
+
+        :param rows: An iterable of route rows shaped like ``tests/example/bus_route.json``.
+        :param createdBy: The importing user, overriding the rows' createdBy when set.
+        :param chunk_size: The number of routes per bulk insert.
+        :return: A report with the inserted count and the per-row errors.
+        """
+        def build(row):
+            require_fields(row, ("route", "routeNo", "distance"))
+            if not isinstance(row["distance"], (int, float)) or row["distance"] < 0:
+                raise ValueError("distance must be a non-negative number")
+            bus_route = BusRoute.from_dict({**row, "createdBy": createdBy or row.get("createdBy")})
+            return keep_id(row, bus_route.to_dict())
+
+        try:
+            return bulk_insert(get_db().bus_routes, rows, build, chunk_size)
+        except Exception as e:
+            logging.error("Error importing bus routes: %s", e)
+            raise
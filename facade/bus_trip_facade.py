@@ -1,12 +1,26 @@
 # facade/bus_trip_facade.py
 import logging
-from flask import current_app
 from bson.objectid import ObjectId
+from facade.trip_schedule_facade import TripScheduleFacade
+from models.booking import ACTIVE_STATUSES
 from models.bus_trip import BusTrip
+from storage import get_db
+from utils.bulk_import import IMPORT_CHUNK_SIZE, bulk_insert, keep_id, require_fields
+from utils.dates import normalize_trip_date, parse_trip_date
+from utils.export import EXPORT_BATCH_SIZE
+from utils.fares import quote_fares, stop_indices, trip_fare_matrix
+from utils.fields import build_projection
+from utils.journey_planner import journey_planner_cache
+from utils.pagination import find_page
+from utils.seat_map import seat_map_cache
+from utils.stop_index import search_key, stop_keys
+from utils.totals import count_total
+from utils.trip_search_cache import invalidate_trip_searches, search_cache_key, search_tag, trip_search_cache
 
 class BusTripFacade:
     @staticmethod
-    def create_trip(routeId, date, frequency, timing, fare, stops, createdBy):
+    def create_trip(routeId, date, frequency, timing, fare, stops, createdBy, busId=None):
+        date = normalize_trip_date(date)
         try:
             bus_trip = BusTrip(
                 routeId=routeId,
@@ -15,35 +29,42 @@ class BusTripFacade:
                 timing=timing,
                 fare=fare,
                 stops=stops,
-                createdBy=createdBy
+                createdBy=createdBy,
+                busId=busId
             )
-            result = current_app.mongo.db.bus_trips.insert_one(bus_trip.to_dict())
+            trip_doc = bus_trip.to_dict()
+            trip_doc["stopKeys"] = stop_keys(stops)
+            trip_doc["fareMatrix"] = trip_fare_matrix(fare, stops)
+            result = get_db().bus_trips.insert_one(trip_doc)
             bus_trip._id = str(result.inserted_id)
+            invalidate_trip_searches([(date, trip_doc["stopKeys"])])
+            journey_planner_cache.invalidate(date)
             return bus_trip.to_dict()
         except Exception as e:
             logging.error("Error creating bus trip: %s", e)
             raise
 
     @staticmethod
-    def get_trip(trip_id):
+    def get_trip(trip_id, fields=None):
         try:
-            trip_data = current_app.mongo.db.bus_trips.find_one({"_id": ObjectId(trip_id)})
+            trip_data = get_db().bus_trips.find_one(
+                {"_id": ObjectId(trip_id)}, build_projection(fields, BusTrip.FIELDS)
+            )
             if trip_data:
-                bus_trip = BusTrip.from_dict(trip_data)
-                return bus_trip.to_dict()
+                return BusTrip.serialize(trip_data, fields)
             return None
         except Exception as e:
             logging.error("Error getting bus trip: %s", e)
             raise
 
     @staticmethod
-    def update_trip(trip_id, routeId=None, date=None, frequency=None, timing=None, fare=None, stops=None, updatedAt=None):
+    def update_trip(trip_id, routeId=None, date=None, frequency=None, timing=None, fare=None, stops=None, busId=None, updatedAt=None):
         try:
             update_fields = {}
             if routeId:
                 update_fields["routeId"] = routeId
             if date:
-                update_fields["date"] = date
+                update_fields["date"] = normalize_trip_date(date)
             if frequency:
                 update_fields["frequency"] = frequency
             if timing:
@@ -52,11 +73,39 @@ class BusTripFacade:
                 update_fields["fare"] = fare
             if stops:
                 update_fields["stops"] = stops
+                update_fields["stopKeys"] = stop_keys(stops)
+            if busId:
+                update_fields["busId"] = busId
             if updatedAt:
                 update_fields["updatedAt"] = updatedAt
-            result = current_app.mongo.db.bus_trips.update_one(
-                {"_id": ObjectId(trip_id)}, {"$set": update_fields}
+            existing = get_db().bus_trips.find_one(
+                {"_id": ObjectId(trip_id)}, {"date": 1, "stopKeys": 1, "fare": 1, "stops": 1}
+            )
+            if not existing:
+                return False
+            stops_changed = "stops" in update_fields and update_fields["stops"] != existing.get("stops")
+            # Seat claims and bookings refer to stops by index, so they would point at the wrong
+            # segments of a new stop list.
+            if stops_changed and get_db().bookings.find_one(
+                {"tripId": trip_id, "status": {"$in": list(ACTIVE_STATUSES)}}, {"_id": 1}
+            ):
+                raise ValueError("The stops of a trip with active bookings cannot be changed")
+            if "fare" in update_fields or "stops" in update_fields:
+                update_fields["fareMatrix"] = trip_fare_matrix(
+                    update_fields.get("fare", existing.get("fare")),
+                    update_fields.get("stops", existing.get("stops"))
+                )
+            result = get_db().bus_trips.update_one(
+                {"_id": existing["_id"]}, {"$set": update_fields}
             )
+            if busId or stops_changed:
+                seat_map_cache.invalidate(trip_id)
+            invalidate_trip_searches([
+                (existing.get("date"), existing.get("stopKeys")),
+                (update_fields.get("date", existing.get("date")), update_fields.get("stopKeys", existing.get("stopKeys")))
+            ])
+            journey_planner_cache.invalidate(existing.get("date"))
+            journey_planner_cache.invalidate(update_fields.get("date", existing.get("date")))
             return result.modified_count > 0
         except Exception as e:
             logging.error("Error updating bus trip: %s", e)
@@ -65,30 +114,145 @@ class BusTripFacade:
     @staticmethod
     def delete_trip(trip_id):
         try:
-            result = current_app.mongo.db.bus_trips.delete_one({"_id": ObjectId(trip_id)})
-            return result.deleted_count > 0
+            trip_data = get_db().bus_trips.find_one_and_delete(
+                {"_id": ObjectId(trip_id)}, {"date": 1, "stopKeys": 1}
+            )
+            seat_map_cache.invalidate(trip_id)
+            if not trip_data:
+                return False
+            invalidate_trip_searches([(trip_data.get("date"), trip_data.get("stopKeys"))])
+            journey_planner_cache.invalidate(trip_data.get("date"))
+            return True
         except Exception as e:
             logging.error("Error deleting bus trip: %s", e)
             raise
 
     @staticmethod
-    def get_all_trips(page, size, date=None, busTypes=None, from_city=None, to_city=None):
+    def get_all_trips(page, size, date=None, busTypes=None, from_city=None, to_city=None, after=None, with_total=True, fields=None):
+        """
+        Searches bus trips, serving repeated searches from ``trip_search_cache``.
+
+        Cached results are tagged with the searched date and stop key, and trip writes drop the
+        tags of the dates and stop keys they touch. Searches by origin and/or destination quote
+        each trip's fare for that journey as ``fareQuote``, read from the stored fare matrices.
+        """
         try:
             query = {}
             if date:
+                date = normalize_trip_date(date)
                 query['date'] = date
+                TripScheduleFacade.ensure_materialized(parse_trip_date(date))
             if busTypes:
                 query['busTypes'] = busTypes
-            if from_city:
-                query['from'] = from_city
-            if to_city:
-                query['to'] = to_city
-
-            skip = (page - 1) * size
-            trips_cursor = current_app.mongo.db.bus_trips.find(query).skip(skip).limit(size)
-            trips = [BusTrip.from_dict(trip).to_dict() for trip in trips_cursor]
-            total_trips = current_app.mongo.db.bus_trips.count_documents(query)
-            return {'trips': trips, 'total': total_trips}
+            route_key = search_key(from_city, to_city)
+            if route_key:
+                query['stopKeys'] = route_key
+
+            cache_key = search_cache_key(
+                date, route_key, busTypes, page, size, after, with_total, sorted(fields) if fields else None
+            )
+            trips_data = trip_search_cache.get(cache_key)
+            if trips_data is not None:
+                return trips_data
+
+            projection = build_projection(fields, BusTrip.FIELDS)
+            if projection and route_key:
+                projection.update({"fare": 1, "stops": 1, "fareMatrix": 1})
+            trips_docs, next_cursor = find_page(
+                get_db().bus_trips, query, page, size, after, projection
+            )
+            trips = [BusTrip.serialize(trip, fields) for trip in trips_docs]
+            if route_key:
+                for trip, fare_quote in zip(trips, quote_fares(trips_docs, from_city, to_city)):
+                    trip["fareQuote"] = fare_quote
+            trips_data = {'trips': trips}
+            if with_total:
+                trips_data['total'], trips_data['totalExact'] = count_total(get_db().bus_trips, query)
+            if after is not None:
+                trips_data['nextCursor'] = next_cursor
+            trip_search_cache.set(cache_key, trips_data, [search_tag(date, route_key)])
+            return trips_data
         except Exception as e:
             logging.error("Error getting bus trips: %s", e)
-            raise
\ No newline at end of file
+            raise
+
+    @staticmethod
+    def export_trips(date_from=None, date_to=None):
+        """
+        Iterates over all bus trips in a date range for export, reading them through a single
+        server-side cursor in batches of ``EXPORT_BATCH_SIZE``.
+
+        :param date_from: Only export trips on or after this date.
+        :param date_to: Only export trips on or before this date.
+        :return: A generator of serialized bus trips.
+        """
+        query = {}
+        if date_from or date_to:
+            query["date"] = {}
+            if date_from:
+                query["date"]["$gte"] = normalize_trip_date(date_from)
+            if date_to:
+                query["date"]["$lte"] = normalize_trip_date(date_to)
+        trips_cursor = get_db().bus_trips.find(query).batch_size(EXPORT_BATCH_SIZE)
+        return (BusTrip.serialize(trip) for trip in trips_cursor)
+
+    @staticmethod
+    def import_trips(rows, createdBy=None, chunk_size=IMPORT_CHUNK_SIZE):
+        """
+        Bulk imports bus trips, validating each row through the BusTrip model.
+
+        :param rows: An iterable of trip rows shaped like ``tests/example/bus_trip.json``.
+        :param createdBy: The importing user, overriding the rows' createdBy when set.
+        :param chunk_size: The number of trips per bulk insert.
+        :return: A report with the inserted count and the per-row errors.
+        """
+        def build(row):
+            require_fields(row, ("routeId", "date", "frequency", "timing", "fare", "stops"))
+            if not isinstance(row["fare"], (int, float)) or row["fare"] < 0:
+                raise ValueError("fare must be a non-negative number")
+            if not isinstance(row["stops"], list) or not row["stops"]:
+                raise ValueError("stops must be a non-empty list")
+            bus_trip = BusTrip.from_dict({**row, "createdBy": createdBy or row.get("createdBy")})
+            bus_trip.date = normalize_trip_date(bus_trip.date)
+            trip_doc = keep_id(row, bus_trip.to_dict())
+            trip_doc["stopKeys"] = stop_keys(bus_trip.stops)
+            trip_doc["fareMatrix"] = trip_fare_matrix(bus_trip.fare, bus_trip.stops)
+            return trip_doc
+
+        try:
+            report = bulk_insert(get_db().bus_trips, rows, build, chunk_size)
+            if report["inserted"]:
+                trip_search_cache.clear()
+                journey_planner_cache.invalidate()
+            return report
+        except Exception as e:
+            logging.error("Error importing bus trips: %s", e)
+            raise
+
+    @staticmethod
+    def get_fare_quote(trip_id, from_city=None, to_city=None):
+        """
+        Quotes the fare between two cities on a trip.
+
+        :return: The fare quote with the boarding and alighting stop indices, None when the
+            trip does not exist, or a quote of None when the trip does not serve the journey.
+        """
+        try:
+            trip_data = get_db().bus_trips.find_one(
+                {"_id": ObjectId(trip_id)}, {"fare": 1, "stops": 1, "fareMatrix": 1}
+            )
+            if not trip_data:
+                return None
+            indices = stop_indices(trip_data.get("stops"), from_city, to_city)
+            return {
+                "fromStop": indices[0] if indices else None,
+                "toStop": indices[1] if indices else None,
+                "fare": quote_fares([trip_data], from_city, to_city)[0]
+            }
+        except Exception as e:
+            logging.error("Error quoting bus trip fare: %s", e)
+            raise
+
+    @staticmethod
+    def get_search_cache_stats():
+        return trip_search_cache.stats()
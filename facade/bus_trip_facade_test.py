@@ -0,0 +1,95 @@
+import csv
+import io
+import json
+import unittest
+
+from bson.int64 import Int64
+
+from facade.booking_facade import BookingFacade
+from facade.testing import AppTestCase
+from utils.migrations import migrate
+from utils.segments import segment_mask
+
+TRIP = {
+    "routeId": "route", "frequency": "daily", "timing": "20:00", "fare": 1000,
+    "stops": [{"stop": "Lanka", "time": "20:00"}, {"stop": "Prayagraj", "time": "23:00"}, {"stop": "Kanpur", "time": "02:00"}]
+}
+
+
+class TripExportTest(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.create_user("operator", userType=("user", "admin"))
+        self.token = self.login("operator")["token"]
+        for date in ("2025-01-14", "2025-01-15T00:00:00Z", "2025-01-16", "2025-01-17"):
+            response = self.call("post", "/bus_trip/create", self.token, json=dict(TRIP, date=date))
+            self.assertEqual(response.status_code, 200, response.get_json())
+
+    def export(self, query=""):
+        response = self.call("get", f"/bus_trip/export{query}", self.token)
+        self.assertEqual(response.status_code, 200, response.get_data(as_text=True))
+        return response
+
+    def test_ndjson_export_covers_the_date_range(self):
+        response = self.export("?from=2025-01-15&to=2025-01-16")
+
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        trips = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual(sorted(trip["date"] for trip in trips), ["2025-01-15", "2025-01-16"])
+
+    def test_csv_export_has_a_header_and_a_row_per_trip(self):
+        response = self.export("?format=csv&to=2025-01-15T23:59:59Z")
+
+        self.assertEqual(response.mimetype, "text/csv")
+        rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+        self.assertEqual(sorted(row["date"] for row in rows), ["2025-01-14", "2025-01-15"])
+        self.assertTrue(all(row["_id"] for row in rows))
+
+    def test_export_rejects_unknown_formats_and_dates(self):
+        self.assertEqual(self.call("get", "/bus_trip/export?format=xml", self.token).status_code, 400)
+        self.assertEqual(self.call("get", "/bus_trip/export?from=tomorrow", self.token).status_code, 400)
+
+    def test_legacy_trip_dates_are_exported_after_migration(self):
+        self.db.bus_trips.insert_one(dict(TRIP, date="2025-01-15T00:00:00Z"))
+        self.assertEqual(len(self.export("?to=2025-01-15").get_data(as_text=True).splitlines()), 2)
+
+        migrate(self.db)
+
+        self.assertEqual(len(self.export("?to=2025-01-15").get_data(as_text=True).splitlines()), 3)
+        response = self.call("get", "/bus_trip/list?date=2025-01-15&from=Lanka&to=Kanpur", self.token)
+        self.assertEqual(len(response.get_json()["trips"]), 2)
+
+
+
+class TripUpdateTest(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.create_user("operator", userType=("user", "admin"))
+        self.token = self.login("operator")["token"]
+        self.tripId = self.create_trip(stops=("Lanka", "Prayagraj", "Kanpur"))
+        self.new_stops = [{"stop": "Lanka", "time": "20:00"}, {"stop": "Kanpur", "time": "02:00"}]
+
+    def update(self, **body):
+        return self.call("put", f"/bus_trip/{self.tripId}", self.token, json=body)
+
+    def test_stops_of_a_booked_trip_cannot_change(self):
+        booking = BookingFacade.create_booking(self.tripId, "traveller", 3, "booked", 1, 2)
+        stops = self.db.bus_trips.find_one({})["stops"]
+
+        self.assertEqual(self.update(stops=self.new_stops).status_code, 400)
+        self.assertEqual(self.db.bus_trips.find_one({})["stops"], stops)
+        self.assertEqual(self.update(stops=stops, fare=1200).status_code, 200)
+
+        BookingFacade.update_booking(booking["_id"], status="cancelled")
+        self.assertEqual(self.update(stops=self.new_stops).status_code, 200)
+
+    def test_changing_stops_drops_the_cached_seat_map(self):
+        self.assertEqual(BookingFacade.get_free_seats(self.tripId, 0, 2)[:1], [1])
+        self.assertEqual(self.update(stops=self.new_stops).status_code, 200)
+        self.db.trip_seats.insert_one({"_id": self.tripId, "seats": {"1": Int64(segment_mask(0, 1))}})
+
+        self.assertNotIn(1, BookingFacade.get_free_seats(self.tripId, 0, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
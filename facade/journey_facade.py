@@ -0,0 +1,109 @@
+# facade/journey_facade.py
+import logging
+import os
+from datetime import datetime, timedelta
+from bson.objectid import ObjectId
+from facade.trip_schedule_facade import TripScheduleFacade
+from storage import get_db
+from utils.dates import parse_trip_date
+from utils.journey_planner import Timetable, build_connections, journey_planner_cache
+
+# The least time, in minutes, a passenger needs to change from one bus to another.
+MIN_TRANSFER_MINUTES = int(os.getenv("JOURNEY_MIN_TRANSFER_MINUTES", 15))
+
+
+def parse_clock(value):
+    """
+    Parses an ``"HH:MM"`` time into minutes after midnight.
+    """
+    try:
+        hours, minutes = str(value).split(":")
+        hours, minutes = int(hours), int(minutes)
+    except ValueError:
+        raise ValueError(f"Invalid time: {value}")
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise ValueError(f"Invalid time: {value}")
+    return hours * 60 + minutes
+
+
+class JourneyFacade:
+    @staticmethod
+    def _load_timetable(day):
+        """
+        Returns the timetable of a date, building it on a cache miss from the trips of the date
+        and of the next one, so that overnight journeys can change to an early morning bus.
+        """
+        iso_day = day.isoformat()
+        timetable = journey_planner_cache.get(iso_day)
+        if timetable is None:
+            cursors = []
+            for days_ahead in (0, 1):
+                service_day = day + timedelta(days=days_ahead)
+                TripScheduleFacade.ensure_materialized(service_day)
+                trips_cursor = get_db().bus_trips.find(
+                    {"date": service_day.isoformat()}, {"stops": 1}
+                )
+                cursors.append((trips_cursor, days_ahead * 24 * 60))
+            connections, names = [], {}
+            for trips_cursor, start_of_day in cursors:
+                day_connections, day_names = build_connections(trips_cursor, start_of_day)
+                connections.extend(day_connections)
+                names.update(day_names)
+            connections.sort()
+            timetable = Timetable(connections, names)
+            journey_planner_cache.put(iso_day, timetable)
+        return timetable
+
+    @staticmethod
+    def plan_journey(from_city, to_city, date, departAfter=None):
+        """
+        Plans the journey between two cities arriving earliest, changing buses where no single
+        trip connects them.
+
+        :param from_city: The boarding city.
+        :param to_city: The alighting city.
+        :param date: The travel date.
+        :param departAfter: The earliest departure time as ``"HH:MM"`` (default is midnight).
+        :raises ValueError: If the date or time is invalid.
+        :return: The journey with its legs, or None when the cities are not connected that day.
+        """
+        day = parse_trip_date(date)
+        depart_after = parse_clock(departAfter) if departAfter else 0
+        try:
+            timetable = JourneyFacade._load_timetable(day)
+            legs = timetable.earliest_arrival(from_city, to_city, depart_after, MIN_TRANSFER_MINUTES)
+            if legs is None:
+                return None
+
+            trip_ids = [ObjectId(leg[0]) for leg in legs]
+            fare_matrices = {
+                str(trip["_id"]): trip.get("fareMatrix")
+                for trip in get_db().bus_trips.find({"_id": {"$in": trip_ids}}, {"fareMatrix": 1})
+            }
+            midnight = datetime(day.year, day.month, day.day)
+            journey_legs = []
+            for tripId, origin, destination, fromStop, toStop, departure, arrival in legs:
+                matrix = fare_matrices.get(tripId)
+                journey_legs.append({
+                    "tripId": tripId,
+                    "from": timetable.names[origin],
+                    "to": timetable.names[destination],
+                    "fromStop": fromStop,
+                    "toStop": toStop,
+                    "departure": (midnight + timedelta(minutes=departure)).isoformat(timespec="minutes"),
+                    "arrival": (midnight + timedelta(minutes=arrival)).isoformat(timespec="minutes"),
+                    "fare": matrix[fromStop][toStop] if matrix else None
+                })
+            fares = [leg["fare"] for leg in journey_legs]
+            return {
+                "from": journey_legs[0]["from"],
+                "to": journey_legs[-1]["to"],
+                "departure": journey_legs[0]["departure"],
+                "arrival": journey_legs[-1]["arrival"],
+                "transfers": len(journey_legs) - 1,
+                "fare": round(sum(fares), 2) if None not in fares else None,
+                "legs": journey_legs
+            }
+        except Exception as e:
+            logging.error("Error planning journey: %s", e)
+            raise
@@ -0,0 +1,97 @@
+import os
+import unittest
+import uuid
+
+from bson.int64 import Int64
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from facade.booking_facade import BookingFacade
+from facade.testing import AppTestCase
+from utils.migrations import (
+    MIGRATIONS, MigrationError, applied_versions, check_indexes, migrate, seed_trip_seats
+)
+from utils.segments import segment_mask
+
+
+class MigrationsTest(AppTestCase):
+    def test_migrate_applies_each_version_once(self):
+        self.assertEqual(migrate(self.db, target=2), [1, 2])
+        self.assertEqual(migrate(self.db), [version for version, _, _ in MIGRATIONS][2:])
+        self.assertEqual(migrate(self.db), [])
+        self.assertEqual(applied_versions(self.db), {version for version, _, _ in MIGRATIONS})
+
+    def test_duplicate_users_stop_the_migration_with_a_report(self):
+        self.db.users.insert_many([
+            {"username": "alice", "email": "alice@example.com"},
+            {"username": "alice", "email": "alice@example.org"},
+            {"username": "bob", "email": "shared@example.com"},
+            {"username": "carol", "email": "shared@example.com"},
+        ])
+
+        with self.assertRaises(MigrationError) as raised:
+            migrate(self.db)
+
+        report = str(raised.exception)
+        self.assertIn("users.username_unique: username='alice' (2 documents)", report)
+        self.assertIn("users.email_unique: email='shared@example.com' (2 documents)", report)
+        self.assertEqual(applied_versions(self.db), set())
+        self.db.users.delete_many({"username": {"$in": ["bob", "alice"]}})
+        self.assertEqual(migrate(self.db, target=1), [1])
+
+    def test_seeding_merges_into_claimed_trips(self):
+        tripId = self.create_trip()
+        self.db.bookings.insert_many([
+            {"tripId": tripId, "seatNumber": 3, "fromStop": 0, "toStop": 1, "status": "booked"},
+            {"tripId": tripId, "seatNumber": 4, "status": "held"},
+            {"tripId": tripId, "seatNumber": 5, "status": "cancelled"},
+        ])
+        # A seat claimed after the deploy, before the migration ran.
+        BookingFacade.create_booking(tripId, "traveller", 3, "booked", 2, 3)
+
+        seed_trip_seats(self.db)
+        seed_trip_seats(self.db)
+
+        seats = self.db.trip_seats.find_one({"_id": tripId})["seats"]
+        self.assertEqual(int(seats["3"]), segment_mask(0, 1) | segment_mask(2, 3))
+        self.assertEqual(int(seats["4"]), segment_mask())
+        self.assertNotIn("5", seats)
+
+    def test_seeding_keeps_claims_without_bookings(self):
+        self.db.trip_seats.insert_one({"_id": "trip", "seats": {"7": Int64(segment_mask(0, 2))}})
+        self.db.bookings.insert_one({"tripId": "trip", "seatNumber": 8, "status": "booked"})
+
+        seed_trip_seats(self.db)
+
+        seats = self.db.trip_seats.find_one({"_id": "trip"})["seats"]
+        self.assertEqual(int(seats["7"]), segment_mask(0, 2))
+        self.assertEqual(int(seats["8"]), segment_mask())
+
+
+@unittest.skipUnless(os.getenv("TEST_MONGO_URI"), "set TEST_MONGO_URI to check query plans against MongoDB")
+class IndexUsageTest(unittest.TestCase):
+    """
+    Explains the hot queries against a scratch database on a real MongoDB server, whose query
+    planner the in-memory backend does not model.
+    """
+
+    def setUp(self):
+        self.client = MongoClient(os.getenv("TEST_MONGO_URI"), serverSelectionTimeoutMS=2000)
+        try:
+            self.client.admin.command("ping")
+        except PyMongoError as e:
+            self.skipTest(f"MongoDB is not reachable: {e}")
+        self.db = self.client[f"test_indexes_{uuid.uuid4().hex[:12]}"]
+        self.addCleanup(self.client.close)
+        self.addCleanup(self.client.drop_database, self.db.name)
+
+    def test_hot_queries_use_indexes(self):
+        migrate(self.db)
+
+        scans = [entry for entry in check_indexes(self.db) if not entry["usesIndex"]]
+
+        self.assertEqual(scans, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
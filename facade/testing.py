@@ -0,0 +1,60 @@
+# facade/testing.py
+import os
+import unittest
+
+# The app reads its settings at import time, so they are set before importing it.
+os.environ.update(
+    STORAGE_BACKEND="memory", SECRET_KEY="test", HOLD_REAPER_INTERVAL="0", MIGRATE_ON_STARTUP="false",
+    PASSWORD_HASH_N="1024", RATE_LIMIT_ENABLED="false"
+)
+
+from app import app
+from facade.trip_schedule_facade import TripScheduleFacade
+from storage.memory import MemoryStorage
+from utils.journey_planner import journey_planner_cache
+from utils.passwords import default_hasher
+from utils.trip_search_cache import trip_search_cache
+
+BASE_URL = f"/{app.config['VERSION']}/api"
+PASSWORD = "secret"
+
+
+class AppTestCase(unittest.TestCase):
+    """
+    Runs each test in an app context against a fresh in-memory database, with the
+    process caches of trips emptied.
+    """
+
+    def setUp(self):
+        app.storage = MemoryStorage(app)
+        self.db = app.storage.db
+        trip_search_cache.clear()
+        journey_planner_cache.invalidate()
+        TripScheduleFacade.forget_materialized()
+        context = app.app_context()
+        context.push()
+        self.addCleanup(context.pop)
+        self.client = app.test_client()
+
+    def call(self, method, path, token=None, **kwargs):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        return getattr(self.client, method)(BASE_URL + path, headers=headers, **kwargs)
+
+    def create_user(self, username, userType=("user",)):
+        return str(self.db.users.insert_one({
+            "firstName": username, "lastName": "Test", "email": f"{username}@example.com",
+            "userType": list(userType), "userGroup": [], "username": username,
+            "password": default_hasher.hash(PASSWORD), "mobile": "9876543210"
+        }).inserted_id)
+
+    def login(self, username):
+        response = self.call("post", "/user/login", json={"username": username, "password": PASSWORD})
+        self.assertEqual(response.status_code, 200, response.get_json())
+        return response.get_json()
+
+    def create_trip(self, date="2025-01-15", stops=("Lanka", "Prayagraj", "Fatehpur", "Kanpur"), totalSeat=40):
+        busId = self.db.buses.insert_one({"registration": "UP65 0001", "totalSeat": totalSeat}).inserted_id
+        return str(self.db.bus_trips.insert_one({
+            "routeId": "route", "date": date, "frequency": "daily", "timing": "20:00", "fare": 1000,
+            "stops": [{"stop": stop, "time": "20:00"} for stop in stops], "busId": str(busId)
+        }).inserted_id)
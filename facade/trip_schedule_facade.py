@@ -0,0 +1,168 @@
+# facade/trip_schedule_facade.py
+import logging
+import threading
+import time
+from datetime import date, timedelta
+from bson.objectid import ObjectId
+from pymongo import UpdateOne
+from models.bus_trip import BusTrip
+from models.trip_schedule import TripSchedule
+from storage import get_db
+from utils.dates import parse_trip_date
+from utils.fares import trip_fare_matrix
+from utils.journey_planner import journey_planner_cache
+from utils.stop_index import stop_keys
+from utils.trip_search_cache import invalidate_trip_searches
+
+# How long a date counts as materialized before schedules are checked for it again.
+MATERIALIZED_TTL = 60
+
+_materialized_dates = {}
+_materialized_lock = threading.Lock()
+
+
+class TripScheduleFacade:
+    @staticmethod
+    def create_schedule(routeId, frequency, startDate, timing, fare, stops, createdBy, endDate=None, daysOfWeek=None, busId=None):
+        if frequency not in TripSchedule.FREQUENCIES:
+            raise ValueError(f"frequency must be one of: {', '.join(TripSchedule.FREQUENCIES)}")
+        startDate = parse_trip_date(startDate).isoformat()
+        endDate = parse_trip_date(endDate).isoformat() if endDate else None
+        if endDate and endDate < startDate:
+            raise ValueError("endDate must not be before startDate")
+        if daysOfWeek and any(not isinstance(day, int) or not 0 <= day <= 6 for day in daysOfWeek):
+            raise ValueError("daysOfWeek must contain weekday numbers from 0 (Monday) to 6")
+        try:
+            schedule = TripSchedule(
+                routeId=routeId,
+                frequency=frequency,
+                startDate=startDate,
+                endDate=endDate,
+                daysOfWeek=daysOfWeek,
+                timing=timing,
+                fare=fare,
+                stops=stops,
+                busId=busId,
+                createdBy=createdBy
+            )
+            result = get_db().trip_schedules.insert_one(schedule.to_dict())
+            schedule._id = str(result.inserted_id)
+            TripScheduleFacade.forget_materialized()
+            return schedule.to_dict()
+        except Exception as e:
+            logging.error("Error creating trip schedule: %s", e)
+            raise
+
+    @staticmethod
+    def get_schedule(schedule_id):
+        try:
+            schedule_data = get_db().trip_schedules.find_one({"_id": ObjectId(schedule_id)})
+            if schedule_data:
+                return TripSchedule.from_dict(schedule_data).to_dict()
+            return None
+        except Exception as e:
+            logging.error("Error getting trip schedule: %s", e)
+            raise
+
+    @staticmethod
+    def delete_schedule(schedule_id):
+        """
+        Deletes a schedule. Trips already materialized from it are kept, since they may have
+        bookings.
+        """
+        try:
+            result = get_db().trip_schedules.delete_one({"_id": ObjectId(schedule_id)})
+            return result.deleted_count > 0
+        except Exception as e:
+            logging.error("Error deleting trip schedule: %s", e)
+            raise
+
+    @staticmethod
+    def forget_materialized():
+        with _materialized_lock:
+            _materialized_dates.clear()
+
+    @staticmethod
+    def materialize(day):
+        """
+        Creates the trips of every schedule running on a date, unless they exist already.
+
+        Each trip is upserted on ``(scheduleId, date)`` with ``$setOnInsert``, so concurrent or
+        repeated runs never duplicate trips and never overwrite edits made to them.
+
+        :param day: The date to materialize.
+        :return: The number of trips created.
+        """
+        iso_day = day.isoformat()
+        schedules_cursor = get_db().trip_schedules.find({
+            "startDate": {"$lte": iso_day},
+            "$or": [{"endDate": None}, {"endDate": {"$gte": iso_day}}]
+        })
+        schedules = [TripSchedule.from_dict(schedule_data) for schedule_data in schedules_cursor]
+        schedules = [schedule for schedule in schedules if schedule.runs_on(day)]
+        operations = []
+        trips = []
+        for schedule in schedules:
+            bus_trip = BusTrip(
+                routeId=schedule.routeId,
+                date=iso_day,
+                frequency=schedule.frequency,
+                timing=schedule.timing,
+                fare=schedule.fare,
+                stops=schedule.stops,
+                createdBy=schedule.createdBy,
+                busId=schedule.busId,
+                scheduleId=schedule._id
+            )
+            trip_doc = bus_trip.to_dict()
+            trip_doc["stopKeys"] = stop_keys(schedule.stops)
+            trip_doc["fareMatrix"] = trip_fare_matrix(schedule.fare, schedule.stops)
+            trips.append((iso_day, trip_doc["stopKeys"]))
+            operations.append(UpdateOne(
+                {"scheduleId": schedule._id, "date": iso_day}, {"$setOnInsert": trip_doc}, upsert=True
+            ))
+        if not operations:
+            return 0
+        result = get_db().bus_trips.bulk_write(operations, ordered=False)
+        if result.upserted_count:
+            invalidate_trip_searches(trips)
+            journey_planner_cache.invalidate(iso_day)
+        return result.upserted_count
+
+    @staticmethod
+    def ensure_materialized(day):
+        """
+        Materializes a date's scheduled trips once per ``MATERIALIZED_TTL`` in this process, so
+        that searches for a date can be served from the trips collection alone.
+        """
+        try:
+            now = time.monotonic()
+            with _materialized_lock:
+                if _materialized_dates.get(day, 0) > now:
+                    return 0
+                if len(_materialized_dates) >= 1000:
+                    for stale_day in [d for d, expires_at in _materialized_dates.items() if expires_at <= now]:
+                        del _materialized_dates[stale_day]
+                _materialized_dates[day] = now + MATERIALIZED_TTL
+            return TripScheduleFacade.materialize(day)
+        except Exception as e:
+            with _materialized_lock:
+                _materialized_dates.pop(day, None)
+            logging.error("Error materializing scheduled trips: %s", e)
+            raise
+
+    @staticmethod
+    def materialize_window(days, start=None):
+        """
+        Materializes scheduled trips for a rolling window of days, one date per batch.
+
+        :param days: The number of days in the window.
+        :param start: The first date of the window (default is today).
+        :return: The number of trips created.
+        """
+        try:
+            start = start or date.today()
+            return sum(TripScheduleFacade.materialize(start + timedelta(days=offset)) for offset in range(days))
+        except Exception as e:
+            logging.error("Error materializing scheduled trips: %s", e)
+            raise
@@ -0,0 +1,70 @@
+import unittest
+from datetime import date
+
+from facade.testing import AppTestCase
+from facade.trip_schedule_facade import TripScheduleFacade
+
+STOPS = [{"stop": "Lanka", "time": "20:00"}, {"stop": "Prayagraj", "time": "23:00"}, {"stop": "Kanpur", "time": "02:00"}]
+
+
+class MaterializationTest(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.create_user("operator", userType=("user", "admin"))
+        self.token = self.login("operator")["token"]
+
+    def create_schedule(self, **fields):
+        schedule = {"routeId": "route", "frequency": "daily", "startDate": "2025-03-01", "timing": "20:00",
+                    "fare": 600, "stops": STOPS}
+        schedule.update(fields)
+        response = self.call("post", "/trip_schedule/create", self.token, json=schedule)
+        self.assertEqual(response.status_code, 200, response.get_json())
+        return response.get_json()
+
+    def test_materialize_creates_each_trip_once(self):
+        schedule = self.create_schedule(endDate="2025-03-10")
+
+        self.assertEqual(TripScheduleFacade.materialize_window(14, start=date(2025, 3, 1)), 10)
+        self.assertEqual(TripScheduleFacade.materialize_window(14, start=date(2025, 3, 1)), 0)
+        trips = list(self.db.bus_trips.find({"scheduleId": schedule["_id"]}))
+        self.assertEqual(sorted(trip["date"] for trip in trips), [f"2025-03-{day:02d}" for day in range(1, 11)])
+        self.assertIn("prayagraj>kanpur", trips[0]["stopKeys"])
+
+    def test_materialize_keeps_edited_trips(self):
+        schedule = self.create_schedule()
+        TripScheduleFacade.materialize(date(2025, 3, 2))
+        self.db.bus_trips.update_one({"scheduleId": schedule["_id"]}, {"$set": {"timing": "21:30"}})
+
+        self.assertEqual(TripScheduleFacade.materialize(date(2025, 3, 2)), 0)
+        self.assertEqual(self.db.bus_trips.find_one({"scheduleId": schedule["_id"]})["timing"], "21:30")
+
+    def test_weekly_schedule_runs_on_its_days(self):
+        self.create_schedule(frequency="weekly", daysOfWeek=[0, 4])
+
+        self.assertEqual(TripScheduleFacade.materialize_window(7, start=date(2025, 3, 3)), 2)
+        self.assertEqual(sorted(trip["date"] for trip in self.db.bus_trips.find({})), ["2025-03-03", "2025-03-07"])
+
+    def test_search_materializes_the_searched_date(self):
+        self.create_schedule()
+
+        response = self.call("get", "/bus_trip/list?date=2025-03-05&from=Prayagraj&to=Kanpur", self.token)
+
+        self.assertEqual(response.status_code, 200)
+        trips = response.get_json()["trips"]
+        self.assertEqual([trip["date"] for trip in trips], ["2025-03-05"])
+        self.assertEqual(self.db.bus_trips.count_documents({}), 1)
+        response = self.call("get", "/bus_trip/list?date=2025-02-28&from=Prayagraj&to=Kanpur", self.token)
+        self.assertEqual(response.get_json()["trips"], [])
+
+    def test_deleting_a_schedule_keeps_its_trips(self):
+        schedule = self.create_schedule()
+        response = self.call("post", "/trip_schedule/materialize?days=3", self.token)
+        self.assertEqual(response.get_json(), {"created": 3})
+
+        self.assertEqual(self.call("delete", f"/trip_schedule/{schedule['_id']}", self.token).status_code, 200)
+        self.assertEqual(self.db.bus_trips.count_documents({}), 3)
+        self.assertEqual(TripScheduleFacade.materialize_window(3), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
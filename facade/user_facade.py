@@ -1,11 +1,23 @@
 import logging
-import hashlib
+import uuid
 import jwt
 import re
 from flask import current_app
 from bson.objectid import ObjectId
+from pymongo.errors import DuplicateKeyError
 from datetime import datetime, timedelta, timezone
 from models.user import User
+from storage import get_db
+from utils.export import EXPORT_BATCH_SIZE
+from utils.fields import build_projection
+from utils.pagination import find_page
+from utils.passwords import password_pool
+from utils.revocation import revocation_filter
+from utils.totals import count_total
+
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$')
+# A simple 10-digit mobile number
+MOBILE_PATTERN = re.compile(r'^\d{10}$')
 
 class UserFacade:
     @staticmethod
@@ -13,23 +25,18 @@ class UserFacade:
         if not firstName or not email or not username or not password or not mobile:
             raise ValueError("Missing mandatory fields: First Name, Email, Username, Password, Mobile")
 
-        # Validate email
-        email_regex = r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$'
-        if not re.match(email_regex, email):
+        if not EMAIL_PATTERN.match(email):
             raise ValueError("Invalid email format")
-
-        # Validate mobile (assuming a simple 10-digit validation for example)
-        mobile_regex = r'^\d{10}$'
-        if not re.match(mobile_regex, mobile):
+        if not MOBILE_PATTERN.match(mobile):
             raise ValueError("Invalid mobile number")
 
         try:
             # Check for duplicate user by email
-            if current_app.mongo.db.users.find_one({"email": email}):
+            if get_db().users.find_one({"email": email}):
                 raise ValueError("User with this email already exists")
 
-            # Encrypt the password using MD5
-            encrypted_password = hashlib.md5(password.encode()).hexdigest()
+            # Hash the password on the bounded hashing pool
+            encrypted_password = password_pool.hash(password)
             user = User(
                 firstName=firstName,
                 lastName=lastName,
@@ -41,7 +48,12 @@ class UserFacade:
                 mobile=mobile,
                 gender=gender
             )
-            result = current_app.mongo.db.users.insert_one(user.to_dict())
+            user_doc = user.to_dict()
+            user_doc["password"] = encrypted_password
+            try:
+                result = get_db().users.insert_one(user_doc)
+            except DuplicateKeyError:
+                raise ValueError("User with this email or username already exists")
             user._id = str(result.inserted_id)
             return user.to_dict()
         except Exception as e:
@@ -49,11 +61,13 @@ class UserFacade:
             raise
 
     @staticmethod
-    def get_user(user_id):
+    def get_user(user_id, fields=None):
         try:
-            user_data = current_app.mongo.db.users.find_one({"_id": ObjectId(user_id)})
+            user_data = get_db().users.find_one(
+                {"_id": ObjectId(user_id)}, build_projection(fields, User.FIELDS)
+            )
             if user_data:
-                return User.from_dict(user_data).to_dict()
+                return User.serialize(user_data, fields)
             return None
         except Exception as e:
             logging.error("Error getting user: %s", e)
@@ -87,7 +101,7 @@ class UserFacade:
             if username:
                 update_fields['username'] = username
             if password:
-                update_fields['password'] = hashlib.md5(password.encode()).hexdigest()
+                update_fields['password'] = password_pool.hash(password)
             if mobile:
                 update_fields['mobile'] = mobile
             if gender:
@@ -97,7 +111,7 @@ class UserFacade:
             if userGroup:
                 update_fields['userGroup'] = userGroup
 
-            result = current_app.mongo.db.users.update_one(
+            result = get_db().users.update_one(
                 {"_id": ObjectId(user_id)}, {"$set": update_fields}
             )
             return result.modified_count > 0
@@ -108,7 +122,7 @@ class UserFacade:
     @staticmethod
     def delete_user(user_id):
         try:
-            result = current_app.mongo.db.users.delete_one({"_id": ObjectId(user_id)})
+            result = get_db().users.delete_one({"_id": ObjectId(user_id)})
             return result.deleted_count > 0
         except Exception as e:
             logging.error("Error deleting user: %s", e)
@@ -116,29 +130,195 @@ class UserFacade:
 
     @staticmethod
     def login(username, password):
-        encrypted_password = hashlib.md5(password.encode()).hexdigest()
-        user_data = current_app.mongo.db.users.find_one({"username": username, "password": encrypted_password})
-        if user_data:
-            user = User.from_dict(user_data)
-            # Generate JWT token
-            token = jwt.encode({
-                'user_id': user._id,
-                'name': user.firstName,
-                'email': user.email,
-                'roles': user.userType,
-                'exp': datetime.now(timezone.utc) + timedelta(hours=1)
-            }, current_app.config['SECRET_KEY'], algorithm='HS256')
-            return {'token': token}
+        """
+        Checks a user's credentials and issues a JWT token.
+
+        Passwords are verified on the bounded hashing pool. A password stored as a legacy MD5
+        hash, or with an outdated work factor, is rehashed once it has been verified.
+
+        :raises PasswordHasherBusyError: If the hashing pool cannot admit the login.
+        :return: The token, or None if the credentials are invalid.
+        """
+        user_data = get_db().users.find_one({"username": username})
+        if not user_data:
+            password_pool.verify_dummy(password)
+            return None
+        matches, new_hash = password_pool.verify(password, user_data.get("password"))
+        if matches:
+            if new_hash:
+                get_db().users.update_one(
+                    {"_id": user_data["_id"], "password": user_data["password"]},
+                    {"$set": {"password": new_hash}}
+                )
+            return UserFacade._issue_tokens(User.from_dict(user_data))
         return None
 
     @staticmethod
-    def get_users(page, size):
+    def _issue_tokens(user):
+        """
+        Issues a short-lived access token and a long-lived refresh token for a user. Both carry
+        a unique ``jti`` so that they can be revoked one by one.
+        """
+        now = datetime.now(timezone.utc)
+        access_lifetime = timedelta(minutes=current_app.config.get('ACCESS_TOKEN_MINUTES', 15))
+        token = jwt.encode({
+            'user_id': user._id,
+            'name': user.firstName,
+            'email': user.email,
+            'roles': user.userType,
+            'type': 'access',
+            'jti': uuid.uuid4().hex,
+            'exp': now + access_lifetime
+        }, current_app.config['SECRET_KEY'], algorithm='HS256')
+        refresh_token = jwt.encode({
+            'user_id': user._id,
+            'type': 'refresh',
+            'jti': uuid.uuid4().hex,
+            'exp': now + timedelta(days=current_app.config.get('REFRESH_TOKEN_DAYS', 7))
+        }, current_app.config['SECRET_KEY'], algorithm='HS256')
+        return {
+            'token': token,
+            'refreshToken': refresh_token,
+            'expiresIn': int(access_lifetime.total_seconds())
+        }
+
+    @staticmethod
+    def _decode_refresh_token(refresh_token):
+        try:
+            claims = jwt.decode(refresh_token, current_app.config['SECRET_KEY'], algorithms=["HS256"])
+        except jwt.InvalidTokenError:
+            return None
+        if claims.get('type') != 'refresh' or not claims.get('jti'):
+            return None
+        return claims
+
+    @staticmethod
+    def refresh_tokens(refresh_token):
+        """
+        Exchanges a refresh token for a new access and refresh token pair.
+
+        The refresh token is marked as used, so each one works once; presenting it again fails,
+        which also stops a stolen copy from being replayed after the owner used it.
+
+        :return: The new tokens, or None if the refresh token is invalid, expired or revoked,
+            or its user no longer exists.
+        """
+        claims = UserFacade._decode_refresh_token(refresh_token)
+        if claims is None:
+            return None
         try:
-            skip = (page - 1) * size
-            users_cursor = current_app.mongo.db.users.find().skip(skip).limit(size)
-            users = [User.from_dict(user).to_dict() for user in users_cursor]
-            total_users = current_app.mongo.db.users.count_documents({})
-            return {'users': users, 'total': total_users}
+            user_data = get_db().users.find_one({"_id": ObjectId(claims['user_id'])})
+            if not user_data:
+                return None
+            if not UserFacade._use_refresh_token(claims['jti'], claims['exp']):
+                return None
+            return UserFacade._issue_tokens(User.from_dict(user_data))
+        except Exception as e:
+            logging.error("Error refreshing tokens: %s", e)
+            raise
+
+    @staticmethod
+    def logout(access_claims, refresh_token=None):
+        """
+        Revokes the access token of the current request, and the user's refresh token when
+        given.
+        """
+        try:
+            if access_claims.get('jti'):
+                UserFacade.revoke_token(access_claims['jti'], access_claims['exp'])
+            claims = UserFacade._decode_refresh_token(refresh_token) if refresh_token else None
+            if claims and claims.get('user_id') == access_claims.get('user_id'):
+                UserFacade._use_refresh_token(claims['jti'], claims['exp'])
+        except Exception as e:
+            logging.error("Error logging out: %s", e)
+            raise
+
+    @staticmethod
+    def _use_refresh_token(jti, exp):
+        """
+        Records a refresh token as used until it expires, in the ``used_refresh_tokens``
+        collection. Refresh tokens are never checked by ``token_required``, so they are kept
+        out of the revocation filter.
+
+        :return: True if the token was unused until now, False if it was used already.
+        """
+        try:
+            get_db().used_refresh_tokens.insert_one({
+                "_id": jti,
+                "expiresAt": datetime.fromtimestamp(exp, timezone.utc),
+                "usedAt": datetime.now(timezone.utc)
+            })
+        except DuplicateKeyError:
+            return False
+        return True
+
+    @staticmethod
+    def revoke_token(jti, exp):
+        """
+        Records an access token as revoked until it expires.
+
+        :param jti: The token's ID.
+        :param exp: The token's expiry as a Unix timestamp.
+        :return: True if the token was revoked now, False if it already was.
+        """
+        try:
+            get_db().revoked_tokens.insert_one({
+                "_id": jti,
+                "expiresAt": datetime.fromtimestamp(exp, timezone.utc),
+                "revokedAt": datetime.now(timezone.utc)
+            })
+        except DuplicateKeyError:
+            return False
+        finally:
+            revocation_filter.add(jti)
+        return True
+
+    @staticmethod
+    def is_token_revoked(jti):
+        """
+        Checks whether a token was revoked. Only token IDs that hit the in-memory Bloom filter
+        are looked up in the ``revoked_tokens`` collection.
+        """
+        if revocation_filter.needs_sync():
+            revocation_filter.sync(UserFacade._load_revoked)
+        if not revocation_filter.might_be_revoked(jti):
+            return False
+        return get_db().revoked_tokens.find_one(
+            {"_id": jti, "expiresAt": {"$gt": datetime.now(timezone.utc)}}, {"_id": 1}
+        ) is not None
+
+    @staticmethod
+    def _load_revoked(since_seconds):
+        now = datetime.now(timezone.utc)
+        query = {"expiresAt": {"$gt": now}}
+        if since_seconds is not None:
+            query["revokedAt"] = {"$gte": now - timedelta(seconds=since_seconds)}
+        return (revoked["_id"] for revoked in get_db().revoked_tokens.find(query, {"_id": 1}))
+
+    @staticmethod
+    def get_users(page, size, after=None, with_total=True, fields=None):
+        try:
+            users_docs, next_cursor = find_page(
+                get_db().users, {}, page, size, after, build_projection(fields, User.FIELDS)
+            )
+            users = [User.serialize(user, fields) for user in users_docs]
+            users_data = {'users': users}
+            if with_total:
+                users_data['total'], users_data['totalExact'] = count_total(get_db().users, {})
+            if after is not None:
+                users_data['nextCursor'] = next_cursor
+            return users_data
         except Exception as e:
             logging.error("Error getting users: %s", e)
-            raise
\ No newline at end of file
+            raise
+
+    @staticmethod
+    def export_users():
+        """
+        Iterates over all users for export, reading them through a single server-side cursor
+        in batches of ``EXPORT_BATCH_SIZE``.
+
+        :return: A generator of serialized users.
+        """
+        users_cursor = get_db().users.find({}, {"password": 0}).batch_size(EXPORT_BATCH_SIZE)
+        return (User.serialize(user) for user in users_cursor)
@@ -0,0 +1,90 @@
+import unittest
+
+import jwt
+from pymongo.errors import ServerSelectionTimeoutError
+
+from facade.testing import AppTestCase
+from utils.revocation import revocation_filter
+
+
+class UserAuthTest(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.userId = self.create_user("traveller")
+
+    def get_self(self, token=None):
+        return self.call("get", f"/user/{self.userId}", token).status_code
+
+    def test_login_rejects_wrong_password(self):
+        response = self.call("post", "/user/login", json={"username": "traveller", "password": "wrong"})
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_access_token_authorizes_requests(self):
+        tokens = self.login("traveller")
+
+        self.assertEqual(set(tokens), {"token", "refreshToken", "expiresIn"})
+        self.assertEqual(self.get_self(tokens["token"]), 200)
+        self.assertEqual(self.get_self(), 401)
+
+    def test_refresh_token_works_once(self):
+        tokens = self.login("traveller")
+
+        response = self.call("post", "/user/refresh", json={"refreshToken": tokens["refreshToken"]})
+        self.assertEqual(response.status_code, 200)
+        refreshed = response.get_json()
+        self.assertEqual(self.get_self(refreshed["token"]), 200)
+        replayed = self.call("post", "/user/refresh", json={"refreshToken": tokens["refreshToken"]})
+        self.assertEqual(replayed.status_code, 401)
+        response = self.call("post", "/user/refresh", json={"refreshToken": refreshed["refreshToken"]})
+        self.assertEqual(response.status_code, 200)
+
+    def test_refresh_rejects_access_token(self):
+        tokens = self.login("traveller")
+
+        response = self.call("post", "/user/refresh", json={"refreshToken": tokens["token"]})
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_used_refresh_tokens_stay_out_of_the_revocation_filter(self):
+        tokens = self.login("traveller")
+        bits_set = sum(bin(byte).count("1") for byte in revocation_filter._filter.bits)
+
+        for _ in range(5):
+            tokens = self.call("post", "/user/refresh", json={"refreshToken": tokens["refreshToken"]}).get_json()
+
+        self.assertEqual(sum(bin(byte).count("1") for byte in revocation_filter._filter.bits), bits_set)
+        self.assertEqual(self.db.used_refresh_tokens.count_documents({}), 5)
+        self.assertEqual(self.db.revoked_tokens.count_documents({}), 0)
+
+    def test_logout_revokes_both_tokens(self):
+        tokens = self.login("traveller")
+
+        response = self.call("post", "/user/logout", tokens["token"], json={"refreshToken": tokens["refreshToken"]})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get_self(tokens["token"]), 401)
+        replayed = self.call("post", "/user/refresh", json={"refreshToken": tokens["refreshToken"]})
+        self.assertEqual(replayed.status_code, 401)
+        self.assertEqual(self.get_self(self.login("traveller")["token"]), 200)
+
+    def test_failed_revocation_check_fails_closed(self):
+        token = self.login("traveller")["token"]
+        revocation_filter.add(jwt.decode(token, options={"verify_signature": False})["jti"])
+        find_one = self.db.revoked_tokens.find_one
+
+        def unavailable(*args, **kwargs):
+            raise ServerSelectionTimeoutError("No servers available")
+
+        self.db.revoked_tokens.find_one = unavailable
+        with self.assertLogs(level="ERROR"):
+            response = self.call("get", f"/user/{self.userId}", token)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["Retry-After"], "1")
+
+        self.db.revoked_tokens.find_one = find_one
+        self.assertEqual(self.get_self(token), 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
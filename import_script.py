@@ -0,0 +1,37 @@
+import argparse
+import json
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app import app
+from facade.bus_facade import BusFacade
+from facade.bus_route_facade import BusRouteFacade
+from facade.bus_trip_facade import BusTripFacade
+from utils.bulk_import import IMPORT_CHUNK_SIZE, load_rows
+
+IMPORTERS = {
+    "bus": BusFacade.import_buses,
+    "bus_route": BusRouteFacade.import_routes,
+    "bus_trip": BusTripFacade.import_trips,
+}
+
+def import_file(kind, path, chunk_size, created_by=None):
+    with open(path, encoding="utf-8") as f:
+        rows = load_rows(f.read())
+    with app.app_context():
+        report = IMPORTERS[kind](rows, createdBy=created_by, chunk_size=chunk_size)
+    print(f"Imported {report['inserted']} of {report['rows']} {kind} rows "
+          f"in {report['elapsedSeconds']}s ({report['rowsPerSecond']} rows/s).")
+    for error in report["errors"]:
+        print(json.dumps(error))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import buses, routes or trips from a JSON or NDJSON file.")
+    parser.add_argument("kind", choices=sorted(IMPORTERS))
+    parser.add_argument("path")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    parser.add_argument("--created-by", help="Overrides the createdBy field of every row.")
+    args = parser.parse_args()
+    import_file(args.kind, args.path, args.chunk_size, args.created_by)
@@ -0,0 +1,45 @@
+import argparse
+import json
+import os
+import sys
+
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+load_dotenv()
+
+from utils.migrations import MIGRATIONS, MigrationError, applied_versions, check_indexes, migrate
+
+MONGO_URI = os.getenv("MONGO_URI")
+
+client = MongoClient(MONGO_URI)
+db = client.get_default_database()
+
+def show_status():
+    done = applied_versions(db)
+    for version, description, _ in MIGRATIONS:
+        print(f"{version:>3} {'applied' if version in done else 'pending'}  {description}")
+
+def run_check():
+    report = check_indexes(db)
+    for entry in report:
+        status = "ok" if entry["usesIndex"] else "COLLSCAN"
+        print(f"{status:<8} {entry['collection']} {json.dumps(entry['query'], default=str)} {' > '.join(entry['stages'])}")
+    return all(entry["usesIndex"] for entry in report)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply the pending database migrations and check index usage.")
+    parser.add_argument("--target", type=int, help="Stops after applying this migration version.")
+    parser.add_argument("--status", action="store_true", help="Lists the migrations and whether they are applied.")
+    parser.add_argument("--check", action="store_true", help="Explains the hot queries and fails if any scans a collection.")
+    args = parser.parse_args()
+    if args.status:
+        show_status()
+    elif args.check:
+        sys.exit(0 if run_check() else 1)
+    else:
+        try:
+            applied = migrate(db, args.target)
+        except MigrationError as e:
+            sys.exit(str(e))
+        print(f"Applied migrations: {', '.join(map(str, applied))}." if applied else "The database is up to date.")
@@ -1,28 +1,76 @@
 # models/booking.py
 from datetime import datetime, timezone
 
+# Statuses that keep a seat occupied in the trip's seat-state document.
+ACTIVE_STATUSES = ("booked", "held")
+# Statuses a booking may be updated to; seats are only held through hold_seats, which sets expiresAt.
+UPDATE_STATUSES = ("booked", "cancelled")
 
 class Booking:
-    def __init__(self, tripId, userId, seatNumber, status, createdAt=None, updatedAt=None, _id=None):
+    # Fields a client may request through a sparse fieldset.
+    FIELDS = (
+        "tripId", "userId", "seatNumber", "fromStop", "toStop", "status", "expiresAt", "createdAt",
+        "updatedAt"
+    )
+
+    __slots__ = (
+        "tripId", "userId", "seatNumber", "status", "fromStop", "toStop", "expiresAt",
+        "createdAt", "updatedAt", "_id"
+    )
+
+    def __init__(self, tripId, userId, seatNumber, status, fromStop=None, toStop=None, expiresAt=None, createdAt=None, updatedAt=None, _id=None):
         self.tripId = tripId
         self.userId = userId
         self.seatNumber = seatNumber
+        self.fromStop = fromStop
+        self.toStop = toStop
         self.status = status
+        self.expiresAt = expiresAt
         self.createdAt = createdAt if createdAt else datetime.now(timezone.utc)
         self.updatedAt = updatedAt if updatedAt else datetime.now(timezone.utc)
         self._id = str(_id) if _id else None
 
-    def to_dict(self):
+    def to_dict(self, fields=None):
         booking_dict = {
             "tripId": self.tripId,
             "userId": self.userId,
             "seatNumber": self.seatNumber,
+            "fromStop": self.fromStop,
+            "toStop": self.toStop,
             "status": self.status,
             "createdAt": self.createdAt,
             "updatedAt": self.updatedAt
         }
+        if self.expiresAt:
+            booking_dict["expiresAt"] = self.expiresAt
         if self._id:
             booking_dict["_id"] = self._id
+        if fields:
+            return {key: value for key, value in booking_dict.items() if key in fields or key == "_id"}
+        return booking_dict
+
+    @staticmethod
+    def serialize(data, fields=None):
+        """
+        Converts a raw document straight into its response dict, the same as
+        ``Booking.from_dict(data).to_dict(fields)`` without building a Booking in between.
+        """
+        booking_dict = {
+            "tripId": data.get("tripId"),
+            "userId": data.get("userId"),
+            "seatNumber": data.get("seatNumber"),
+            "fromStop": data.get("fromStop"),
+            "toStop": data.get("toStop"),
+            "status": data.get("status"),
+            "createdAt": data.get("createdAt") or datetime.now(timezone.utc),
+            "updatedAt": data.get("updatedAt") or datetime.now(timezone.utc)
+        }
+        if data.get("expiresAt"):
+            booking_dict["expiresAt"] = data["expiresAt"]
+        if data.get("_id"):
+            booking_dict["_id"] = str(data["_id"])
+        if fields:
+            return {key: value for key, value in booking_dict.items() if key in fields or key == "_id"}
         return booking_dict
 
     @staticmethod
@@ -31,7 +79,10 @@ class Booking:
             tripId=data.get("tripId"),
             userId=data.get("userId"),
             seatNumber=data.get("seatNumber"),
+            fromStop=data.get("fromStop"),
+            toStop=data.get("toStop"),
             status=data.get("status"),
+            expiresAt=data.get("expiresAt"),
             createdAt=data.get("createdAt"),
             updatedAt=data.get("updatedAt"),
             _id=str(data.get("_id")) if data.get("_id") else None
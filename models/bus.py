@@ -3,6 +3,17 @@ from bson.objectid import ObjectId
 from datetime import datetime, timezone
 
 class Bus:
+    # Fields a client may request through a sparse fieldset.
+    FIELDS = (
+        "travel", "isAc", "isSleeper", "registration", "totalSeat", "insuranceValidTill",
+        "permitValidTill", "createdBy", "createdAt", "updatedAt"
+    )
+
+    __slots__ = (
+        "travel", "isAc", "isSleeper", "registration", "totalSeat", "insuranceValidTill",
+        "permitValidTill", "createdBy", "createdAt", "updatedAt", "_id"
+    )
+
     def __init__(self, travel, isAc, isSleeper, registration, totalSeat, insuranceValidTill, permitValidTill, createdBy, createdAt=None, updatedAt=None, _id=None):
         self.travel = travel
         self.isAc = isAc
@@ -16,7 +27,7 @@ class Bus:
         self.updatedAt = updatedAt if updatedAt else datetime.now(timezone.utc)
         self._id = str(_id) if _id else None
 
-    def to_dict(self):
+    def to_dict(self, fields=None):
         bus_dict = {
             "travel": self.travel,
             "isAc": self.isAc,
@@ -31,6 +42,32 @@ class Bus:
         }
         if self._id:
             bus_dict["_id"] = self._id
+        if fields:
+            return {key: value for key, value in bus_dict.items() if key in fields or key == "_id"}
+        return bus_dict
+
+    @staticmethod
+    def serialize(data, fields=None):
+        """
+        Converts a raw document straight into its response dict, the same as
+        ``Bus.from_dict(data).to_dict(fields)`` without building a Bus in between.
+        """
+        bus_dict = {
+            "travel": data.get("travel"),
+            "isAc": data.get("isAc"),
+            "isSleeper": data.get("isSleeper"),
+            "registration": data.get("registration"),
+            "totalSeat": data.get("totalSeat"),
+            "insuranceValidTill": data.get("insuranceValidTill"),
+            "permitValidTill": data.get("permitValidTill"),
+            "createdBy": data.get("createdBy"),
+            "createdAt": data.get("createdAt") or datetime.now(timezone.utc),
+            "updatedAt": data.get("updatedAt") or datetime.now(timezone.utc)
+        }
+        if data.get("_id"):
+            bus_dict["_id"] = str(data["_id"])
+        if fields:
+            return {key: value for key, value in bus_dict.items() if key in fields or key == "_id"}
         return bus_dict
 
     @staticmethod
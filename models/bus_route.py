@@ -2,6 +2,13 @@
 from datetime import datetime, timezone
 
 class BusRoute:
+    # Fields a client may request through a sparse fieldset.
+    FIELDS = (
+        "route", "routeNo", "distance", "createdBy", "createdAt", "updatedAt"
+    )
+
+    __slots__ = ("route", "routeNo", "distance", "createdBy", "createdAt", "updatedAt", "_id")
+
     def __init__(self, route, routeNo, distance, createdBy, createdAt=None, updatedAt=None, _id=None):
         self.route = route
         self.routeNo = routeNo
@@ -11,7 +18,7 @@ class BusRoute:
         self.updatedAt = updatedAt if updatedAt else datetime.now(timezone.utc)
         self._id = str(_id) if _id else None
 
-    def to_dict(self):
+    def to_dict(self, fields=None):
         route_dict = {
             "route": self.route,
             "routeNo": self.routeNo,
@@ -22,6 +29,28 @@ class BusRoute:
         }
         if self._id:
             route_dict["_id"] = self._id
+        if fields:
+            return {key: value for key, value in route_dict.items() if key in fields or key == "_id"}
+        return route_dict
+
+    @staticmethod
+    def serialize(data, fields=None):
+        """
+        Converts a raw document straight into its response dict, the same as
+        ``BusRoute.from_dict(data).to_dict(fields)`` without building a BusRoute in between.
+        """
+        route_dict = {
+            "route": data.get("route"),
+            "routeNo": data.get("routeNo"),
+            "distance": data.get("distance"),
+            "createdBy": data.get("createdBy"),
+            "createdAt": data.get("createdAt") or datetime.now(timezone.utc),
+            "updatedAt": data.get("updatedAt") or datetime.now(timezone.utc)
+        }
+        if data.get("_id"):
+            route_dict["_id"] = str(data["_id"])
+        if fields:
+            return {key: value for key, value in route_dict.items() if key in fields or key == "_id"}
         return route_dict
 
     @staticmethod
@@ -2,7 +2,18 @@
 from datetime import datetime, timezone
 
 class BusTrip:
-    def __init__(self, routeId, date, frequency, timing, fare, stops, createdBy, createdAt=None, updatedAt=None, _id=None):
+    # Fields a client may request through a sparse fieldset.
+    FIELDS = (
+        "routeId", "date", "frequency", "timing", "fare", "stops", "createdBy", "busId",
+        "scheduleId", "createdAt", "updatedAt"
+    )
+
+    __slots__ = (
+        "routeId", "date", "frequency", "timing", "fare", "stops", "createdBy", "busId",
+        "scheduleId", "createdAt", "updatedAt", "_id"
+    )
+
+    def __init__(self, routeId, date, frequency, timing, fare, stops, createdBy, busId=None, scheduleId=None, createdAt=None, updatedAt=None, _id=None):
         self.routeId = routeId
         self.date = date
         self.frequency = frequency
@@ -10,11 +21,13 @@ class BusTrip:
         self.fare = fare
         self.stops = stops
         self.createdBy = createdBy
+        self.busId = busId
+        self.scheduleId = scheduleId
         self.createdAt = createdAt if createdAt else datetime.now(timezone.utc)
         self.updatedAt = updatedAt if updatedAt else datetime.now(timezone.utc)
         self._id = str(_id) if _id else None
 
-    def to_dict(self):
+    def to_dict(self, fields=None):
         trip_dict = {
             "routeId": self.routeId,
             "date": self.date,
@@ -23,11 +36,42 @@ class BusTrip:
             "fare": self.fare,
             "stops": self.stops,
             "createdBy": self.createdBy,
+            "busId": self.busId,
             "createdAt": self.createdAt,
             "updatedAt": self.updatedAt
         }
+        if self.scheduleId:
+            trip_dict["scheduleId"] = self.scheduleId
         if self._id:
             trip_dict["_id"] = self._id
+        if fields:
+            return {key: value for key, value in trip_dict.items() if key in fields or key == "_id"}
+        return trip_dict
+
+    @staticmethod
+    def serialize(data, fields=None):
+        """
+        Converts a raw document straight into its response dict, the same as
+        ``BusTrip.from_dict(data).to_dict(fields)`` without building a BusTrip in between.
+        """
+        trip_dict = {
+            "routeId": data.get("routeId"),
+            "date": data.get("date"),
+            "frequency": data.get("frequency"),
+            "timing": data.get("timing"),
+            "fare": data.get("fare"),
+            "stops": data.get("stops"),
+            "createdBy": data.get("createdBy"),
+            "busId": data.get("busId"),
+            "createdAt": data.get("createdAt") or datetime.now(timezone.utc),
+            "updatedAt": data.get("updatedAt") or datetime.now(timezone.utc)
+        }
+        if data.get("scheduleId"):
+            trip_dict["scheduleId"] = data["scheduleId"]
+        if data.get("_id"):
+            trip_dict["_id"] = str(data["_id"])
+        if fields:
+            return {key: value for key, value in trip_dict.items() if key in fields or key == "_id"}
         return trip_dict
 
     @staticmethod
@@ -40,6 +84,8 @@ class BusTrip:
             fare=data.get("fare"),
             stops=data.get("stops"),
             createdBy=data.get("createdBy"),
+            busId=data.get("busId"),
+            scheduleId=data.get("scheduleId"),
             createdAt=data.get("createdAt"),
             updatedAt=data.get("updatedAt"),
             _id=str(data.get("_id")) if data.get("_id") else None
@@ -0,0 +1,72 @@
+# models/trip_schedule.py
+from datetime import datetime, timezone
+
+class TripSchedule:
+    FREQUENCIES = ("daily", "weekly")
+
+    def __init__(self, routeId, frequency, startDate, timing, fare, stops, createdBy, endDate=None, daysOfWeek=None, busId=None, createdAt=None, updatedAt=None, _id=None):
+        self.routeId = routeId
+        self.frequency = frequency
+        self.startDate = startDate
+        self.endDate = endDate
+        self.daysOfWeek = daysOfWeek
+        self.timing = timing
+        self.fare = fare
+        self.stops = stops
+        self.busId = busId
+        self.createdBy = createdBy
+        self.createdAt = createdAt if createdAt else datetime.now(timezone.utc)
+        self.updatedAt = updatedAt if updatedAt else datetime.now(timezone.utc)
+        self._id = str(_id) if _id else None
+
+    def runs_on(self, day):
+        """
+        Tells whether the schedule has a trip on the given date.
+
+        Weekly schedules run on ``daysOfWeek`` (0 is Monday), or on the weekday of ``startDate``
+        when no days are given.
+        """
+        iso_day = day.isoformat()
+        if iso_day < self.startDate or (self.endDate and iso_day > self.endDate):
+            return False
+        if self.frequency == "weekly":
+            days = self.daysOfWeek or [datetime.fromisoformat(self.startDate).weekday()]
+            return day.weekday() in days
+        return True
+
+    def to_dict(self):
+        schedule_dict = {
+            "routeId": self.routeId,
+            "frequency": self.frequency,
+            "startDate": self.startDate,
+            "endDate": self.endDate,
+            "daysOfWeek": self.daysOfWeek,
+            "timing": self.timing,
+            "fare": self.fare,
+            "stops": self.stops,
+            "busId": self.busId,
+            "createdBy": self.createdBy,
+            "createdAt": self.createdAt,
+            "updatedAt": self.updatedAt
+        }
+        if self._id:
+            schedule_dict["_id"] = self._id
+        return schedule_dict
+
+    @staticmethod
+    def from_dict(data):
+        return TripSchedule(
+            routeId=data.get("routeId"),
+            frequency=data.get("frequency"),
+            startDate=data.get("startDate"),
+            endDate=data.get("endDate"),
+            daysOfWeek=data.get("daysOfWeek"),
+            timing=data.get("timing"),
+            fare=data.get("fare"),
+            stops=data.get("stops"),
+            busId=data.get("busId"),
+            createdBy=data.get("createdBy"),
+            createdAt=data.get("createdAt"),
+            updatedAt=data.get("updatedAt"),
+            _id=str(data.get("_id")) if data.get("_id") else None
+        )
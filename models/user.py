@@ -1,6 +1,17 @@
 # Description: User model class.
 
 class User:
+    # Fields a client may request through a sparse fieldset.
+    FIELDS = (
+        "firstName", "lastName", "email", "userType", "userGroup", "username", "mobile",
+        "gender"
+    )
+
+    __slots__ = (
+        "firstName", "lastName", "email", "userType", "userGroup", "username", "password",
+        "mobile", "gender", "_id"
+    )
+
     def __init__(self, firstName, lastName, email, userType, userGroup, username, password, mobile=None, gender=None, _id=None):
         self.firstName = firstName
         self.lastName = lastName
@@ -13,7 +24,7 @@ class User:
         self.gender = gender
         self._id = str(_id) if _id else None
 
-    def to_dict(self):
+    def to_dict(self, fields=None):
         user_dict = {
             "firstName": self.firstName,
             "lastName": self.lastName,
@@ -26,6 +37,30 @@ class User:
         }
         if self._id:
             user_dict["_id"] = self._id
+        if fields:
+            return {key: value for key, value in user_dict.items() if key in fields or key == "_id"}
+        return user_dict
+
+    @staticmethod
+    def serialize(data, fields=None):
+        """
+        Converts a raw document straight into its response dict, the same as
+        ``User.from_dict(data).to_dict(fields)`` without building a User in between.
+        """
+        user_dict = {
+            "firstName": data.get("firstName"),
+            "lastName": data.get("lastName"),
+            "email": data.get("email"),
+            "userType": data.get("userType"),
+            "userGroup": data.get("userGroup"),
+            "username": data.get("username"),
+            "mobile": data.get("mobile"),
+            "gender": data.get("gender")
+        }
+        if data.get("_id"):
+            user_dict["_id"] = str(data["_id"])
+        if fields:
+            return {key: value for key, value in user_dict.items() if key in fields or key == "_id"}
         return user_dict
 
     @staticmethod
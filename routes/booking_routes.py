@@ -1,13 +1,46 @@
 # routes/booking_routes.py
 from flask import Blueprint, request, jsonify
-from facade.booking_facade import BookingFacade
-from decorators import token_required, permission_required
+from facade.booking_facade import MAX_GROUP_SEATS, BookingFacade, SeatUnavailableError
+from decorators import token_required, permission_required, rate_limit, validate_json
+from models.booking import UPDATE_STATUSES, Booking
+from utils.export import EXPORT_FORMATS, export_response
+from utils.fields import parse_fields
 
 booking_bp = Blueprint('booking_bp', __name__)
 
+
+STOP_RULES = {"type": "integer", "min": 0}
+
+CREATE_BOOKING_SCHEMA = {
+    "tripId": {"type": "string", "required": True, "min_length": 1},
+    "seatNumber": {"type": "integer", "required": True, "min": 1},
+    "fromStop": STOP_RULES,
+    "toStop": STOP_RULES,
+}
+
+SEATS_SCHEMA = {
+    "tripId": {"type": "string", "required": True, "min_length": 1},
+    "seatNumbers": {
+        "type": "array", "required": True, "min_length": 1, "max_length": MAX_GROUP_SEATS,
+        "items": {"type": "integer", "min": 1}
+    },
+    "fromStop": STOP_RULES,
+    "toStop": STOP_RULES,
+}
+
+UPDATE_BOOKING_SCHEMA = {
+    "tripId": {"type": "string", "min_length": 1},
+    "seatNumber": {"type": "integer", "min": 1},
+    "status": {"type": "string", "enum": UPDATE_STATUSES},
+    "fromStop": STOP_RULES,
+    "toStop": STOP_RULES,
+}
+
 @booking_bp.route('/booking/create', methods=['POST'])
 @token_required
 @permission_required('user')
+@rate_limit('booking', '30/60')
+@validate_json(CREATE_BOOKING_SCHEMA)
 def create_booking(current_user, current_user_role):
     """
     Creates a new booking for a given trip and user.
@@ -16,20 +49,123 @@ def create_booking(current_user, current_user_role):
         data (dict): Request body data with the following keys:
             - tripId (str): The ID of the trip to book.
             - seatNumber (int): The seat number to book.
+            - fromStop (int, optional): The index of the boarding stop (default is the first stop).
+            - toStop (int, optional): The index of the alighting stop (default is the last stop).
             - status (str): The status of the booking (will be overwritten to 'booked').
 
     Returns:
-        dict: The newly created booking as a JSON object.
+        dict: The newly created booking as a JSON object, or a JSON error message with a 400
+            status code if the trip, stops or seat do not exist, or a 409 status code if the seat
+            is already booked on any segment of the journey.
     """
     data = request.get_json()
-    booking = BookingFacade.create_booking(
-        tripId=data['tripId'],
-        userId=current_user,
-        seatNumber=data['seatNumber'],
-        status='booked'
-    )
+    try:
+        booking = BookingFacade.create_booking(
+            tripId=data['tripId'],
+            userId=current_user,
+            seatNumber=data['seatNumber'],
+            status='booked',
+            fromStop=data.get('fromStop'),
+            toStop=data.get('toStop')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except SeatUnavailableError as e:
+        return jsonify({'error': str(e)}), 409
     return jsonify(booking)
 
+@booking_bp.route('/booking/create_bulk', methods=['POST'])
+@token_required
+@permission_required('user')
+@rate_limit('booking', '30/60')
+@validate_json(SEATS_SCHEMA)
+def create_bookings(current_user, current_user_role):
+    """
+    Books several seats on one trip for the current user, all or nothing.
+
+    Args:
+        data (dict): Request body data with the following keys:
+            - tripId (str): The ID of the trip to book.
+            - seatNumbers (list): The seat numbers to book (at most 20).
+            - fromStop (int, optional): The index of the boarding stop (default is the first stop).
+            - toStop (int, optional): The index of the alighting stop (default is the last stop).
+
+    Returns:
+        dict: A JSON object containing the list of newly created bookings, or a JSON error
+            message with a 400 status code if the trip, stops or seats are invalid, or a 409
+            status code if any of the seats is already booked.
+    """
+    data = request.get_json()
+    try:
+        bookings = BookingFacade.create_bookings(
+            tripId=data['tripId'],
+            userId=current_user,
+            seatNumbers=data['seatNumbers'],
+            status='booked',
+            fromStop=data.get('fromStop'),
+            toStop=data.get('toStop')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except SeatUnavailableError as e:
+        return jsonify({'error': str(e)}), 409
+    return jsonify({'bookings': bookings})
+
+@booking_bp.route('/booking/hold', methods=['POST'])
+@token_required
+@permission_required('user')
+@rate_limit('booking', '30/60')
+@validate_json(SEATS_SCHEMA)
+def hold_seats(current_user, current_user_role):
+    """
+    Temporarily holds seats on a trip for the current user until payment.
+
+    Args:
+        data (dict): Request body data with the following keys:
+            - tripId (str): The ID of the trip.
+            - seatNumbers (list): The seat numbers to hold (at most 20).
+            - fromStop (int, optional): The index of the boarding stop (default is the first stop).
+            - toStop (int, optional): The index of the alighting stop (default is the last stop).
+
+    Returns:
+        dict: A JSON object containing the list of held bookings with their expiry, or a JSON
+            error message with a 400 status code if the trip, stops or seats are invalid, or a
+            409 status code if any of the seats is already taken.
+    """
+    data = request.get_json()
+    try:
+        bookings = BookingFacade.hold_seats(
+            tripId=data['tripId'],
+            userId=current_user,
+            seatNumbers=data['seatNumbers'],
+            fromStop=data.get('fromStop'),
+            toStop=data.get('toStop')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except SeatUnavailableError as e:
+        return jsonify({'error': str(e)}), 409
+    return jsonify({'bookings': bookings})
+
+@booking_bp.route('/booking/<booking_id>/confirm', methods=['POST'])
+@token_required
+@permission_required('user')
+def confirm_hold(booking_id, current_user, current_user_role):
+    """
+    Confirms a seat hold, turning it into a booking.
+
+    Args:
+        booking_id (str): The ID of the held booking.
+
+    Returns:
+        dict: The confirmed booking as a JSON object, or a JSON error message with a 404
+            status code if there is no live hold for the current user.
+    """
+    booking = BookingFacade.confirm_hold(booking_id, current_user)
+    if booking:
+        return jsonify(booking)
+    return jsonify({'error': 'Hold not found or expired'}), 404
+
 @booking_bp.route('/booking/<booking_id>', methods=['GET'])
 @token_required
 @permission_required('user')
@@ -39,12 +175,16 @@ def get_booking(booking_id, current_user, current_user_role):
 
     Args:
         booking_id (str): The ID of the booking to retrieve.
+        fields (str): Comma-separated list of fields to return (default is all fields).
 
     Returns:
         dict: The booking as a JSON object if found, otherwise a JSON error
-            message with a 404 status code.
+            message with a 404 status code, or a 400 status code if a requested field is unknown.
     """
-    booking = BookingFacade.get_booking(booking_id)
+    try:
+        booking = BookingFacade.get_booking(booking_id, parse_fields(request.args.get('fields')))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     if booking:
         return jsonify(booking)
     return jsonify({'error': 'Booking not found'}), 404
@@ -52,6 +192,7 @@ def get_booking(booking_id, current_user, current_user_role):
 @booking_bp.route('/booking/<booking_id>', methods=['PUT'])
 @token_required
 @permission_required('user')
+@validate_json(UPDATE_BOOKING_SCHEMA)
 def update_booking(booking_id, current_user, current_user_role):
     """
     Updates an existing booking's details.
@@ -62,22 +203,32 @@ def update_booking(booking_id, current_user, current_user_role):
             - tripId (str): The ID of the trip the booking belongs to.
             - userId (str): The ID of the user who made the booking.
             - seatNumber (int): The seat number of the booking.
-            - status (str): The status of the booking (will be overwritten to 'booked').
+            - fromStop (int, optional): The index of the boarding stop (default is the first stop).
+            - toStop (int, optional): The index of the alighting stop (default is the last stop).
+            - status (str, optional): The new status of the booking, 'booked' or 'cancelled'.
             - updatedAt (datetime): The time when the booking was updated.
 
     Returns:
         dict: A JSON object with a success message if the update was successful, otherwise a JSON error
-            message with a 404 status code.
+            message with a 404 status code, a 400 status code if the trip, stops, seat or status are invalid, or a 409
+            status code if the new seat is already booked on any segment of the journey.
     """
     data = request.get_json()
-    success = BookingFacade.update_booking(
-        booking_id,
-        tripId=data.get('tripId'),
-        userId=current_user,
-        seatNumber=data.get('seatNumber'),
-        status=data.get('status'),
-        updatedAt=data.get('updatedAt')
-    )
+    try:
+        success = BookingFacade.update_booking(
+            booking_id,
+            tripId=data.get('tripId'),
+            userId=current_user,
+            seatNumber=data.get('seatNumber'),
+            status=data.get('status'),
+            fromStop=data.get('fromStop'),
+            toStop=data.get('toStop'),
+            updatedAt=data.get('updatedAt')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except SeatUnavailableError as e:
+        return jsonify({'error': str(e)}), 409
     if success:
         return jsonify({'message': 'Booking updated'})
     return jsonify({'error': 'Booking not found'}), 404
@@ -110,27 +261,83 @@ def list_bookings(current_user, current_user_role):
 
     :param page: The page to retrieve (default is 1).
     :param size: The size of the page (default is 10).
+    :param after: The cursor returned as nextCursor by the previous page; pass it empty to
+        start paging by cursor instead of by page number.
+    :param withTotal: Whether to include the total number of bookings (default is true).
+        totalExact tells whether the total is exact or estimated.
+    :param fields: Comma-separated list of fields to return (default is all fields).
 
     :return: A JSON object containing the list of bookings.
     :statuscode 200: The list of bookings was successfully retrieved.
+    :statuscode 400: The cursor or a requested field is invalid.
     """
     page = int(request.args.get('page', 1))
     size = int(request.args.get('size', 10))
-    bookings_data = BookingFacade.get_all_bookings(page, size)
+    after = request.args.get('after')
+    with_total = request.args.get('withTotal', 'true').lower() != 'false'
+    fields = parse_fields(request.args.get('fields'))
+    try:
+        bookings_data = BookingFacade.get_all_bookings(page, size, after, with_total, fields)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     return jsonify(bookings_data)
 
+@booking_bp.route('/booking/export', methods=['GET'])
+@token_required
+@permission_required('admin')
+def export_bookings(current_user, current_user_role):
+    """
+    Streams all bookings as NDJSON or CSV.
+
+    :param format: The export format, ndjson or csv (default is ndjson).
+    :param tripId: Only export bookings of this trip (optional).
+    :param from: Only export bookings created at or after this ISO date (optional).
+    :param to: Only export bookings created before this ISO date (optional).
+
+    :return: The bookings, one per line.
+    :statuscode 200: The export is streaming.
+    :statuscode 400: The format or a date filter is invalid.
+    """
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f'Unsupported format: {export_format}'}), 400
+    try:
+        bookings = BookingFacade.export_bookings(
+            tripId=request.args.get('tripId'),
+            date_from=request.args.get('from'),
+            date_to=request.args.get('to')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return export_response(bookings, ("_id",) + Booking.FIELDS, export_format, 'bookings')
+
 @booking_bp.route('/booking/available_seats/<trip_id>', methods=['GET'])
 @token_required
 @permission_required('user')
+@rate_limit('available_seats', '60/60')
 def available_seats(trip_id, current_user, current_user_role):
     """
     Retrieves the booked seat numbers for a given trip.
 
     Args:
         trip_id (str): The ID of the trip to retrieve the booked seats for.
+        free (bool): Whether to also return the free seat numbers (default is false).
+        fromStop (int): The index of the boarding stop (default is the first stop).
+        toStop (int): The index of the alighting stop (default is the last stop).
 
     Returns:
-        dict: A JSON object containing a list of booked seat numbers.
+        dict: A JSON object containing a list of seat numbers booked on any segment of the
+            journey, and the seat numbers free for the whole journey when requested (null if the
+            trip has no bus assigned), or a JSON error message with a 400 status code if the
+            stops are invalid.
     """
-    booked_seats = BookingFacade.get_available_seats(trip_id)
-    return jsonify({"booked_seats": booked_seats})
\ No newline at end of file
+    fromStop = request.args.get('fromStop', type=int)
+    toStop = request.args.get('toStop', type=int)
+    try:
+        booked_seats = BookingFacade.get_available_seats(trip_id, fromStop, toStop)
+        response = {"booked_seats": booked_seats}
+        if request.args.get('free', 'false').lower() == 'true':
+            response["free_seats"] = BookingFacade.get_free_seats(trip_id, fromStop, toStop)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(response)
\ No newline at end of file
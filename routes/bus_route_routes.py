@@ -1,13 +1,33 @@
 # routes/bus_route_routes.py
 from flask import Blueprint, request, jsonify
 from facade.bus_route_facade import BusRouteFacade
-from decorators import token_required, permission_required
+from decorators import token_required, permission_required, validate_json
+from utils.bulk_import import load_rows
+from utils.fields import parse_fields
 
 bus_route_bp = Blueprint('bus_route_bp', __name__)
 
+
+CREATE_ROUTE_SCHEMA = {
+    "route": {"type": "string", "required": True, "min_length": 1},
+    "routeNo": {"type": ["integer", "string"], "required": True},
+    "distance": {"type": "number", "required": True, "min": 0},
+}
+
+UPDATE_ROUTE_SCHEMA = {
+    "route": {"type": "string", "min_length": 1},
+    "routeNo": {"type": ["integer", "string"]},
+    "distance": {"type": "number", "min": 0},
+}
+
+ADD_CITY_SCHEMA = {
+    "name": {"type": "string", "required": True, "min_length": 1, "max_length": 100},
+}
+
 @bus_route_bp.route('/bus_route/create', methods=['POST'])
 @token_required
 @permission_required('admin')
+@validate_json(CREATE_ROUTE_SCHEMA)
 def create_route(current_user, current_user_role):
     """
     Creates a new bus route.
@@ -39,12 +59,16 @@ def get_route(route_id, current_user, current_user_role):
 
     Args:
         route_id (str): The ID of the bus route.
+        fields (str): Comma-separated list of fields to return (default is all fields).
 
     Returns:
         dict: The bus route as a JSON object, or an error message if the route is not found.
     """
 
-    bus_route = BusRouteFacade.get_route(route_id)
+    try:
+        bus_route = BusRouteFacade.get_route(route_id, parse_fields(request.args.get('fields')))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     if bus_route:
         return jsonify(bus_route)
     return jsonify({'error': 'Bus route not found'}), 404
@@ -52,6 +76,7 @@ def get_route(route_id, current_user, current_user_role):
 @bus_route_bp.route('/bus_route/<route_id>', methods=['PUT'])
 @token_required
 @permission_required('admin')
+@validate_json(UPDATE_ROUTE_SCHEMA)
 def update_route(route_id, current_user, current_user_role):
     """
     Updates a bus route by its ID.
@@ -106,19 +131,32 @@ def list_routes(current_user, current_user_role):
     Args:
         page (int): The page number. Defaults to 1.
         size (int): The page size. Defaults to 10.
+        after (str): The cursor returned as nextCursor by the previous page; pass it empty to
+            start paging by cursor instead of by page number.
+        withTotal (bool): Whether to include the total number of bus routes (default is true).
+            totalExact tells whether the total is exact or estimated.
+        fields (str): Comma-separated list of fields to return (default is all fields).
 
     Returns:
-        dict: A JSON object containing the list of bus routes.
+        dict: A JSON object containing the list of bus routes, or a JSON error message with a
+            400 status code if the cursor or a requested field is invalid.
     """
     page = int(request.args.get('page', 1))
     size = int(request.args.get('size', 10))
-    routes_data = BusRouteFacade.get_all_routes(page, size)
+    after = request.args.get('after')
+    with_total = request.args.get('withTotal', 'true').lower() != 'false'
+    fields = parse_fields(request.args.get('fields'))
+    try:
+        routes_data = BusRouteFacade.get_all_routes(page, size, after, with_total, fields)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     return jsonify(routes_data)
 # ...existing code...
 
 @bus_route_bp.route('/city/add', methods=['POST'])
 @token_required
 @permission_required('admin')
+@validate_json(ADD_CITY_SCHEMA)
 def add_city(current_user, current_user_role):
     """
     Adds a new city.
@@ -137,14 +175,37 @@ def add_city(current_user, current_user_role):
 @token_required
 def list_cities(current_user, current_user_role):
     """
-    Lists cities based on a query.
+    Autocompletes city names.
 
     Args:
-        query (str): The query string to search for cities.
+        query (str): The prefix of the city name, or of a word of it, to search for.
+        limit (int): The maximum number of cities to return (default is 10, at most 50).
 
     Returns:
-        list: A JSON array of cities matching the query.
+        list: A JSON array of matching cities, whole-name matches and shorter names first.
     """
     query = request.args.get('query', '')
-    cities = BusRouteFacade.list_cities(query)
-    return jsonify(cities)
\ No newline at end of file
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+    cities = BusRouteFacade.list_cities(query, limit)
+    return jsonify(cities)
+
+@bus_route_bp.route('/bus_route/import', methods=['POST'])
+@token_required
+@permission_required('admin')
+def import_routes(current_user, current_user_role):
+    """
+    Bulk imports bus routes.
+
+    Request Body:
+        A JSON array of bus routes shaped like tests/example/bus_route.json, or one JSON object per line.
+
+    Returns:
+        dict: A JSON object with the number of imported bus routes and the errors of rejected rows,
+            or a JSON error message with a 400 status code if the body cannot be parsed.
+    """
+    try:
+        rows = load_rows(request.get_data(as_text=True))
+    except ValueError as e:
+        return jsonify({'error': f'Invalid import data: {e}'}), 400
+    report = BusRouteFacade.import_routes(rows, createdBy=current_user)
+    return jsonify(report)
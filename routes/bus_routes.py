@@ -3,14 +3,38 @@
 # The routes are as follows:
 from flask import Blueprint, request, jsonify
 from facade.bus_facade import BusFacade
-from decorators import token_required, permission_required
+from decorators import token_required, permission_required, validate_json
+from utils.bulk_import import load_rows
+from utils.fields import parse_fields
 
 bus_bp = Blueprint('bus_bp', __name__)
 
+
+CREATE_BUS_SCHEMA = {
+    "travel": {"type": "string", "required": True, "min_length": 1},
+    "isAc": {"type": "boolean", "required": True},
+    "isSleeper": {"type": "boolean", "required": True},
+    "registration": {"type": "string", "required": True, "min_length": 1},
+    "totalSeat": {"type": "integer", "required": True, "min": 1},
+    "insuranceValidTill": {"type": "string", "required": True},
+    "permitValidTill": {"type": "string", "required": True},
+}
+
+UPDATE_BUS_SCHEMA = {
+    "travel": {"type": "string", "min_length": 1},
+    "isAc": {"type": "boolean"},
+    "isSleeper": {"type": "boolean"},
+    "registration": {"type": "string", "min_length": 1},
+    "totalSeat": {"type": "integer", "min": 1},
+    "insuranceValidTill": {"type": "string"},
+    "permitValidTill": {"type": "string"},
+}
+
 @bus_bp.route('/bus/create', methods=['POST'])
 @token_required
 @permission_required('admin')
-def create_bus(current_user):
+@validate_json(CREATE_BUS_SCHEMA)
+def create_bus(current_user, current_user_role):
     """
     Creates a new bus.
 
@@ -43,18 +67,22 @@ def create_bus(current_user):
 @bus_bp.route('/bus/<bus_id>', methods=['GET'])
 @token_required
 @permission_required('user')
-def get_bus(bus_id):
+def get_bus(bus_id, current_user, current_user_role):
     """
     Retrieves a bus by its ID.
 
     Args:
         bus_id (str): The ID of the bus to retrieve.
+        fields (str): Comma-separated list of fields to return (default is all fields).
 
     Returns:
         dict: A JSON object of the bus details if found, or an error message if not found.
     """
 
-    bus = BusFacade.get_bus(bus_id)
+    try:
+        bus = BusFacade.get_bus(bus_id, parse_fields(request.args.get('fields')))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     if bus:
         return jsonify(bus)
     return jsonify({'error': 'Bus not found'}), 404
@@ -62,6 +90,7 @@ def get_bus(bus_id):
 @bus_bp.route('/bus/<bus_id>', methods=['PUT'])
 @token_required
 @permission_required('admin')
+@validate_json(UPDATE_BUS_SCHEMA)
 def update_bus(bus_id, current_user, current_user_role):
     """
     Updates an existing bus's details by its ID.
@@ -127,11 +156,44 @@ def list_buses(current_user, current_user_role):
     Args:
         page (int): The page number (default is 1).
         size (int): The page size (default is 10).
+        after (str): The cursor returned as nextCursor by the previous page; pass it empty to
+            start paging by cursor instead of by page number.
+        withTotal (bool): Whether to include the total number of buses (default is true).
+            totalExact tells whether the total is exact or estimated.
+        fields (str): Comma-separated list of fields to return (default is all fields).
 
     Returns:
-        dict: A JSON object containing the list of buses.
+        dict: A JSON object containing the list of buses, or a JSON error message with a 400
+            status code if the cursor or a requested field is invalid.
     """
     page = int(request.args.get('page', 1))
     size = int(request.args.get('size', 10))
-    buses_data = BusFacade.get_all_buses(page, size)
-    return jsonify(buses_data)
\ No newline at end of file
+    after = request.args.get('after')
+    with_total = request.args.get('withTotal', 'true').lower() != 'false'
+    fields = parse_fields(request.args.get('fields'))
+    try:
+        buses_data = BusFacade.get_all_buses(page, size, after, with_total, fields)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(buses_data)
+
+@bus_bp.route('/bus/import', methods=['POST'])
+@token_required
+@permission_required('admin')
+def import_buses(current_user, current_user_role):
+    """
+    Bulk imports buses.
+
+    Request Body:
+        A JSON array of buses shaped like tests/example/bus.json, or one JSON object per line.
+
+    Returns:
+        dict: A JSON object with the number of imported buses and the errors of rejected rows,
+            or a JSON error message with a 400 status code if the body cannot be parsed.
+    """
+    try:
+        rows = load_rows(request.get_data(as_text=True))
+    except ValueError as e:
+        return jsonify({'error': f'Invalid import data: {e}'}), 400
+    report = BusFacade.import_buses(rows, createdBy=current_user)
+    return jsonify(report)
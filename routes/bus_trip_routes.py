@@ -1,39 +1,70 @@
 # routes/bus_trip_routes.py
 from flask import Blueprint, request, jsonify
 from facade.bus_trip_facade import BusTripFacade
-from decorators import token_required, permission_required
+from decorators import token_required, permission_required, rate_limit, validate_json
+from models.bus_trip import BusTrip
+from utils.bulk_import import load_rows
+from utils.export import EXPORT_FORMATS, export_response
+from utils.fields import parse_fields
 
 bus_trip_bp = Blueprint('bus_trip_bp', __name__)
 
+
+CREATE_TRIP_SCHEMA = {
+    "routeId": {"type": "string", "required": True, "min_length": 1},
+    "date": {"type": "string", "required": True, "min_length": 10},
+    "frequency": {"type": "string", "required": True},
+    "timing": {"type": "string", "required": True},
+    "fare": {"type": "number", "required": True, "min": 0},
+    "stops": {"type": "array", "required": True, "min_length": 1, "items": {"type": ["object", "string"]}},
+    "busId": {"type": "string", "min_length": 1},
+}
+
+UPDATE_TRIP_SCHEMA = {
+    "routeId": {"type": "string", "min_length": 1},
+    "date": {"type": "string", "min_length": 10},
+    "frequency": {"type": "string"},
+    "timing": {"type": "string"},
+    "fare": {"type": "number", "min": 0},
+    "stops": {"type": "array", "min_length": 1, "items": {"type": ["object", "string"]}},
+    "busId": {"type": "string", "min_length": 1},
+}
+
 @bus_trip_bp.route('/bus_trip/create', methods=['POST'])
 @token_required
 @permission_required('admin')
+@validate_json(CREATE_TRIP_SCHEMA)
 def create_trip(current_user, current_user_role):
     """
     Creates a new bus trip.
 
     Args:
         routeId (str): The ID of the bus route for the trip.
-        date (str): The date of the trip in the format %Y-%m-%d.
+        date (str): The date of the trip in the format %Y-%m-%d; a datetime is stored as its date.
         frequency (str): The frequency of the trip (daily, weekly, monthly).
         timing (str): The timing of the trip (morning, afternoon, evening).
         fare (float): The fare of the trip.
         stops (list): A list of stops for the trip.
+        busId (str, optional): The ID of the bus operating the trip.
         createdBy (User): The user who created the trip.
 
     Returns:
         dict: The newly created bus trip as a JSON object.
     """
     data = request.get_json()
-    bus_trip = BusTripFacade.create_trip(
-        routeId=data['routeId'],
-        date=data['date'],
-        frequency=data['frequency'],
-        timing=data['timing'],
-        fare=data['fare'],
-        stops=data['stops'],
-        createdBy=current_user
-    )
+    try:
+        bus_trip = BusTripFacade.create_trip(
+            routeId=data['routeId'],
+            date=data['date'],
+            frequency=data['frequency'],
+            timing=data['timing'],
+            fare=data['fare'],
+            stops=data['stops'],
+            createdBy=current_user,
+            busId=data.get('busId')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     return jsonify(bus_trip)
 
 @bus_trip_bp.route('/bus_trip/<trip_id>', methods=['GET'])
@@ -45,11 +76,15 @@ def get_trip(trip_id, current_user, current_user_role):
 
     Args:
         trip_id (str): The ID of the bus trip to retrieve.
+        fields (str): Comma-separated list of fields to return (default is all fields).
 
     Returns:
         dict: The bus trip as a JSON object, or an error message if the trip is not found.
     """
-    bus_trip = BusTripFacade.get_trip(trip_id)
+    try:
+        bus_trip = BusTripFacade.get_trip(trip_id, parse_fields(request.args.get('fields')))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     if bus_trip:
         return jsonify(bus_trip)
     return jsonify({'error': 'Bus trip not found'}), 404
@@ -57,6 +92,7 @@ def get_trip(trip_id, current_user, current_user_role):
 @bus_trip_bp.route('/bus_trip/<trip_id>', methods=['PUT'])
 @token_required
 @permission_required('admin')
+@validate_json(UPDATE_TRIP_SCHEMA)
 def update_trip(trip_id, current_user, current_user_role):
     """
     Updates an existing bus trip's details by its ID.
@@ -71,23 +107,29 @@ def update_trip(trip_id, current_user, current_user_role):
         timing (str): The new timing of the trip (morning, afternoon, evening).
         fare (float): The new fare of the trip.
         stops (list): The new list of stops for the trip.
+        busId (str): The ID of the new bus operating the trip.
         updatedAt (datetime): The time when the trip was updated.
 
     Returns:
-        dict: A JSON object with a success message if the update was successful, otherwise a JSON error message with a 404 status code.
+        dict: A JSON object with a success message if the update was successful, otherwise a JSON error message with a 404 status code,
+            or a 400 status code if the stops are changed while the trip has active bookings.
     """
 
     data = request.get_json()
-    success = BusTripFacade.update_trip(
-        trip_id,
-        routeId=data.get('routeId'),
-        date=data.get('date'),
-        frequency=data.get('frequency'),
-        timing=data.get('timing'),
-        fare=data.get('fare'),
-        stops=data.get('stops'),
-        updatedAt=data.get('updatedAt')
-    )
+    try:
+        success = BusTripFacade.update_trip(
+            trip_id,
+            routeId=data.get('routeId'),
+            date=data.get('date'),
+            frequency=data.get('frequency'),
+            timing=data.get('timing'),
+            fare=data.get('fare'),
+            stops=data.get('stops'),
+            busId=data.get('busId'),
+            updatedAt=data.get('updatedAt')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     if success:
         return jsonify({'message': 'Bus trip updated'})
     return jsonify({'error': 'Bus trip not found'}), 404
@@ -113,6 +155,7 @@ def delete_trip(trip_id, current_user, current_user_role):
 @bus_trip_bp.route('/bus_trip/list', methods=['GET'])
 @token_required
 @permission_required('user')
+@rate_limit('trip_search', '120/60')
 def list_trips(current_user, current_user_role):
     """
     Lists all bus trips.
@@ -120,9 +163,19 @@ def list_trips(current_user, current_user_role):
     Args:
         page (int): The page number to retrieve (default is 1).
         size (int): The page size (default is 10).
+        date (str): Only list trips on this date (optional).
+        from (str): Only list trips boarding at this city, at any stop but the last (optional).
+        to (str): Only list trips alighting at this city after the boarding stop (optional).
+        after (str): The cursor returned as nextCursor by the previous page; pass it empty to
+            start paging by cursor instead of by page number.
+        withTotal (bool): Whether to include the total number of bus trips (default is true).
+            totalExact tells whether the total is exact or estimated.
+        fields (str): Comma-separated list of fields to return (default is all fields).
 
     Returns:
-        dict: A JSON object containing the list of bus trips.
+        dict: A JSON object containing the list of bus trips, each with the fare of the
+            searched journey as fareQuote when searching by from and/or to, or a JSON error
+            message with a 400 status code if the cursor or a requested field is invalid.
     """
     page = int(request.args.get('page', 1))
     size = int(request.args.get('size', 10))
@@ -130,5 +183,95 @@ def list_trips(current_user, current_user_role):
     busTypes = request.args.get('busTypes')
     from_city = request.args.get('from')
     to_city = request.args.get('to')
-    trips_data = BusTripFacade.get_all_trips(page, size, date, busTypes, from_city, to_city)
-    return jsonify(trips_data)
\ No newline at end of file
+    after = request.args.get('after')
+    with_total = request.args.get('withTotal', 'true').lower() != 'false'
+    fields = parse_fields(request.args.get('fields'))
+    try:
+        trips_data = BusTripFacade.get_all_trips(
+            page, size, date, busTypes, from_city, to_city, after, with_total, fields
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(trips_data)
+
+@bus_trip_bp.route('/bus_trip/<trip_id>/fare', methods=['GET'])
+@token_required
+@permission_required('user')
+def fare_quote(trip_id, current_user, current_user_role):
+    """
+    Quotes the fare of a journey on a bus trip.
+
+    Args:
+        trip_id (str): The ID of the bus trip.
+        from (str): The boarding city (default is the first stop).
+        to (str): The alighting city (default is the last stop).
+
+    Returns:
+        dict: A JSON object with the boarding and alighting stop indices and the fare, or a JSON
+            error message with a 404 status code if the trip is not found, or a 400 status code
+            if the trip does not serve the journey.
+    """
+    quote = BusTripFacade.get_fare_quote(trip_id, request.args.get('from'), request.args.get('to'))
+    if quote is None:
+        return jsonify({'error': 'Bus trip not found'}), 404
+    if quote['fare'] is None:
+        return jsonify({'error': 'Bus trip does not serve this journey'}), 400
+    return jsonify(quote)
+
+@bus_trip_bp.route('/bus_trip/export', methods=['GET'])
+@token_required
+@permission_required('admin')
+def export_trips(current_user, current_user_role):
+    """
+    Streams all bus trips as NDJSON or CSV.
+
+    Args:
+        format (str): The export format, ndjson or csv (default is ndjson).
+        from (str): Only export trips on or after this date (optional).
+        to (str): Only export trips on or before this date (optional).
+
+    Returns:
+        Response: The bus trips, one per line, or a JSON error message with a 400 status code
+            if the format or a date is not supported.
+    """
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f'Unsupported format: {export_format}'}), 400
+    try:
+        trips = BusTripFacade.export_trips(date_from=request.args.get('from'), date_to=request.args.get('to'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return export_response(trips, ("_id",) + BusTrip.FIELDS, export_format, 'bus_trips')
+
+@bus_trip_bp.route('/bus_trip/import', methods=['POST'])
+@token_required
+@permission_required('admin')
+def import_trips(current_user, current_user_role):
+    """
+    Bulk imports bus trips.
+
+    Request Body:
+        A JSON array of bus trips shaped like tests/example/bus_trip.json, or one JSON object per line.
+
+    Returns:
+        dict: A JSON object with the number of imported bus trips and the errors of rejected rows,
+            or a JSON error message with a 400 status code if the body cannot be parsed.
+    """
+    try:
+        rows = load_rows(request.get_data(as_text=True))
+    except ValueError as e:
+        return jsonify({'error': f'Invalid import data: {e}'}), 400
+    report = BusTripFacade.import_trips(rows, createdBy=current_user)
+    return jsonify(report)
+
+@bus_trip_bp.route('/bus_trip/cache_stats', methods=['GET'])
+@token_required
+@permission_required('admin')
+def search_cache_stats(current_user, current_user_role):
+    """
+    Returns the hit and miss counters of the trip search cache in this worker.
+
+    Returns:
+        dict: A JSON object with the cache hits, misses, hit ratio and size.
+    """
+    return jsonify(BusTripFacade.get_search_cache_stats())
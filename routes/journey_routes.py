@@ -0,0 +1,39 @@
+# routes/journey_routes.py
+from flask import Blueprint, request, jsonify
+from facade.journey_facade import JourneyFacade
+from decorators import token_required, permission_required
+
+journey_bp = Blueprint('journey_bp', __name__)
+
+@journey_bp.route('/journey/plan', methods=['GET'])
+@token_required
+@permission_required('user')
+def plan_journey(current_user, current_user_role):
+    """
+    Plans the earliest-arriving journey between two cities on a date, with changes of bus
+    where no single trip connects them.
+
+    Args:
+        from (str): The boarding city.
+        to (str): The alighting city.
+        date (str): The travel date in the format %Y-%m-%d.
+        departAfter (str): The earliest departure time as HH:MM (default is 00:00).
+
+    Returns:
+        dict: The journey as a JSON object with its departure, arrival, fare and legs, each leg
+            giving the trip and the stop indices to book; or a JSON error message with a 400
+            status code if a parameter is missing or invalid, or a 404 status code if the cities
+            are not connected on that date.
+    """
+    from_city = request.args.get('from')
+    to_city = request.args.get('to')
+    date = request.args.get('date')
+    if not from_city or not to_city or not date:
+        return jsonify({'error': 'from, to and date are required'}), 400
+    try:
+        journey = JourneyFacade.plan_journey(from_city, to_city, date, request.args.get('departAfter'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if journey is None:
+        return jsonify({'error': 'No journey found'}), 404
+    return jsonify(journey)
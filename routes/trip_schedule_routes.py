@@ -0,0 +1,115 @@
+# routes/trip_schedule_routes.py
+from flask import Blueprint, request, jsonify
+from facade.trip_schedule_facade import TripScheduleFacade
+from models.trip_schedule import TripSchedule
+from decorators import token_required, permission_required, validate_json
+
+trip_schedule_bp = Blueprint('trip_schedule_bp', __name__)
+
+
+CREATE_SCHEDULE_SCHEMA = {
+    "routeId": {"type": "string", "required": True, "min_length": 1},
+    "frequency": {"type": "string", "required": True, "enum": TripSchedule.FREQUENCIES},
+    "startDate": {"type": "string", "required": True, "min_length": 10},
+    "endDate": {"type": "string", "min_length": 10},
+    "daysOfWeek": {"type": "array", "items": {"type": "integer", "min": 0, "max": 6}},
+    "timing": {"type": "string", "required": True},
+    "fare": {"type": "number", "required": True, "min": 0},
+    "stops": {"type": "array", "required": True, "min_length": 1, "items": {"type": ["object", "string"]}},
+    "busId": {"type": "string", "min_length": 1},
+}
+
+@trip_schedule_bp.route('/trip_schedule/create', methods=['POST'])
+@token_required
+@permission_required('admin')
+@validate_json(CREATE_SCHEDULE_SCHEMA)
+def create_schedule(current_user, current_user_role):
+    """
+    Creates a recurring trip schedule. Its dated trips are created on demand when a date is
+    searched, or ahead of time through /trip_schedule/materialize.
+
+    Args:
+        routeId (str): The ID of the bus route for the trips.
+        frequency (str): How often the trip runs (daily, weekly).
+        startDate (str): The first date of the schedule in the format %Y-%m-%d.
+        endDate (str, optional): The last date of the schedule in the format %Y-%m-%d.
+        daysOfWeek (list, optional): The weekdays a weekly schedule runs on, 0 being Monday.
+        timing (str): The departure time of the trips.
+        fare (float): The fare of the trips.
+        stops (list): A list of stops for the trips.
+        busId (str, optional): The ID of the bus operating the trips.
+
+    Returns:
+        dict: The newly created schedule as a JSON object, or a JSON error message with a 400
+            status code if the schedule is invalid.
+    """
+    data = request.get_json()
+    try:
+        schedule = TripScheduleFacade.create_schedule(
+            routeId=data['routeId'],
+            frequency=data['frequency'],
+            startDate=data['startDate'],
+            timing=data['timing'],
+            fare=data['fare'],
+            stops=data['stops'],
+            createdBy=current_user,
+            endDate=data.get('endDate'),
+            daysOfWeek=data.get('daysOfWeek'),
+            busId=data.get('busId')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(schedule)
+
+@trip_schedule_bp.route('/trip_schedule/<schedule_id>', methods=['GET'])
+@token_required
+@permission_required('admin')
+def get_schedule(schedule_id, current_user, current_user_role):
+    """
+    Retrieves a trip schedule by its ID.
+
+    Args:
+        schedule_id (str): The ID of the schedule to retrieve.
+
+    Returns:
+        dict: The schedule as a JSON object, or an error message if the schedule is not found.
+    """
+    schedule = TripScheduleFacade.get_schedule(schedule_id)
+    if schedule:
+        return jsonify(schedule)
+    return jsonify({'error': 'Trip schedule not found'}), 404
+
+@trip_schedule_bp.route('/trip_schedule/<schedule_id>', methods=['DELETE'])
+@token_required
+@permission_required('admin')
+def delete_schedule(schedule_id, current_user, current_user_role):
+    """
+    Deletes a trip schedule by its ID. Trips already created from it are kept.
+
+    Args:
+        schedule_id (str): The ID of the schedule to delete.
+
+    Returns:
+        dict: A JSON object with a success message, or an error message if the schedule is not found.
+    """
+    success = TripScheduleFacade.delete_schedule(schedule_id)
+    if success:
+        return jsonify({'message': 'Trip schedule deleted'})
+    return jsonify({'error': 'Trip schedule not found'}), 404
+
+@trip_schedule_bp.route('/trip_schedule/materialize', methods=['POST'])
+@token_required
+@permission_required('admin')
+def materialize_schedules(current_user, current_user_role):
+    """
+    Creates the scheduled trips of a rolling window of days ahead of time.
+
+    Args:
+        days (int): The number of days to materialize, starting today (default is 7, at most 366).
+
+    Returns:
+        dict: A JSON object with the number of trips created.
+    """
+    days = min(int(request.args.get('days', 7)), 366)
+    created = TripScheduleFacade.materialize_window(days)
+    return jsonify({'created': created})
@@ -1,9 +1,42 @@
-from flask import Blueprint, request, jsonify, current_app
-from facade.user_facade import UserFacade
-from decorators import token_required, permission_required
+from flask import Blueprint, request, jsonify, current_app, g
+from facade.user_facade import EMAIL_PATTERN, MOBILE_PATTERN, UserFacade
+from decorators import token_required, permission_required, rate_limit, validate_json
+from models.user import User
+from utils.export import EXPORT_FORMATS, export_response
+from utils.fields import parse_fields
+from utils.passwords import PasswordHasherBusyError
+from utils.token_cache import token_claims_cache
 
 user_bp = Blueprint('user_bp', __name__)
 
+
+CREATE_USER_SCHEMA = {
+    "firstName": {"type": "string", "required": True, "min_length": 1},
+    "lastName": {"type": "string", "required": True},
+    "email": {"type": "string", "required": True, "pattern": EMAIL_PATTERN, "pattern_message": "is not a valid email"},
+    "username": {"type": "string", "required": True, "min_length": 1},
+    "password": {"type": "string", "required": True, "min_length": 1},
+    "mobile": {"type": "string", "required": True, "pattern": MOBILE_PATTERN, "pattern_message": "must be 10 digits"},
+    "gender": {"type": "string"},
+}
+
+LOGIN_SCHEMA = {
+    "username": {"type": "string", "required": True},
+    "password": {"type": "string", "required": True},
+}
+
+UPDATE_USER_SCHEMA = {
+    "firstName": {"type": "string", "min_length": 1},
+    "lastName": {"type": "string"},
+    "email": {"type": "string", "pattern": EMAIL_PATTERN, "pattern_message": "is not a valid email"},
+    "username": {"type": "string", "min_length": 1},
+    "password": {"type": "string", "min_length": 1},
+    "mobile": {"type": "string", "pattern": MOBILE_PATTERN, "pattern_message": "must be 10 digits"},
+    "gender": {"type": "string"},
+    "userType": {"type": "array", "items": {"type": "string"}},
+    "userGroup": {"type": "array", "items": {"type": "string"}},
+}
+
 @user_bp.route('/', methods=['GET'])
 def hello_user():
     """
@@ -15,6 +48,7 @@ def hello_user():
     return jsonify({'version': current_app.config['VERSION']}), 200
 
 @user_bp.route('/user/create', methods=['POST'])
+@validate_json(CREATE_USER_SCHEMA)
 def create_user():
     """
     Creates a new user.
@@ -24,24 +58,33 @@ def create_user():
     :param email: The user's email address.
     :param username: The user's username.
     :param password: The user's password.
-    :param mobile: The user's mobile number (optional).
+    :param mobile: The user's 10-digit mobile number.
     :param gender: The user's gender (optional).
 
     :return: The newly created user as a JSON object.
+    :statuscode 400: The request body is invalid, or the email or username is taken.
+    :statuscode 503: Too many passwords are being hashed; retry later.
     """
     data = request.get_json()
-    user = UserFacade.create_user(
-        data['firstName'],
-        data['lastName'],
-        data['email'],
-        data['username'],
-        data['password'],
-        data.get('mobile'),
-        data.get('gender')
-    )
+    try:
+        user = UserFacade.create_user(
+            data['firstName'],
+            data['lastName'],
+            data['email'],
+            data['username'],
+            data['password'],
+            data.get('mobile'),
+            data.get('gender')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except PasswordHasherBusyError as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
     return jsonify(user)
 
 @user_bp.route('/user/login', methods=['POST'])
+@rate_limit('login', '10/60')
+@validate_json(LOGIN_SCHEMA)
 def login():
     """
     Logs a user in.
@@ -49,16 +92,58 @@ def login():
     :param username: The user's username.
     :param password: The user's password.
 
-    :return: The JWT token as a JSON object.
+    :return: A short-lived access token, a refresh token and the access token's lifetime in
+        seconds as a JSON object.
     :statuscode 200: The user was successfully logged in.
+    :statuscode 400: The request body is invalid.
     :statuscode 401: The user credentials are invalid.
+    :statuscode 503: Too many logins are being processed; retry later.
     """
     data = request.get_json()
-    token = UserFacade.login(data['username'], data['password'])
+    try:
+        token = UserFacade.login(data['username'], data['password'])
+    except PasswordHasherBusyError as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
     if token:
         return jsonify(token)
     return jsonify({'error': 'Invalid credentials'}), 401
 
+@user_bp.route('/user/refresh', methods=['POST'])
+@rate_limit('refresh', '30/60')
+def refresh():
+    """
+    Exchanges a refresh token for new access and refresh tokens. Each refresh token can be used
+    once.
+
+    :param refreshToken: The refresh token issued at login or by the previous refresh.
+
+    :return: The new tokens as a JSON object.
+    :statuscode 200: The tokens were refreshed.
+    :statuscode 401: The refresh token is invalid, expired or already used.
+    """
+    data = request.get_json() or {}
+    if not data.get('refreshToken'):
+        return jsonify({'error': 'Refresh token is missing'}), 401
+    tokens = UserFacade.refresh_tokens(data['refreshToken'])
+    if tokens:
+        return jsonify(tokens)
+    return jsonify({'error': 'Invalid refresh token'}), 401
+
+@user_bp.route('/user/logout', methods=['POST'])
+@token_required
+def logout(current_user, current_user_role):
+    """
+    Revokes the access token of the request, and the refresh token when given.
+
+    :param refreshToken: The refresh token to revoke (optional).
+
+    :return: A success message.
+    :statuscode 200: The tokens were revoked.
+    """
+    data = request.get_json(silent=True) or {}
+    UserFacade.logout(g.token_claims, data.get('refreshToken'))
+    return jsonify({'message': 'Logged out'})
+
 @user_bp.route('/user/<user_id>', methods=['GET'])
 @token_required
 def get_user(user_id, current_user, current_user_role):
@@ -66,12 +151,17 @@ def get_user(user_id, current_user, current_user_role):
     Gets a user by its ID.
 
     :param user_id: The ID of the user to be retrieved.
+    :param fields: Comma-separated list of fields to return (default is all fields).
 
     :return: The user as a JSON object.
     :statuscode 200: The user was found.
+    :statuscode 400: A requested field is unknown.
     :statuscode 404: The user was not found.
     """
-    user = UserFacade.get_user(user_id)
+    try:
+        user = UserFacade.get_user(user_id, parse_fields(request.args.get('fields')))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     if user:
         return jsonify(user)
     return jsonify({'error': 'User not found'}), 404
@@ -79,6 +169,7 @@ def get_user(user_id, current_user, current_user_role):
 @user_bp.route('/user/<user_id>', methods=['PUT'])
 @token_required
 @permission_required('admin')
+@validate_json(UPDATE_USER_SCHEMA)
 def update_user(user_id, current_user, current_user_role):
     """
     Updates an existing user's information.
@@ -86,25 +177,30 @@ def update_user(user_id, current_user, current_user_role):
     :param user_id: The ID of the user to be updated.
     :return: A success message if the update was successful, otherwise an error message.
     :statuscode 200: The user was successfully updated.
+    :statuscode 400: The request body is invalid.
     :statuscode 404: The user was not found.
+    :statuscode 503: Too many passwords are being hashed; retry later.
     """
     user = UserFacade.get_user(user_id)
     if not user:
         return jsonify({'error': 'User not found'}), 404
 
     data = request.get_json()
-    success = UserFacade.update_user(
-        user_id,
-        data.get('firstName', user.get('firstName')),
-        data.get('lastName', user.get('lastName')),
-        data.get('email', user.get('email')),
-        data.get('username', user.get('username')),
-        data.get('password', user.get('password')),
-        data.get('mobile', user.get('mobile')),
-        data.get('gender', user.get('gender')),
-        data.get('userType', user.get('userType')),
-        data.get('userGroup', user.get('userGroup'))
-    )
+    try:
+        success = UserFacade.update_user(
+            user_id,
+            data.get('firstName', user.get('firstName')),
+            data.get('lastName', user.get('lastName')),
+            data.get('email', user.get('email')),
+            data.get('username', user.get('username')),
+            data.get('password'),
+            data.get('mobile', user.get('mobile')),
+            data.get('gender', user.get('gender')),
+            data.get('userType', user.get('userType')),
+            data.get('userGroup', user.get('userGroup'))
+        )
+    except PasswordHasherBusyError as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
     if success:
         return jsonify({'message': 'User updated'})
     return jsonify({'error': 'User not found'}), 404
@@ -135,11 +231,53 @@ def list_users(current_user, current_user_role):
 
     :param page: The page to retrieve (default is 1).
     :param size: The size of the page (default is 10).
+    :param after: The cursor returned as nextCursor by the previous page; pass it empty to
+        start paging by cursor instead of by page number.
+    :param withTotal: Whether to include the total number of users (default is true).
+        totalExact tells whether the total is exact or estimated.
+    :param fields: Comma-separated list of fields to return (default is all fields).
 
     :return: A JSON object containing the list of users.
     :statuscode 200: The list of users was successfully retrieved.
+    :statuscode 400: The cursor or a requested field is invalid.
     """
     page = int(request.args.get('page', 1))
     size = int(request.args.get('size', 10))
-    users_data = UserFacade.get_users(page, size)
-    return jsonify(users_data)
\ No newline at end of file
+    after = request.args.get('after')
+    with_total = request.args.get('withTotal', 'true').lower() != 'false'
+    fields = parse_fields(request.args.get('fields'))
+    try:
+        users_data = UserFacade.get_users(page, size, after, with_total, fields)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(users_data)
+
+@user_bp.route('/user/export', methods=['GET'])
+@token_required
+@permission_required('superAdmin')
+def export_users(current_user, current_user_role):
+    """
+    Streams all users as NDJSON or CSV.
+
+    :param format: The export format, ndjson or csv (default is ndjson).
+
+    :return: The users, one per line.
+    :statuscode 200: The export is streaming.
+    :statuscode 400: The format is not supported.
+    """
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f'Unsupported format: {export_format}'}), 400
+    return export_response(UserFacade.export_users(), ("_id",) + User.FIELDS, export_format, 'users')
+
+@user_bp.route('/user/token_cache_stats', methods=['GET'])
+@token_required
+@permission_required('admin')
+def token_cache_stats(current_user, current_user_role):
+    """
+    Returns the hit and miss counters of the verified token cache in this worker.
+
+    :return: The cache hits, misses, hit ratio and size.
+    :statuscode 200: The counters were returned.
+    """
+    return jsonify(token_claims_cache.stats())
@@ -0,0 +1,31 @@
+# storage/__init__.py
+from flask import current_app
+
+BACKENDS = ("mongo", "memory")
+
+
+def init_storage(app):
+    """
+    Creates the storage backend named by ``STORAGE_BACKEND`` and attaches it to the app.
+
+    ``mongo`` (the default) stores data in MongoDB. ``memory`` keeps it in process memory, so
+    that the API runs without a database for tests and benchmarks.
+    """
+    backend = app.config.get("STORAGE_BACKEND", "mongo")
+    if backend == "mongo":
+        from storage.mongo import MongoStorage
+        app.storage = MongoStorage(app)
+    elif backend == "memory":
+        from storage.memory import MemoryStorage
+        app.storage = MemoryStorage(app)
+    else:
+        raise ValueError(f"Unknown storage backend {backend!r}, expected one of {', '.join(BACKENDS)}")
+    return app.storage
+
+
+def get_db():
+    """
+    Returns the database of the current app's storage backend. Its collections expose the
+    PyMongo collection API.
+    """
+    return current_app.storage.db
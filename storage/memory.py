@@ -0,0 +1,693 @@
+# storage/memory.py
+import re
+import threading
+from collections.abc import Mapping
+from datetime import datetime, timezone
+
+from bson.int64 import Int64
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from pymongo.operations import DeleteMany, DeleteOne, InsertOne, UpdateMany, UpdateOne
+from pymongo.results import BulkWriteResult, DeleteResult, InsertManyResult, InsertOneResult, UpdateResult
+
+_MISSING = object()
+
+
+def _encode(value):
+    """
+    Copies a value as it would come back from MongoDB: tuples become lists and datetimes are
+    stored as naive UTC with millisecond precision.
+    """
+    if isinstance(value, Mapping):
+        return {str(key): _encode(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item) for item in value]
+    if isinstance(value, datetime):
+        if value.tzinfo:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.replace(microsecond=value.microsecond // 1000 * 1000)
+    return value
+
+
+def _copy(value):
+    if isinstance(value, dict):
+        return {key: _copy(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+    return value
+
+
+def _comparable(value):
+    if isinstance(value, datetime) and value.tzinfo:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _resolve(value, parts):
+    """
+    Returns every value found at a dotted path, traversing arrays like MongoDB does.
+    """
+    if not parts:
+        return [value]
+    if isinstance(value, dict):
+        if parts[0] not in value:
+            return []
+        return _resolve(value[parts[0]], parts[1:])
+    if isinstance(value, list):
+        if parts[0].isdigit():
+            index = int(parts[0])
+            return _resolve(value[index], parts[1:]) if index < len(value) else []
+        found = []
+        for item in value:
+            if isinstance(item, dict):
+                found.extend(_resolve(item, parts))
+        return found
+    return []
+
+
+def _expand(candidates):
+    """
+    Yields each candidate and, for arrays, each of their elements.
+    """
+    for candidate in candidates:
+        yield candidate
+        if isinstance(candidate, list):
+            yield from candidate
+
+
+def _equals(candidates, expected):
+    expected = _comparable(expected)
+    if expected is None:
+        return not candidates or any(candidate is None for candidate in _expand(candidates))
+    return any(_comparable(candidate) == expected for candidate in _expand(candidates))
+
+
+def _compare(candidates, expected, compare):
+    expected = _comparable(expected)
+    for candidate in _expand(candidates):
+        if isinstance(candidate, list) or isinstance(candidate, bool) != isinstance(expected, bool):
+            continue
+        try:
+            if compare(_comparable(candidate), expected):
+                return True
+        except TypeError:
+            continue
+    return False
+
+
+def _regex(candidates, pattern, options=""):
+    if not isinstance(pattern, re.Pattern):
+        flags = 0
+        for option in options:
+            flags |= {"i": re.IGNORECASE, "m": re.MULTILINE, "s": re.DOTALL, "x": re.VERBOSE}[option]
+        pattern = re.compile(pattern, flags)
+    return any(isinstance(candidate, str) and pattern.search(candidate) for candidate in _expand(candidates))
+
+
+def _matches_operators(candidates, operators):
+    for operator, expected in operators.items():
+        if operator == "$eq":
+            matched = _equals(candidates, expected)
+        elif operator == "$ne":
+            matched = not _equals(candidates, expected)
+        elif operator == "$in":
+            matched = any(
+                _regex(candidates, item) if isinstance(item, re.Pattern) else _equals(candidates, item)
+                for item in expected
+            )
+        elif operator == "$nin":
+            matched = not any(_equals(candidates, item) for item in expected)
+        elif operator == "$gt":
+            matched = _compare(candidates, expected, lambda a, b: a > b)
+        elif operator == "$gte":
+            matched = _compare(candidates, expected, lambda a, b: a >= b)
+        elif operator == "$lt":
+            matched = _compare(candidates, expected, lambda a, b: a < b)
+        elif operator == "$lte":
+            matched = _compare(candidates, expected, lambda a, b: a <= b)
+        elif operator == "$exists":
+            matched = bool(candidates) == bool(expected)
+        elif operator == "$regex":
+            matched = _regex(candidates, expected, operators.get("$options", ""))
+        elif operator == "$options":
+            continue
+        elif operator in ("$bitsAllClear", "$bitsAnySet"):
+            mask = expected
+            if isinstance(expected, list):
+                mask = sum(1 << position for position in expected)
+            if operator == "$bitsAllClear":
+                matched = any(isinstance(value, int) and not value & mask for value in candidates)
+            else:
+                matched = any(isinstance(value, int) and value & mask for value in candidates)
+        elif operator == "$not":
+            matched = not _matches_operators(candidates, expected)
+        else:
+            raise OperationFailure(f"Unsupported query operator {operator}")
+        if not matched:
+            return False
+    return True
+
+
+def _is_operators(value):
+    return isinstance(value, Mapping) and value and all(key.startswith("$") for key in value)
+
+
+def matches(document, query):
+    """
+    Tells whether a document matches a MongoDB query filter, for the operators the facades use.
+    """
+    for key, expected in query.items():
+        if key == "$and":
+            if not all(matches(document, clause) for clause in expected):
+                return False
+        elif key == "$or":
+            if not any(matches(document, clause) for clause in expected):
+                return False
+        elif key == "$nor":
+            if any(matches(document, clause) for clause in expected):
+                return False
+        elif key.startswith("$"):
+            raise OperationFailure(f"Unsupported query operator {key}")
+        else:
+            candidates = _resolve(document, key.split("."))
+            if isinstance(expected, re.Pattern):
+                if not _regex(candidates, expected):
+                    return False
+            elif _is_operators(expected):
+                if not _matches_operators(candidates, expected):
+                    return False
+            elif not _equals(candidates, expected):
+                return False
+    return True
+
+
+def _set_path(document, path, value):
+    parts = path.split(".")
+    target = document
+    for part in parts[:-1]:
+        if isinstance(target, list):
+            target = target[int(part)]
+        else:
+            target = target.setdefault(part, {})
+    if isinstance(target, list):
+        target[int(parts[-1])] = value
+    else:
+        target[parts[-1]] = value
+
+
+def _unset_path(document, path):
+    parts = path.split(".")
+    target = document
+    for part in parts[:-1]:
+        target = target.get(part) if isinstance(target, dict) else None
+        if target is None:
+            return
+    if isinstance(target, dict):
+        target.pop(parts[-1], None)
+
+
+def _get_path(document, path):
+    found = _resolve(document, path.split("."))
+    return found[0] if found else _MISSING
+
+
+def _apply_update(document, update, inserting):
+    """
+    Applies an update document in place.
+    """
+    if not update or not all(key.startswith("$") for key in update):
+        raise ValueError("update only works with $ operators")
+    for operator, fields in update.items():
+        for path, value in fields.items():
+            if operator == "$set" or (operator == "$setOnInsert" and inserting):
+                _set_path(document, path, _encode(value))
+            elif operator == "$setOnInsert":
+                continue
+            elif operator == "$unset":
+                _unset_path(document, path)
+            elif operator == "$inc":
+                current = _get_path(document, path)
+                _set_path(document, path, (0 if current is _MISSING else current) + value)
+            elif operator == "$bit":
+                current = _get_path(document, path)
+                current = 0 if current is _MISSING else int(current)
+                for bitwise, operand in value.items():
+                    if bitwise == "and":
+                        current &= operand
+                    elif bitwise == "or":
+                        current |= operand
+                    elif bitwise == "xor":
+                        current ^= operand
+                    else:
+                        raise OperationFailure(f"Unsupported $bit operation {bitwise}")
+                _set_path(document, path, Int64(current))
+            else:
+                raise OperationFailure(f"Unsupported update operator {operator}")
+
+
+def _upsert_document(query):
+    """
+    Builds the document an upsert inserts from the equality conditions of its filter.
+    """
+    document = {}
+    for key, value in query.items():
+        if key == "$and":
+            for clause in value:
+                document.update(_upsert_document(clause))
+        elif not key.startswith("$") and not _is_operators(value):
+            _set_path(document, key, _encode(value))
+    return document
+
+
+def _project(document, projection):
+    if not projection:
+        return _copy(document)
+    if not isinstance(projection, Mapping):
+        projection = {field: 1 for field in projection}
+    include_id = projection.get("_id", 1)
+    fields = {field: flag for field, flag in projection.items() if field != "_id"}
+    if any(fields.values()) if fields else include_id:
+        projected = {}
+        for path in fields:
+            value = _get_path(document, path)
+            if value is not _MISSING:
+                _set_path(projected, path, _copy(value))
+    else:
+        projected = _copy(document)
+        for path in fields:
+            _unset_path(projected, path)
+    if include_id and "_id" in document:
+        projected["_id"] = document["_id"]
+    else:
+        projected.pop("_id", None)
+    return projected
+
+
+_SORT_RANKS = ((type(None), 0), ((int, float), 1), (str, 2), (dict, 3), (list, 4), (bytes, 5),
+               (ObjectId, 6), (bool, 7), (datetime, 8))
+
+
+def _sort_key(value):
+    if value is _MISSING:
+        return (0, 0)
+    value = _comparable(value)
+    for types, rank in reversed(_SORT_RANKS):
+        if isinstance(value, types):
+            return (rank, value if rank not in (3, 4) else repr(value))
+    return (9, repr(value))
+
+
+def _field_value(document, expression):
+    """
+    Evaluates a ``"$field"`` path, a dict of them or a literal, as ``$group`` does.
+    """
+    if isinstance(expression, dict):
+        return {key: _field_value(document, value) for key, value in expression.items()}
+    if isinstance(expression, str) and expression.startswith("$"):
+        value = _get_path(document, expression[1:])
+        return None if value is _MISSING else value
+    return expression
+
+
+def _group(documents, stage):
+    groups = {}
+    for document in documents:
+        group_id = _field_value(document, stage["_id"])
+        key = repr(_comparable(group_id))
+        if key not in groups:
+            groups[key] = {"_id": group_id}
+        group = groups[key]
+        for name, accumulator in stage.items():
+            if name == "_id":
+                continue
+            (operator, expression), = accumulator.items()
+            value = _field_value(document, expression)
+            if operator == "$sum":
+                group[name] = group.get(name, 0) + (value if isinstance(value, (int, float)) else 0)
+            elif operator == "$push":
+                group.setdefault(name, []).append(value)
+            else:
+                raise OperationFailure(f"Unsupported accumulator {operator}")
+    return list(groups.values())
+
+
+class MemoryCursor:
+    """
+    The subset of a PyMongo cursor the facades use. The query runs when the cursor is first
+    iterated, over a snapshot of the matching documents.
+    """
+
+    def __init__(self, collection, query, projection=None, skip=0, limit=0, sort=None):
+        self.collection = collection
+        self.query = query
+        self.projection = projection
+        self._skip = skip
+        self._limit = limit
+        self._sort = []
+        self._results = None
+        if sort:
+            self.sort(sort)
+
+    def sort(self, key_or_list, direction=1):
+        if isinstance(key_or_list, str):
+            key_or_list = [(key_or_list, direction)]
+        self._sort.extend(key_or_list)
+        return self
+
+    def skip(self, skip):
+        self._skip = skip
+        return self
+
+    def limit(self, limit):
+        self._limit = limit
+        return self
+
+    def batch_size(self, batch_size):
+        return self
+
+    def close(self):
+        self._results = iter(())
+
+    def _run(self):
+        documents = self.collection._matching(self.query)
+        for path, direction in reversed(self._sort):
+            documents.sort(key=lambda document: _sort_key(_get_path(document, path)), reverse=direction < 0)
+        documents = documents[self._skip:]
+        if self._limit:
+            documents = documents[:self._limit]
+        return iter([_project(document, self.projection) for document in documents])
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._results is None:
+            self._results = self._run()
+        return next(self._results)
+
+
+class MemoryCollection:
+    """
+    In-memory stand-in for a PyMongo collection, supporting the queries and updates the facades
+    issue. Writes return PyMongo's result types and raise its errors, unique indexes are
+    enforced, and each operation is atomic.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._documents = {}
+        self._unique_indexes = {}
+        self._lock = threading.RLock()
+
+    def _matching(self, query):
+        with self._lock:
+            query = query or {}
+            if not isinstance(query, Mapping):
+                query = {"_id": query}
+            document_id = query.get("_id", _MISSING)
+            if document_id is not _MISSING and not _is_operators(document_id):
+                candidates = [self._documents[document_id]] if document_id in self._documents else []
+            elif _is_operators(document_id) and list(document_id) == ["$in"]:
+                candidates = [self._documents[item] for item in document_id["$in"] if item in self._documents]
+            else:
+                candidates = list(self._documents.values())
+            return [document for document in candidates if matches(document, query)]
+
+    def _index_key(self, fields, document):
+        key = []
+        for field in fields:
+            # A missing field is indexed as null, as MongoDB does.
+            value = _get_path(document, field)
+            key.append(repr(None if value is _MISSING else _comparable(value)))
+        return tuple(key)
+
+    def _index_entries(self, document):
+        for name, (fields, partial_filter, entries) in self._unique_indexes.items():
+            if partial_filter is None or matches(document, partial_filter):
+                yield name, entries, self._index_key(fields, document)
+
+    def _check_unique(self, document, replacing=None):
+        if document["_id"] in self._documents and document["_id"] != replacing:
+            raise DuplicateKeyError(
+                f"E11000 duplicate key error collection: {self.name} index: _id_", 11000
+            )
+        for name, entries, key in self._index_entries(document):
+            owner = entries.get(key, _MISSING)
+            if owner is not _MISSING and owner != document["_id"]:
+                raise DuplicateKeyError(
+                    f"E11000 duplicate key error collection: {self.name} index: {name}", 11000
+                )
+
+    def _store(self, document, previous=None):
+        if previous is not None:
+            for _, entries, key in self._index_entries(previous):
+                entries.pop(key, None)
+        self._documents[document["_id"]] = document
+        for _, entries, key in self._index_entries(document):
+            entries[key] = document["_id"]
+
+    def _remove(self, document):
+        for _, entries, key in self._index_entries(document):
+            entries.pop(key, None)
+        del self._documents[document["_id"]]
+
+    def _insert(self, document):
+        if "_id" not in document:
+            document["_id"] = ObjectId()
+        stored = _encode(document)
+        self._check_unique(stored)
+        self._store(stored)
+        return stored["_id"]
+
+    def _update(self, query, update, upsert, many):
+        """
+        :return: A ``(matched, modified, upserted_id, before, after)`` tuple, the documents
+            being those of the last updated document.
+        """
+        with self._lock:
+            documents = self._matching(query)
+            if not many:
+                documents = documents[:1]
+            if not documents:
+                if not upsert:
+                    return 0, 0, None, None, None
+                document = _upsert_document(query)
+                _apply_update(document, update, inserting=True)
+                upserted_id = self._insert(document)
+                return 0, 0, upserted_id, None, self._documents[upserted_id]
+            modified = 0
+            before = after = None
+            for before in documents:
+                after = _copy(before)
+                _apply_update(after, update, inserting=False)
+                if after != before:
+                    self._check_unique(after, replacing=before["_id"])
+                    self._store(after, before)
+                    modified += 1
+            return len(documents), modified, None, before, after
+
+    def find(self, filter=None, projection=None, skip=0, limit=0, sort=None, **kwargs):
+        return MemoryCursor(self, filter, projection, skip, limit, sort)
+
+    def find_one(self, filter=None, projection=None, *args, **kwargs):
+        return next(iter(self.find(filter, projection, *args, **kwargs).limit(1)), None)
+
+    def aggregate(self, pipeline, **kwargs):
+        """
+        Runs a pipeline of ``$match``, ``$group`` (with ``$sum`` and ``$push``) and ``$limit``
+        stages.
+        """
+        documents = [_copy(document) for document in self._matching({})]
+        for stage in pipeline:
+            (name, value), = stage.items()
+            if name == "$match":
+                documents = [document for document in documents if matches(document, value)]
+            elif name == "$group":
+                documents = _group(documents, value)
+            elif name == "$limit":
+                documents = documents[:value]
+            else:
+                raise OperationFailure(f"Unsupported aggregation stage {name}")
+        return iter(documents)
+
+    def count_documents(self, filter, **kwargs):
+        return len(self._matching(filter))
+
+    def estimated_document_count(self, **kwargs):
+        return len(self._documents)
+
+    def insert_one(self, document, **kwargs):
+        with self._lock:
+            return InsertOneResult(self._insert(document), True)
+
+    def insert_many(self, documents, ordered=True, **kwargs):
+        inserted_ids = []
+        write_errors = []
+        with self._lock:
+            for index, document in enumerate(documents):
+                try:
+                    inserted_ids.append(self._insert(document))
+                except DuplicateKeyError as e:
+                    write_errors.append({"index": index, "code": 11000, "errmsg": str(e), "op": document})
+                    if ordered:
+                        break
+        if write_errors:
+            raise BulkWriteError({
+                "writeErrors": write_errors, "writeConcernErrors": [], "nInserted": len(inserted_ids),
+                "nUpserted": 0, "nMatched": 0, "nModified": 0, "nRemoved": 0, "upserted": []
+            })
+        return InsertManyResult(inserted_ids, True)
+
+    def update_one(self, filter, update, upsert=False, **kwargs):
+        matched, modified, upserted_id, _, _ = self._update(filter, update, upsert, many=False)
+        raw_result = {"n": matched + (1 if upserted_id is not None else 0), "nModified": modified}
+        if upserted_id is not None:
+            raw_result["upserted"] = upserted_id
+        return UpdateResult(raw_result, True)
+
+    def update_many(self, filter, update, upsert=False, **kwargs):
+        matched, modified, upserted_id, _, _ = self._update(filter, update, upsert, many=True)
+        raw_result = {"n": matched + (1 if upserted_id is not None else 0), "nModified": modified}
+        if upserted_id is not None:
+            raw_result["upserted"] = upserted_id
+        return UpdateResult(raw_result, True)
+
+    def find_one_and_update(self, filter, update, projection=None, sort=None, upsert=False,
+                            return_document=ReturnDocument.BEFORE, **kwargs):
+        with self._lock:
+            if sort:
+                first = next(iter(self.find(filter, {"_id": 1}, sort=sort).limit(1)), None)
+                if first is not None:
+                    filter = {"_id": first["_id"]}
+            _, _, _, before, after = self._update(filter, update, upsert, many=False)
+            document = after if return_document == ReturnDocument.AFTER else before
+            return None if document is None else _project(document, projection)
+
+    def delete_one(self, filter, **kwargs):
+        with self._lock:
+            documents = self._matching(filter)[:1]
+            for document in documents:
+                self._remove(document)
+            return DeleteResult({"n": len(documents)}, True)
+
+    def delete_many(self, filter, **kwargs):
+        with self._lock:
+            documents = self._matching(filter)
+            for document in documents:
+                self._remove(document)
+            return DeleteResult({"n": len(documents)}, True)
+
+    def find_one_and_delete(self, filter, projection=None, sort=None, **kwargs):
+        with self._lock:
+            document = next(iter(self.find(filter, sort=sort).limit(1)), None)
+            if document is None:
+                return None
+            self._remove(self._documents[document["_id"]])
+            return _project(document, projection)
+
+    def bulk_write(self, requests, ordered=True, **kwargs):
+        result = {
+            "writeErrors": [], "writeConcernErrors": [], "nInserted": 0, "nUpserted": 0,
+            "nMatched": 0, "nModified": 0, "nRemoved": 0, "upserted": []
+        }
+        with self._lock:
+            for index, request in enumerate(requests):
+                try:
+                    if isinstance(request, InsertOne):
+                        self._insert(request._doc)
+                        result["nInserted"] += 1
+                    elif isinstance(request, (UpdateOne, UpdateMany)):
+                        matched, modified, upserted_id, _, _ = self._update(
+                            request._filter, request._doc, request._upsert, many=isinstance(request, UpdateMany)
+                        )
+                        result["nMatched"] += matched
+                        result["nModified"] += modified
+                        if upserted_id is not None:
+                            result["nUpserted"] += 1
+                            result["upserted"].append({"index": index, "_id": upserted_id})
+                    elif isinstance(request, (DeleteOne, DeleteMany)):
+                        delete = self.delete_many if isinstance(request, DeleteMany) else self.delete_one
+                        result["nRemoved"] += delete(request._filter).deleted_count
+                    else:
+                        raise TypeError(f"Unsupported bulk write request {request!r}")
+                except DuplicateKeyError as e:
+                    result["writeErrors"].append({"index": index, "code": 11000, "errmsg": str(e)})
+                    if ordered:
+                        break
+        if result["writeErrors"]:
+            raise BulkWriteError(result)
+        return BulkWriteResult(result, True)
+
+    def create_index(self, keys, unique=False, name=None, partialFilterExpression=None, **kwargs):
+        if isinstance(keys, str):
+            keys = [(keys, 1)]
+        fields = [field for field, _ in keys]
+        name = name or "_".join(f"{field}_{direction}" for field, direction in keys)
+        if unique:
+            with self._lock:
+                if name not in self._unique_indexes:
+                    index = (fields, partialFilterExpression, {})
+                    for document in self._documents.values():
+                        if partialFilterExpression is None or matches(document, partialFilterExpression):
+                            key = self._index_key(fields, document)
+                            if key in index[2]:
+                                raise DuplicateKeyError(
+                                    f"E11000 duplicate key error collection: {self.name} index: {name}", 11000
+                                )
+                            index[2][key] = document["_id"]
+                    self._unique_indexes[name] = index
+        return name
+
+    def create_indexes(self, indexes, **kwargs):
+        names = []
+        for index in indexes:
+            document = dict(index.document)
+            keys = list(document.pop("key").items())
+            names.append(self.create_index(keys, **document))
+        return names
+
+    def drop(self):
+        with self._lock:
+            self._documents.clear()
+            self._unique_indexes.clear()
+
+
+class MemoryDatabase:
+    """
+    A database of MemoryCollection objects, created on first access like MongoDB collections.
+    """
+
+    def __init__(self, name="memory"):
+        self.name = name
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name):
+        collection = self._collections.get(name)
+        if collection is None:
+            with self._lock:
+                collection = self._collections.setdefault(name, MemoryCollection(name))
+        return collection
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def list_collection_names(self):
+        return list(self._collections)
+
+    def drop_collection(self, name):
+        with self._lock:
+            self._collections.pop(name, None)
+
+
+class MemoryStorage:
+    """
+    Storage backend holding every collection in process memory. Data lives as long as the
+    process and is not shared between workers, so it suits tests and benchmarks only.
+    """
+
+    def __init__(self, app=None):
+        self.db = MemoryDatabase()
@@ -0,0 +1,12 @@
+# storage/mongo.py
+from flask_pymongo import PyMongo
+
+
+class MongoStorage:
+    """
+    Storage backend over MongoDB through Flask-PyMongo, configured by ``MONGO_URI``.
+    """
+
+    def __init__(self, app):
+        self.mongo = PyMongo(app)
+        self.db = self.mongo.db
@@ -1,10 +1,11 @@
-import hashlib
 import os
 from pymongo import MongoClient
 from dotenv import load_dotenv
 
 load_dotenv()
 
+from utils.passwords import default_hasher
+
 MONGO_URI = os.getenv("MONGO_URI")
 SUPERADMIN_USERNAME = os.getenv("SUPERADMIN_USERNAME", "superadmin")
 SUPERADMIN_PASSWORD = os.getenv("SUPERADMIN_PASSWORD", "superadmin")
@@ -22,7 +23,7 @@ def create_superadmin():
         print("SuperAdmin user already exists.")
         return
 
-    encrypted_password = hashlib.md5(SUPERADMIN_PASSWORD.encode()).hexdigest()
+    encrypted_password = default_hasher.hash(SUPERADMIN_PASSWORD)
     superadmin_user = {
         "firstName": SUPERADMIN_FIRSTNAME,
         "lastName": SUPERADMIN_LASTNAME,
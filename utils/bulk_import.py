@@ -0,0 +1,90 @@
+# utils/bulk_import.py
+import json
+import time
+
+from bson.objectid import ObjectId
+from pymongo.errors import BulkWriteError
+
+# Rows sent per insert_many call.
+IMPORT_CHUNK_SIZE = 1000
+
+
+def load_rows(text):
+    """
+    Parses import data given as a JSON array, a single JSON object (the shape of the files in
+    ``tests/example``) or newline-delimited JSON objects.
+    """
+    text = text.strip()
+    if not text:
+        return []
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    return data if isinstance(data, list) else [data]
+
+
+def require_fields(row, fields):
+    missing = [field for field in fields if row.get(field) is None]
+    if missing:
+        raise ValueError(f"Missing fields: {', '.join(missing)}")
+
+
+def keep_id(row, doc):
+    """
+    Keeps a valid ``_id`` from the imported row so that documents referencing it stay linked.
+    """
+    if row.get("_id"):
+        if not ObjectId.is_valid(row["_id"]):
+            raise ValueError(f"Invalid _id: {row['_id']}")
+        doc["_id"] = ObjectId(row["_id"])
+    else:
+        doc.pop("_id", None)
+    return doc
+
+
+def bulk_insert(collection, rows, build, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Validates rows and inserts them in unordered chunks, collecting per-row errors.
+
+    :param collection: The collection to insert into.
+    :param rows: An iterable of raw rows.
+    :param build: A callable turning a row into a document, raising ValueError for invalid rows.
+    :param chunk_size: The number of documents per insert_many call.
+    :return: A report with the inserted count, the per-row errors and the throughput.
+    """
+    started = time.perf_counter()
+    report = {"inserted": 0, "errors": []}
+    chunk, chunk_rows = [], []
+    total = 0
+
+    def flush():
+        try:
+            result = collection.insert_many(chunk, ordered=False)
+            report["inserted"] += len(result.inserted_ids)
+        except BulkWriteError as e:
+            report["inserted"] += e.details.get("nInserted", 0)
+            for error in e.details.get("writeErrors", []):
+                report["errors"].append({"row": chunk_rows[error["index"]], "error": error.get("errmsg")})
+        chunk.clear()
+        chunk_rows.clear()
+
+    for index, row in enumerate(rows):
+        total += 1
+        try:
+            if not isinstance(row, dict):
+                raise ValueError("Row must be a JSON object")
+            chunk.append(build(row))
+            chunk_rows.append(index)
+        except (ValueError, TypeError) as e:
+            report["errors"].append({"row": index, "error": str(e)})
+        if len(chunk) >= chunk_size:
+            flush()
+    if chunk:
+        flush()
+
+    elapsed = time.perf_counter() - started
+    report["rows"] = total
+    report["elapsedSeconds"] = round(elapsed, 3)
+    report["rowsPerSecond"] = round(total / elapsed) if elapsed else None
+    return report
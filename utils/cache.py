@@ -0,0 +1,158 @@
+# utils/cache.py
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from bson import json_util
+
+
+class InProcessCacheBackend:
+    """
+    LRU cache with per-entry expiry, local to the process. Entries are tagged so that a
+    write can invalidate every entry it may have made stale.
+    """
+
+    def __init__(self, max_entries=5000, ttl=30):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at, tags = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, tags=()):
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (value, time.monotonic() + self.ttl, tuple(tags))
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_tags(self, tags):
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def size(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class RedisCacheBackend:
+    """
+    Cache shared by all workers through Redis. Each tag is a Redis set of the keys carrying it.
+    Requires the optional ``redis`` package.
+    """
+
+    def __init__(self, url, ttl=30, prefix="cache:"):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("The redis package is required for a Redis cache backend")
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return json_util.loads(value) if value is not None else None
+
+    def set(self, key, value, tags=()):
+        pipeline = self.client.pipeline()
+        pipeline.set(self.prefix + key, json_util.dumps(value), ex=self.ttl)
+        for tag in tags:
+            pipeline.sadd(self.prefix + "tag:" + tag, self.prefix + key)
+            pipeline.expire(self.prefix + "tag:" + tag, self.ttl)
+        pipeline.execute()
+
+    def invalidate_tags(self, tags):
+        for tag in tags:
+            tag_key = self.prefix + "tag:" + tag
+            keys = self.client.smembers(tag_key)
+            self.client.delete(tag_key, *keys)
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+    def size(self):
+        return None
+
+
+class Cache:
+    """
+    Front for a cache backend that counts hits and misses in this process.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def from_env(name, max_entries=5000, ttl=30):
+        """
+        Builds a cache from ``<NAME>_CACHE_URL`` (a Redis URL, optional), ``<NAME>_CACHE_SIZE``
+        and ``<NAME>_CACHE_TTL``.
+        """
+        ttl = int(os.getenv(f"{name}_CACHE_TTL", ttl))
+        url = os.getenv(f"{name}_CACHE_URL")
+        if url:
+            return Cache(RedisCacheBackend(url, ttl=ttl, prefix=f"{name.lower()}:"))
+        return Cache(InProcessCacheBackend(int(os.getenv(f"{name}_CACHE_SIZE", max_entries)), ttl))
+
+    def get(self, key):
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value, tags=()):
+        self.backend.set(key, value, tags)
+
+    def invalidate_tags(self, tags):
+        self.backend.invalidate_tags(tags)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": round(self.hits / lookups, 4) if lookups else None,
+            "size": self.backend.size()
+        }
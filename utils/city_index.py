@@ -0,0 +1,75 @@
+# utils/city_index.py
+import os
+import threading
+import time
+from bisect import bisect_left, insort
+
+from utils.stop_index import normalize_city
+
+
+class CityIndex:
+    """
+    Process-local prefix index of city names for autocomplete.
+
+    Every city is indexed under its whole normalized name and under each later word of it, in
+    one sorted list searched with bisect, so "del" finds both "Delhi" and "New Delhi". The
+    list is replaced rather than modified in place, which lets searches run without the lock.
+    The index is reloaded from the database after ``ttl`` seconds to pick up cities added by
+    other workers.
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._entries = []
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _keys(city):
+        # (key, is_word_match, name length, name, id) sorts matches of the whole name first,
+        # then shorter names.
+        name = city["name"]
+        words = normalize_city(name).split(" ")
+        return [
+            (" ".join(words[i:]), i > 0, len(name), name, str(city["_id"]))
+            for i in range(len(words))
+        ]
+
+    def is_stale(self):
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+
+    def load(self, cities):
+        entries = sorted(key for city in cities if city.get("name") for key in self._keys(city))
+        with self._lock:
+            self._entries = entries
+            self._loaded_at = time.monotonic()
+
+    def add(self, city):
+        with self._lock:
+            entries = list(self._entries)
+            for key in self._keys(city):
+                insort(entries, key)
+            self._entries = entries
+
+    def search(self, query, limit=10):
+        """
+        Returns up to ``limit`` cities whose name, or a word of it, starts with ``query``.
+
+        Whole-name matches rank before word matches and shorter names before longer ones.
+        """
+        prefix = normalize_city(query)
+        entries = self._entries
+        start = bisect_left(entries, (prefix,))
+        matches = {}
+        for index in range(start, len(entries)):
+            key, is_word_match, length, name, city_id = entries[index]
+            if not key.startswith(prefix):
+                break
+            rank = (is_word_match, length, name)
+            if city_id not in matches or rank < matches[city_id][0]:
+                matches[city_id] = (rank, name)
+        ranked = sorted((rank, city_id, name) for city_id, (rank, name) in matches.items())
+        return [{"_id": city_id, "name": name} for _, city_id, name in ranked[:limit]]
+
+
+city_index = CityIndex(ttl=int(os.getenv("CITY_INDEX_TTL", 300)))
@@ -0,0 +1,19 @@
+# utils/dates.py
+from datetime import date
+
+
+def parse_trip_date(value):
+    """
+    Parses the date part of an ISO 8601 date or datetime string.
+    """
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        raise ValueError(f"Invalid date: {value}")
+
+
+def normalize_trip_date(value):
+    """
+    Returns a date in the ``YYYY-MM-DD`` form trips are stored, searched and exported by.
+    """
+    return parse_trip_date(value).isoformat()
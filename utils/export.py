@@ -0,0 +1,69 @@
+# utils/export.py
+import csv
+import io
+import json
+from datetime import date, datetime
+
+from flask import Response, current_app, stream_with_context
+
+# Documents fetched per round trip by export cursors.
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FORMATS = ("ndjson", "csv")
+
+
+def parse_export_date(value):
+    """
+    Parses an ISO 8601 date or datetime filter value, or returns None when it is not set.
+    """
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"Invalid date: {value}")
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, default=str)
+    return value
+
+
+def _ndjson_lines(rows):
+    for row in rows:
+        yield current_app.json.dumps(row) + "\n"
+
+
+def _csv_lines(rows, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([_csv_value(row.get(column)) for column in columns])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+
+def export_response(rows, columns, export_format, filename):
+    """
+    Streams rows to the client as NDJSON or CSV without buffering the whole result.
+
+    :param rows: An iterable of serialized documents, usually backed by a database cursor.
+    :param columns: The CSV columns, in order.
+    :param export_format: Either "ndjson" or "csv".
+    :param filename: The download file name without extension.
+    """
+    if export_format == "csv":
+        body, mimetype = _csv_lines(rows, columns), "text/csv"
+    else:
+        body, mimetype = _ndjson_lines(rows), "application/x-ndjson"
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={filename}.{export_format}"}
+    )
@@ -0,0 +1,104 @@
+# utils/fares.py
+from utils.stop_index import normalize_city, stop_name, stop_times
+
+try:
+    import numpy as np
+except ImportError:  # numpy is in requirements.txt; the pure Python path covers installs without it.
+    np = None
+
+
+def stop_offsets(stops):
+    """
+    Returns the position of each stop along the trip, measured from the first stop.
+
+    A stop's own ``distance`` (km from the first stop) is used when every stop has one.
+    Otherwise stops are placed by their ``time`` (``"HH:MM"``, wrapping past midnight) as a
+    share of the whole trip, or spread evenly when times are missing. Fares only depend on
+    these positions relative to the last stop, so the route's total distance is not needed.
+    """
+    stops = stops or []
+    if not stops:
+        return []
+    distances = [stop.get("distance") if isinstance(stop, dict) else None for stop in stops]
+    if all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in distances):
+        return [float(value) for value in distances]
+
+    elapsed = stop_times(stops)
+    if elapsed and elapsed[-1] > elapsed[0]:
+        return [(minutes - elapsed[0]) / (elapsed[-1] - elapsed[0]) for minutes in elapsed]
+    last = max(len(stops) - 1, 1)
+    return [i / last for i in range(len(stops))]
+
+
+def fare_matrix(fare, offsets):
+    """
+    Precomputes the fare of every boarding/alighting stop pair of a trip.
+
+    ``matrix[i][j]`` is the full trip ``fare`` scaled by the share of the route between stops
+    ``i`` and ``j``, rounded to two decimals; pairs that do not travel forward cost 0. The
+    whole matrix is built in one vectorized pass when numpy is installed.
+    """
+    count = len(offsets)
+    if not count:
+        return []
+    total = offsets[-1] - offsets[0]
+    rate = float(fare or 0) / total if total > 0 else 0.0
+    if np is not None:
+        positions = np.asarray(offsets, dtype=float)
+        spans = np.clip(np.subtract.outer(positions, positions).T, 0, None)
+        return np.round(spans * rate, 2).tolist()
+    return [
+        [round(max(offsets[j] - offsets[i], 0.0) * rate, 2) for j in range(count)]
+        for i in range(count)
+    ]
+
+
+def trip_fare_matrix(fare, stops):
+    return fare_matrix(fare, stop_offsets(stops))
+
+
+def stop_indices(stops, from_city=None, to_city=None):
+    """
+    Returns the boarding and alighting stop indices of a journey on a trip, or None when the
+    trip does not serve it. A missing city means the first or last stop.
+    """
+    names = [normalize_city(stop_name(stop) or "") for stop in stops or []]
+    if not names:
+        return None
+    start = 0
+    if from_city:
+        origin = normalize_city(from_city)
+        if origin not in names:
+            return None
+        start = names.index(origin)
+    end = len(names) - 1
+    if to_city:
+        destination = normalize_city(to_city)
+        later = [i for i in range(start + 1, len(names)) if names[i] == destination]
+        if not later:
+            return None
+        end = later[0]
+    if end <= start:
+        return None
+    return start, end
+
+
+def quote_fares(trip_docs, from_city=None, to_city=None):
+    """
+    Quotes the fare of a journey on each of the given trip documents.
+
+    Trips written before fare matrices were stored have theirs computed on the fly.
+
+    :return: The fares in the order of ``trip_docs``, None where a trip does not serve the
+        journey.
+    """
+    quotes = []
+    for trip_doc in trip_docs:
+        stops = trip_doc.get("stops")
+        indices = stop_indices(stops, from_city, to_city)
+        if indices is None:
+            quotes.append(None)
+            continue
+        matrix = trip_doc.get("fareMatrix") or trip_fare_matrix(trip_doc.get("fare"), stops)
+        quotes.append(matrix[indices[0]][indices[1]])
+    return quotes
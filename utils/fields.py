@@ -0,0 +1,27 @@
+# utils/fields.py
+
+
+def parse_fields(value):
+    """
+    Parses a comma-separated ``fields`` query parameter into a list of field names.
+    """
+    if not value:
+        return None
+    fields = [field.strip() for field in value.split(",") if field.strip()]
+    return fields or None
+
+
+def build_projection(fields, allowed):
+    """
+    Builds a MongoDB projection for the requested fields, or None to read whole documents.
+
+    :param fields: The requested field names, or None.
+    :param allowed: The field names a client may request.
+    :raises ValueError: If a requested field is not allowed.
+    """
+    if not fields:
+        return None
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return {field: 1 for field in fields}
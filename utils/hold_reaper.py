@@ -0,0 +1,26 @@
+# utils/hold_reaper.py
+import logging
+import threading
+
+from facade.booking_facade import BookingFacade
+
+
+def start_hold_reaper(app, interval, batch_size=500):
+    """
+    Starts a daemon thread that releases expired seat holds every ``interval`` seconds.
+    """
+    stop_event = threading.Event()
+
+    def run():
+        while not stop_event.wait(interval):
+            try:
+                with app.app_context():
+                    released = BookingFacade.release_expired_holds(batch_size)
+                if released:
+                    logging.info("Released %d expired seat holds", released)
+            except Exception as e:
+                logging.error("Hold reaper run failed: %s", e)
+
+    thread = threading.Thread(target=run, name="hold-reaper", daemon=True)
+    thread.start()
+    return stop_event
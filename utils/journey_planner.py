@@ -0,0 +1,161 @@
+# utils/journey_planner.py
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import date, timedelta
+
+from utils.stop_index import normalize_city, stop_name, stop_times
+
+
+def build_connections(trip_docs, start_of_day=0):
+    """
+    Builds the timetable of a service date from trip documents.
+
+    Every pair of consecutive stops of a trip is one connection
+    ``(departure, arrival, fromCity, toCity, tripId, fromStop, toStop)``, with times in minutes
+    after midnight of the service date and cities normalized. ``start_of_day`` is added to the
+    trips' own times, so that trips of the following date can join with 1440. Trips whose
+    stops lack times are skipped. The connections are sorted by departure, as the connection
+    scan expects.
+
+    :return: The sorted connections and a dict mapping normalized city names to display names.
+    """
+    connections = []
+    names = {}
+    for trip_doc in trip_docs:
+        stops = trip_doc.get("stops") or []
+        times = stop_times(stops)
+        if not times:
+            continue
+        times = [minutes + start_of_day for minutes in times]
+        cities = [stop_name(stop) for stop in stops]
+        keys = [normalize_city(city) if city else None for city in cities]
+        trip_id = str(trip_doc["_id"])
+        for i in range(len(stops) - 1):
+            if keys[i] is None or keys[i + 1] is None or keys[i] == keys[i + 1]:
+                continue
+            names.setdefault(keys[i], cities[i])
+            names.setdefault(keys[i + 1], cities[i + 1])
+            connections.append((times[i], times[i + 1], keys[i], keys[i + 1], trip_id, i, i + 1))
+    connections.sort()
+    return connections, names
+
+
+class Timetable:
+    """
+    The connections of one service date, answering earliest-arrival queries with a
+    connection scan.
+    """
+
+    def __init__(self, connections, names):
+        self.connections = connections
+        self.names = names
+        self._departures = [connection[0] for connection in connections]
+
+    def earliest_arrival(self, origin, destination, depart_after=0, min_transfer=0):
+        """
+        Finds the journey reaching ``destination`` soonest when leaving ``origin`` no earlier
+        than ``depart_after`` minutes after midnight.
+
+        Connections are scanned once in departure order from the first one leaving at or after
+        ``depart_after``; a connection is usable if its trip was already boarded or its
+        departure stop was reached at least ``min_transfer`` minutes earlier. The scan stops as
+        soon as departures are later than the best arrival found.
+
+        :return: The journey's legs as ``(tripId, fromCity, toCity, fromStop, toStop,
+            departure, arrival)`` tuples, or None when the destination cannot be reached.
+        """
+        origin = normalize_city(origin)
+        destination = normalize_city(destination)
+        if origin == destination or origin not in self.names or destination not in self.names:
+            return None
+
+        reached = {origin: depart_after - min_transfer}
+        boarded = {}
+        arrived_by = {}
+        infinity = float("inf")
+        connections = self.connections
+        for index in range(bisect_left(self._departures, depart_after), len(connections)):
+            connection = connections[index]
+            departure, arrival, from_city, to_city, trip_id = connection[:5]
+            if departure >= reached.get(destination, infinity):
+                break
+            if trip_id not in boarded:
+                if reached.get(from_city, infinity) + min_transfer > departure:
+                    continue
+                boarded[trip_id] = connection
+            if arrival < reached.get(to_city, infinity):
+                reached[to_city] = arrival
+                arrived_by[to_city] = (boarded[trip_id], connection)
+
+        if destination not in arrived_by:
+            return None
+        legs = []
+        city = destination
+        while city != origin:
+            first, last = arrived_by[city]
+            legs.append((first[4], first[2], last[3], first[5], last[6], first[0], last[1]))
+            city = first[2]
+            if len(legs) > len(self.names):
+                return None
+        legs.reverse()
+        return legs
+
+
+class JourneyPlannerCache:
+    """
+    Process-local LRU cache of per-date timetables.
+
+    A timetable is built once per date and dropped when a trip of that date changes in this
+    worker; entries also expire after ``ttl`` seconds so that trips written by other workers
+    are picked up.
+    """
+
+    def __init__(self, max_dates=60, ttl=300):
+        self.max_dates = max_dates
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, day):
+        with self._lock:
+            entry = self._entries.get(day)
+            if entry is None:
+                return None
+            timetable, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[day]
+                return None
+            self._entries.move_to_end(day)
+            return timetable
+
+    def put(self, day, timetable):
+        with self._lock:
+            self._entries[day] = (timetable, time.monotonic() + self.ttl)
+            self._entries.move_to_end(day)
+            while len(self._entries) > self.max_dates:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, day=None):
+        """
+        Drops the timetables holding the trips of a date (an ISO date or datetime string),
+        which are that date's and the previous date's, or the timetables of every date.
+        """
+        with self._lock:
+            if day is None:
+                self._entries.clear()
+                return
+            try:
+                service_date = date.fromisoformat(str(day)[:10])
+            except ValueError:
+                return
+            self._entries.pop(service_date.isoformat(), None)
+            self._entries.pop((service_date - timedelta(days=1)).isoformat(), None)
+
+
+journey_planner_cache = JourneyPlannerCache(
+    max_dates=int(os.getenv("JOURNEY_PLANNER_CACHE_DATES", 60)),
+    ttl=int(os.getenv("JOURNEY_PLANNER_CACHE_TTL", 300))
+)
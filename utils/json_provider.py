@@ -0,0 +1,82 @@
+# utils/json_provider.py
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from bson import json_util
+from bson.decimal128 import Decimal128
+from bson.objectid import ObjectId
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the standard library encoder gives the same output.
+    orjson = None
+
+
+def _default(value):
+    """
+    Encodes the values the JSON encoders do not handle natively. Datetimes read from MongoDB are
+    naive UTC and are written as ISO 8601 with an explicit offset.
+    """
+    if isinstance(value, datetime):
+        return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal128):
+        value = value.to_decimal()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(JSONProvider):
+    """
+    App-wide JSON provider writing compact JSON with orjson when it is installed, and the
+    standard library encoder otherwise.
+
+    ``datetime``, ``ObjectId`` and ``Decimal`` values are serialized natively as ISO 8601
+    strings, hex strings and numbers. Key sorting and indentation are off unless
+    ``JSON_SORT_KEYS`` or ``JSON_PRETTY`` are set. Request bodies are still parsed with
+    ``bson.json_util``, as with the Flask-PyMongo provider this replaces.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.sort_keys = bool(app.config.get("JSON_SORT_KEYS", False))
+        self.pretty = bool(app.config.get("JSON_PRETTY", False))
+        self._orjson_options = 0
+        if orjson is not None:
+            self._orjson_options = orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+            if self.sort_keys:
+                self._orjson_options |= orjson.OPT_SORT_KEYS
+            if self.pretty:
+                self._orjson_options |= orjson.OPT_INDENT_2
+
+    def dumps_bytes(self, obj):
+        if orjson is not None:
+            return orjson.dumps(obj, default=_default, option=self._orjson_options)
+        return self.dumps(obj).encode()
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.dumps(obj, default=_default, option=self._orjson_options).decode()
+        kwargs.setdefault("default", _default)
+        kwargs.setdefault("ensure_ascii", False)
+        kwargs.setdefault("sort_keys", self.sort_keys)
+        if self.pretty:
+            kwargs.setdefault("indent", 2)
+        else:
+            kwargs.setdefault("separators", (",", ":"))
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        return json_util.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj), mimetype="application/json")
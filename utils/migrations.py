@@ -0,0 +1,290 @@
+# utils/migrations.py
+import logging
+from datetime import datetime, timezone
+
+from bson.int64 import Int64
+from bson.objectid import ObjectId
+from pymongo import ASCENDING, IndexModel, UpdateOne
+
+from models.booking import ACTIVE_STATUSES
+from utils.dates import normalize_trip_date
+from utils.fares import trip_fare_matrix
+from utils.segments import segment_mask
+from utils.stop_index import stop_keys
+
+MIGRATIONS_COLLECTION = "migrations"
+BACKFILL_BATCH_SIZE = 1000
+# How many duplicated keys of each unique index a failed migration reports.
+DUPLICATE_REPORT_LIMIT = 20
+
+INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+    ],
+    "bookings": [
+        IndexModel([("tripId", ASCENDING), ("status", ASCENDING)], name="tripId_status"),
+        IndexModel(
+            [("status", ASCENDING), ("expiresAt", ASCENDING)], name="held_expiresAt",
+            partialFilterExpression={"status": "held"}
+        ),
+    ],
+    "bus_trips": [
+        IndexModel([("date", ASCENDING), ("stopKeys", ASCENDING)], name="date_stopKeys"),
+        IndexModel([("stopKeys", ASCENDING)], name="stopKeys"),
+        IndexModel(
+            [("scheduleId", ASCENDING), ("date", ASCENDING)], name="scheduleId_date_unique", unique=True,
+            partialFilterExpression={"scheduleId": {"$exists": True}}
+        ),
+    ],
+    "trip_schedules": [
+        IndexModel([("startDate", ASCENDING)], name="startDate"),
+    ],
+    "revoked_tokens": [
+        IndexModel([("expiresAt", ASCENDING)], name="expiresAt_ttl", expireAfterSeconds=0),
+        IndexModel([("revokedAt", ASCENDING)], name="revokedAt"),
+    ],
+}
+
+USED_REFRESH_TOKEN_INDEXES = [
+    IndexModel([("expiresAt", ASCENDING)], name="expiresAt_ttl", expireAfterSeconds=0),
+]
+
+
+class MigrationError(Exception):
+    pass
+
+
+def duplicate_keys(db, collection, index, limit=DUPLICATE_REPORT_LIMIT):
+    """
+    Finds the keys of a unique index that more than one document holds, which would stop
+    MongoDB from building it.
+
+    :return: Up to ``limit`` dicts of the duplicated key (``_id``, by field) and how many
+        documents hold it (``count``).
+    """
+    document = index.document
+    pipeline = []
+    if "partialFilterExpression" in document:
+        pipeline.append({"$match": document["partialFilterExpression"]})
+    pipeline += [
+        {"$group": {"_id": {field: f"${field}" for field in document["key"]}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+        {"$limit": limit},
+    ]
+    return list(db[collection].aggregate(pipeline))
+
+
+def create_indexes(db):
+    """
+    Creates the indexes of the hot queries. Creating an index that already exists with the same
+    options is a no-op, so this is safe to run repeatedly.
+
+    :raises MigrationError: Before creating any index, if documents share the key of a unique
+        index; the report lists the duplicated values to resolve by hand.
+    """
+    conflicts = []
+    for collection, indexes in INDEXES.items():
+        for index in indexes:
+            if not index.document.get("unique"):
+                continue
+            for duplicate in duplicate_keys(db, collection, index):
+                key = ", ".join(f"{field}={value!r}" for field, value in duplicate["_id"].items())
+                conflicts.append(f"{collection}.{index.document['name']}: {key} ({duplicate['count']} documents)")
+    if conflicts:
+        raise MigrationError(
+            "Cannot create unique indexes while documents share their keys; resolve these and "
+            "migrate again:\n  " + "\n  ".join(conflicts)
+        )
+    for collection, indexes in INDEXES.items():
+        db[collection].create_indexes(indexes)
+
+
+def backfill_trip_keys(db):
+    """
+    Computes ``stopKeys`` and ``fareMatrix`` for trips created before they were stored.
+    """
+    trips_cursor = db.bus_trips.find(
+        {"$or": [{"stopKeys": {"$exists": False}}, {"fareMatrix": {"$exists": False}}]},
+        {"fare": 1, "stops": 1}
+    ).batch_size(BACKFILL_BATCH_SIZE)
+    operations = []
+    for trip in trips_cursor:
+        stops = trip.get("stops") or []
+        operations.append(UpdateOne({"_id": trip["_id"]}, {"$set": {
+            "stopKeys": stop_keys(stops),
+            "fareMatrix": trip_fare_matrix(trip.get("fare"), stops)
+        }}))
+        if len(operations) == BACKFILL_BATCH_SIZE:
+            db.bus_trips.bulk_write(operations, ordered=False)
+            operations = []
+    if operations:
+        db.bus_trips.bulk_write(operations, ordered=False)
+
+
+def seed_trip_seats(db):
+    """
+    Claims the seats of active bookings made before seats were claimed through ``trip_seats``.
+    Each seat's segments are OR-ed into its word, so running this again, or while bookings are
+    being made, never drops a claim.
+    """
+    seats_by_trip = {}
+    bookings_cursor = db.bookings.find(
+        {"status": {"$in": list(ACTIVE_STATUSES)}}, {"tripId": 1, "seatNumber": 1, "fromStop": 1, "toStop": 1}
+    ).batch_size(BACKFILL_BATCH_SIZE)
+    for booking in bookings_cursor:
+        try:
+            mask = segment_mask(booking.get("fromStop"), booking.get("toStop"))
+        except ValueError:
+            logging.error("Skipping booking %s with invalid stops", booking["_id"])
+            continue
+        seats = seats_by_trip.setdefault(booking["tripId"], {})
+        seat = str(booking["seatNumber"])
+        seats[seat] = seats.get(seat, 0) | mask
+    operations = [
+        UpdateOne(
+            {"_id": tripId},
+            {"$bit": {f"seats.{seat}": {"or": Int64(mask)} for seat, mask in seats.items()}},
+            upsert=True
+        )
+        for tripId, seats in seats_by_trip.items()
+    ]
+    for start in range(0, len(operations), BACKFILL_BATCH_SIZE):
+        db.trip_seats.bulk_write(operations[start:start + BACKFILL_BATCH_SIZE], ordered=False)
+
+
+def split_used_refresh_tokens(db):
+    """
+    Creates the ``used_refresh_tokens`` collection and copies the unexpired revocations into
+    it, since refresh tokens used before it existed were recorded as revoked. Access token IDs
+    copied along are harmless there and expire with the rest.
+    """
+    db.used_refresh_tokens.create_indexes(USED_REFRESH_TOKEN_INDEXES)
+    revoked_cursor = db.revoked_tokens.find(
+        {"expiresAt": {"$gt": datetime.now(timezone.utc)}}, {"expiresAt": 1, "revokedAt": 1}
+    ).batch_size(BACKFILL_BATCH_SIZE)
+    operations = []
+    for revoked in revoked_cursor:
+        operations.append(UpdateOne(
+            {"_id": revoked["_id"]},
+            {"$setOnInsert": {"expiresAt": revoked["expiresAt"], "usedAt": revoked.get("revokedAt")}},
+            upsert=True
+        ))
+        if len(operations) == BACKFILL_BATCH_SIZE:
+            db.used_refresh_tokens.bulk_write(operations, ordered=False)
+            operations = []
+    if operations:
+        db.used_refresh_tokens.bulk_write(operations, ordered=False)
+
+
+def normalize_trip_dates(db):
+    """
+    Rewrites trip dates stored as datetimes or datetime strings to ``YYYY-MM-DD``, the form
+    searches and exports compare against.
+    """
+    trips_cursor = db.bus_trips.find(
+        {"date": {"$not": {"$regex": r"^\d{4}-\d{2}-\d{2}$"}}}, {"date": 1}
+    ).batch_size(BACKFILL_BATCH_SIZE)
+    operations = []
+    for trip in trips_cursor:
+        try:
+            operations.append(UpdateOne({"_id": trip["_id"]}, {"$set": {"date": normalize_trip_date(trip.get("date"))}}))
+        except ValueError:
+            logging.error("Skipping trip %s with invalid date %r", trip["_id"], trip.get("date"))
+            continue
+        if len(operations) == BACKFILL_BATCH_SIZE:
+            db.bus_trips.bulk_write(operations, ordered=False)
+            operations = []
+    if operations:
+        db.bus_trips.bulk_write(operations, ordered=False)
+
+
+# Applied in order and recorded in the migrations collection. Append new versions; never
+# renumber or edit one that has shipped.
+MIGRATIONS = [
+    (1, "Create the indexes of hot queries", create_indexes),
+    (2, "Backfill trip stop keys and fare matrices", backfill_trip_keys),
+    (3, "Seed trip seat documents from active bookings", seed_trip_seats),
+    (4, "Track used refresh tokens apart from revoked access tokens", split_used_refresh_tokens),
+    (5, "Normalize trip dates to YYYY-MM-DD", normalize_trip_dates),
+]
+
+
+def applied_versions(db):
+    return {migration["_id"] for migration in db[MIGRATIONS_COLLECTION].find({}, {"_id": 1})}
+
+
+def migrate(db, target=None):
+    """
+    Applies the pending migrations up to ``target``, or all of them.
+
+    Every migration is idempotent, so workers starting at the same time may run one twice
+    without harm.
+
+    :return: The versions applied.
+    """
+    done = applied_versions(db)
+    applied = []
+    for version, description, apply in MIGRATIONS:
+        if version in done or (target is not None and version > target):
+            continue
+        logging.info("Applying migration %d: %s", version, description)
+        apply(db)
+        db[MIGRATIONS_COLLECTION].update_one(
+            {"_id": version},
+            {"$setOnInsert": {"description": description, "appliedAt": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+        applied.append(version)
+    return applied
+
+
+def hot_queries():
+    """
+    Returns the ``(collection, filter)`` shapes of the queries that must be served by an index.
+    """
+    now = datetime.now(timezone.utc)
+    day = now.date().isoformat()
+    return [
+        ("users", {"email": "user@example.com"}),
+        ("users", {"username": "user"}),
+        ("bookings", {"tripId": str(ObjectId()), "status": {"$in": list(ACTIVE_STATUSES)}}),
+        ("bookings", {"status": "held", "expiresAt": {"$lte": now}}),
+        ("bus_trips", {"date": day}),
+        ("bus_trips", {"date": day, "stopKeys": "delhi>agra"}),
+        ("bus_trips", {"stopKeys": "delhi>agra"}),
+        ("bus_trips", {"scheduleId": ObjectId(), "date": day}),
+        ("trip_schedules", {"startDate": {"$lte": day}, "$or": [{"endDate": None}, {"endDate": {"$gte": day}}]}),
+        ("revoked_tokens", {"expiresAt": {"$gt": now}, "revokedAt": {"$gte": now}}),
+    ]
+
+
+def _plan_stages(plan):
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from _plan_stages(value)
+
+
+def check_indexes(db):
+    """
+    Explains every hot query and reports the ones whose winning plan scans the collection.
+
+    :return: One entry per query with its collection, filter and plan stages, and ``usesIndex``
+        telling whether the plan avoided a collection scan.
+    """
+    report = []
+    for collection, query in hot_queries():
+        plan = db[collection].find(query).explain()["queryPlanner"]["winningPlan"]
+        stages = list(_plan_stages(plan))
+        report.append({
+            "collection": collection,
+            "query": query,
+            "stages": stages,
+            "usesIndex": "COLLSCAN" not in stages,
+        })
+    return report
@@ -0,0 +1,44 @@
+# utils/pagination.py
+import base64
+import binascii
+
+from bson.objectid import ObjectId
+from bson.errors import InvalidId
+
+
+def encode_cursor(last_id):
+    """
+    Encodes the ``_id`` of the last document of a page into an opaque cursor token.
+    """
+    return base64.urlsafe_b64encode(ObjectId(last_id).binary).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        return ObjectId(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except (binascii.Error, InvalidId, TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+def find_page(collection, query, page, size, after=None, projection=None):
+    """
+    Fetches one page of documents matching ``query``.
+
+    With ``after`` set to None the page is addressed by number using skip/limit. Otherwise the
+    page is read with a range scan on ``_id`` starting after the cursor, so that deep pages cost
+    the same as the first one; an empty ``after`` starts from the beginning. ``projection``
+    limits the fields read from each document.
+
+    :return: The list of documents and the cursor of the next page, which is None in page mode
+        and once the last page has been reached.
+    """
+    if after is None:
+        skip = (page - 1) * size
+        return list(collection.find(query, projection).skip(skip).limit(size)), None
+
+    if after:
+        after_query = {"_id": {"$gt": decode_cursor(after)}}
+        query = {"$and": [query, after_query]} if query else after_query
+    documents = list(collection.find(query, projection).sort("_id", 1).limit(size))
+    next_cursor = encode_cursor(documents[-1]["_id"]) if len(documents) == size else None
+    return documents, next_cursor
@@ -0,0 +1,155 @@
+# utils/passwords.py
+import base64
+import hashlib
+import hmac
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PasswordHasherBusyError(Exception):
+    """
+    Raised when the password hashing pool is saturated and cannot admit more work.
+    """
+
+
+class ScryptHasher:
+    """
+    Memory-hard password hashing with scrypt. Hashes are encoded as
+    ``scrypt$<n>$<r>$<p>$<salt>$<hash>`` so that the work factor can be raised later; hashes
+    made with a lower one report ``needs_rehash``.
+    """
+    algorithm = "scrypt"
+
+    def __init__(self, n=2 ** 14, r=8, p=1, salt_size=16, hash_size=32):
+        self.n = n
+        self.r = r
+        self.p = p
+        self.salt_size = salt_size
+        self.hash_size = hash_size
+
+    def _derive(self, password, salt, n, r, p):
+        return hashlib.scrypt(
+            password.encode(), salt=salt, n=n, r=r, p=p, dklen=self.hash_size,
+            maxmem=128 * n * r * p + 1024 * 1024
+        )
+
+    def hash(self, password):
+        salt = os.urandom(self.salt_size)
+        derived = self._derive(password, salt, self.n, self.r, self.p)
+        return "$".join((
+            self.algorithm, str(self.n), str(self.r), str(self.p),
+            base64.b64encode(salt).decode(), base64.b64encode(derived).decode()
+        ))
+
+    def identifies(self, encoded):
+        return encoded.startswith(self.algorithm + "$")
+
+    def verify(self, password, encoded):
+        try:
+            _, n, r, p, salt, expected = encoded.split("$")
+            derived = self._derive(password, base64.b64decode(salt), int(n), int(r), int(p))
+        except ValueError:
+            return False
+        return hmac.compare_digest(derived, base64.b64decode(expected))
+
+    def needs_rehash(self, encoded):
+        _, n, r, p = encoded.split("$")[:4]
+        return (int(n), int(r), int(p)) != (self.n, self.r, self.p)
+
+
+class Md5Hasher:
+    """
+    Verifies the unsalted MD5 hashes of accounts created before passwords were hashed with
+    scrypt. It never creates hashes; matching passwords are rehashed on login.
+    """
+    algorithm = "md5"
+    _pattern = re.compile(r"^[0-9a-f]{32}$")
+
+    def identifies(self, encoded):
+        return bool(self._pattern.match(encoded))
+
+    def verify(self, password, encoded):
+        return hmac.compare_digest(hashlib.md5(password.encode()).hexdigest(), encoded)
+
+    def needs_rehash(self, encoded):
+        return True
+
+
+class PasswordHashingPool:
+    """
+    Runs password hashing on a bounded pool of worker threads.
+
+    Request threads hand hashing to the pool and wait for the result. At most ``max_pending``
+    hashes may be running or queued; a request that cannot be admitted within
+    ``admission_timeout`` seconds fails fast with PasswordHasherBusyError, so that a login storm
+    is shed instead of queueing without bound and exhausting memory.
+    """
+
+    def __init__(self, hasher, legacy_hashers=(), workers=None, max_pending=None, admission_timeout=1.0):
+        self.hasher = hasher
+        self.hashers = (hasher, *legacy_hashers)
+        workers = workers or os.cpu_count() or 1
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self.admission = threading.BoundedSemaphore(max_pending or workers * 4)
+        self.admission_timeout = admission_timeout
+        self._dummy_hash = None
+
+    def _run(self, function, *args):
+        if not self.admission.acquire(timeout=self.admission_timeout):
+            raise PasswordHasherBusyError("Too many password hashing requests, try again later")
+        try:
+            future = self.executor.submit(function, *args)
+        except Exception:
+            self.admission.release()
+            raise
+        future.add_done_callback(lambda _: self.admission.release())
+        return future.result()
+
+    def hash(self, password):
+        return self._run(self.hasher.hash, password)
+
+    def verify(self, password, encoded):
+        """
+        Checks a password against its stored hash.
+
+        :return: A ``(matches, new_hash)`` pair, where ``new_hash`` is set when the password
+            matches a legacy hash or a lower work factor and should replace the stored one.
+        """
+        return self._run(self._verify, password, encoded)
+
+    def verify_dummy(self, password):
+        """
+        Spends the same work as a real verification, so that logins for unknown usernames take
+        as long as logins with a wrong password.
+        """
+        self._run(self._verify_dummy, password)
+
+    def _verify_dummy(self, password):
+        if self._dummy_hash is None:
+            self._dummy_hash = self.hasher.hash("")
+        self.hasher.verify(password, self._dummy_hash)
+
+    def _verify(self, password, encoded):
+        for hasher in self.hashers:
+            if encoded and hasher.identifies(encoded):
+                if not hasher.verify(password, encoded):
+                    return False, None
+                return True, self.hasher.hash(password) if hasher.needs_rehash(encoded) else None
+        return False, None
+
+
+default_hasher = ScryptHasher(
+    n=int(os.getenv("PASSWORD_HASH_N", 2 ** 14)),
+    r=int(os.getenv("PASSWORD_HASH_R", 8)),
+    p=int(os.getenv("PASSWORD_HASH_P", 1))
+)
+
+password_pool = PasswordHashingPool(
+    default_hasher,
+    legacy_hashers=(Md5Hasher(),),
+    workers=int(os.getenv("PASSWORD_HASH_WORKERS", 0)) or None,
+    max_pending=int(os.getenv("PASSWORD_HASH_MAX_PENDING", 0)) or None,
+    admission_timeout=float(os.getenv("PASSWORD_HASH_ADMISSION_TIMEOUT", 1.0))
+)
@@ -0,0 +1,114 @@
+# utils/rate_limit.py
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class InProcessBucketStore:
+    """
+    Token buckets local to the process, evicting the least recently used buckets beyond
+    ``max_buckets``. Each worker enforces its own budgets.
+    """
+
+    def __init__(self, max_buckets=100000):
+        self.max_buckets = max_buckets
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, refill_rate):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        return allowed, 0 if allowed else (1 - tokens) / refill_rate
+
+
+class RedisBucketStore:
+    """
+    Token buckets shared by all workers through Redis, updated atomically by a Lua script.
+    Requires the optional ``redis`` package.
+    """
+    SCRIPT = """
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local capacity = tonumber(ARGV[1])
+local refill_rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * refill_rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / refill_rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+    def __init__(self, url, prefix="ratelimit:"):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("The redis package is required for a Redis rate limit store")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._take = self.client.register_script(self.SCRIPT)
+
+    def take(self, key, capacity, refill_rate):
+        allowed, tokens = self._take(keys=[self.prefix + key], args=[capacity, refill_rate, time.time()])
+        tokens = float(tokens)
+        return bool(allowed), 0 if allowed else (1 - tokens) / refill_rate
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limiter over a bucket store. A budget of ``capacity`` requests per
+    ``period`` seconds allows bursts of up to ``capacity`` requests, refilled at an even rate.
+    """
+
+    def __init__(self, store, enabled=True):
+        self.store = store
+        self.enabled = enabled
+
+    @staticmethod
+    def from_env():
+        """
+        Builds the limiter from ``RATE_LIMIT_ENABLED`` and ``RATE_LIMIT_URL`` (a Redis URL,
+        optional; the default store is in-process).
+        """
+        enabled = os.getenv("RATE_LIMIT_ENABLED", "true").lower() != "false"
+        url = os.getenv("RATE_LIMIT_URL")
+        return RateLimiter(RedisBucketStore(url) if url else InProcessBucketStore(), enabled)
+
+    def hit(self, key, capacity, period):
+        """
+        Spends one request of a budget.
+
+        :return: A ``(allowed, retry_after)`` pair, ``retry_after`` being the whole number of
+            seconds until a request will be allowed again.
+        """
+        if not self.enabled:
+            return True, 0
+        allowed, wait = self.store.take(key, capacity, capacity / period)
+        return allowed, max(1, math.ceil(wait)) if not allowed else 0
+
+
+def parse_budget(value):
+    """
+    Parses a ``"<requests>/<seconds>"`` budget.
+    """
+    requests, seconds = str(value).split("/")
+    return int(requests), float(seconds)
+
+
+rate_limiter = RateLimiter.from_env()
@@ -0,0 +1,119 @@
+# utils/revocation.py
+import hashlib
+import math
+import os
+import threading
+import time
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter of strings. Membership tests may return false positives at about
+    ``error_rate`` once ``capacity`` items have been added, but never false negatives.
+    """
+
+    def __init__(self, capacity=100000, error_rate=0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationFilter:
+    """
+    Process-local Bloom filter of revoked access token IDs, in front of the authoritative
+    ``revoked_tokens`` collection. Used refresh tokens are tracked separately and never
+    enter the filter.
+
+    A token ID missing from the filter is certainly not revoked, so the common case costs no
+    database round trip; a hit must be confirmed against the collection. Revocations made in
+    this worker are added at once. Those made by other workers are pulled in with ``sync``
+    every ``sync_interval`` seconds, and the filter is rebuilt from scratch every
+    ``rebuild_interval`` seconds so that expired revocations stop costing lookups.
+    """
+
+    def __init__(self, capacity=100000, error_rate=0.001, sync_interval=5, rebuild_interval=3600):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.rebuild_interval = rebuild_interval
+        self._filter = BloomFilter(capacity, error_rate)
+        self._synced_at = None
+        self._built_at = None
+        # IDs added while a rebuild runs, replayed into the rebuilt filter.
+        self._added_during_rebuild = None
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+
+    def might_be_revoked(self, jti):
+        return jti in self._filter
+
+    def add(self, jti):
+        with self._lock:
+            self._filter.add(jti)
+            if self._added_during_rebuild is not None:
+                self._added_during_rebuild.append(jti)
+
+    def needs_sync(self):
+        return self._synced_at is None or time.monotonic() - self._synced_at > self.sync_interval
+
+    def sync(self, load_revoked):
+        """
+        Brings the filter up to date.
+
+        Only one thread syncs at a time; others keep checking against the current filter
+        rather than waiting. Revoked IDs are loaded without holding the lock that ``add``
+        takes.
+
+        :param load_revoked: Called with None to list every unexpired revoked token ID, or with
+            the number of seconds since the last sync to list the ones revoked since then.
+        """
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            if not self.needs_sync():
+                return
+            now = time.monotonic()
+            if self._built_at is None or now - self._built_at > self.rebuild_interval:
+                with self._lock:
+                    self._added_during_rebuild = []
+                bloom = BloomFilter(self.capacity, self.error_rate)
+                try:
+                    for jti in load_revoked(None):
+                        bloom.add(jti)
+                except Exception:
+                    with self._lock:
+                        self._added_during_rebuild = None
+                    raise
+                with self._lock:
+                    for jti in self._added_during_rebuild:
+                        bloom.add(jti)
+                    self._added_during_rebuild = None
+                    self._filter = bloom
+                self._built_at = now
+            else:
+                # Overlap the previous window so revocations written while it ran are not missed.
+                for jti in load_revoked(now - self._synced_at + self.sync_interval):
+                    self.add(jti)
+            self._synced_at = now
+        finally:
+            self._sync_lock.release()
+
+revocation_filter = RevocationFilter(
+    capacity=int(os.getenv("REVOCATION_FILTER_CAPACITY", 100000)),
+    sync_interval=int(os.getenv("REVOCATION_SYNC_INTERVAL", 5)),
+    rebuild_interval=int(os.getenv("REVOCATION_REBUILD_INTERVAL", 3600))
+)
@@ -0,0 +1,132 @@
+# utils/seat_map.py
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from utils.segments import FULL_TRIP_MASK
+
+
+class SeatMap:
+    """
+    Seat occupancy for one trip: each seat number maps to the bitset of the segments it is
+    occupied on, so checking a seat for a journey is one bitwise AND.
+    """
+    __slots__ = ("totalSeat", "segments")
+
+    def __init__(self, totalSeat=None, segments=None):
+        self.totalSeat = totalSeat
+        self.segments = segments if segments is not None else {}
+
+    @staticmethod
+    def from_seats(seats, totalSeat=None):
+        """
+        Builds a seat map from the ``seats`` field of a trip's seat-state document.
+        """
+        return SeatMap(
+            totalSeat=totalSeat,
+            segments={int(seat): int(mask) for seat, mask in seats.items() if mask}
+        )
+
+    def mark(self, seatNumber, mask, occupied):
+        seatNumber = int(seatNumber)
+        if occupied:
+            self.segments[seatNumber] = self.segments.get(seatNumber, 0) | mask
+        else:
+            remaining = self.segments.get(seatNumber, 0) & ~mask
+            if remaining:
+                self.segments[seatNumber] = remaining
+            else:
+                self.segments.pop(seatNumber, None)
+
+    def booked_seats(self, mask=FULL_TRIP_MASK):
+        return sorted(seat for seat, occupied in list(self.segments.items()) if occupied & mask)
+
+    def free_seats(self, mask=FULL_TRIP_MASK):
+        if not self.totalSeat:
+            return None
+        segments = self.segments
+        return [seat for seat in range(1, self.totalSeat + 1) if not segments.get(seat, 0) & mask]
+
+
+class SeatMapCache:
+    """
+    Process-local LRU cache of trip seat maps.
+
+    Entries expire after ``ttl`` seconds so that bookings written by other workers
+    show up without cross-process invalidation.
+
+    Every mark or invalidation stamps the trip with a new version. A map loaded from the
+    database is only put if the trip's version is still the one taken before the read, so a
+    claim or release made during the read is never overwritten by the older map. Versions are
+    kept for the ``max_entries`` most recently changed trips; an older trip reads as changed.
+    """
+
+    def __init__(self, max_entries=10000, ttl=30):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._versions = OrderedDict()
+        self._clock = 0
+        self._oldest_version = 0
+        self._lock = threading.Lock()
+
+    def get(self, tripId):
+        with self._lock:
+            entry = self._entries.get(tripId)
+            if entry is None:
+                return None
+            seat_map, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[tripId]
+                return None
+            self._entries.move_to_end(tripId)
+            return seat_map
+
+    def version(self, tripId):
+        """
+        Returns the trip's version, to pass to ``put`` with a map read after this call.
+        """
+        with self._lock:
+            return self._versions.get(tripId, self._oldest_version)
+
+    def _changed(self, tripId):
+        self._clock += 1
+        self._versions[tripId] = self._clock
+        self._versions.move_to_end(tripId)
+        while len(self._versions) > self.max_entries:
+            _, evicted = self._versions.popitem(last=False)
+            self._oldest_version = max(self._oldest_version, evicted)
+
+    def put(self, tripId, seat_map, version=None):
+        """
+        Caches a trip's seat map, unless ``version`` is given and the trip changed since.
+
+        :return: Whether the map was cached.
+        """
+        with self._lock:
+            if version is not None and self._versions.get(tripId, self._oldest_version) != version:
+                return False
+            self._entries[tripId] = (seat_map, time.monotonic() + self.ttl)
+            self._entries.move_to_end(tripId)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return True
+
+    def mark(self, tripId, seatNumber, mask, occupied):
+        with self._lock:
+            self._changed(tripId)
+            entry = self._entries.get(tripId)
+            if entry is not None:
+                entry[0].mark(seatNumber, mask, occupied)
+
+    def invalidate(self, tripId):
+        with self._lock:
+            self._changed(tripId)
+            self._entries.pop(tripId, None)
+
+
+seat_map_cache = SeatMapCache(
+    max_entries=int(os.getenv("SEAT_MAP_CACHE_SIZE", 10000)),
+    ttl=int(os.getenv("SEAT_MAP_CACHE_TTL", 30))
+)
@@ -0,0 +1,25 @@
+# utils/segments.py
+
+# A trip's segments are the legs between consecutive stops; segment i runs from stop i to
+# stop i + 1. Occupancy of one seat is a bitset with one bit per segment, which MongoDB
+# stores as a signed 64-bit integer.
+MAX_SEGMENTS = 62
+FULL_TRIP_MASK = (1 << MAX_SEGMENTS) - 1
+
+
+def segment_mask(fromStop=None, toStop=None):
+    """
+    Returns the bitset of the segments between a boarding and an alighting stop index.
+
+    A missing ``fromStop`` means boarding at the first stop and a missing ``toStop`` means
+    alighting at the last one, so a booking without stops occupies the whole trip.
+
+    :raises ValueError: If the stop indices do not describe at least one segment.
+    """
+    start = 0 if fromStop is None else fromStop
+    end = MAX_SEGMENTS if toStop is None else toStop
+    if (not isinstance(start, int) or isinstance(start, bool)
+            or not isinstance(end, int) or isinstance(end, bool)
+            or not 0 <= start < end <= MAX_SEGMENTS):
+        raise ValueError("fromStop must be a stop index before toStop")
+    return FULL_TRIP_MASK & ~((1 << start) - 1) & ((1 << end) - 1)
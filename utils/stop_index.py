@@ -0,0 +1,61 @@
+# utils/stop_index.py
+
+
+def normalize_city(name):
+    """
+    Normalizes a city name for lookups: case-folded with collapsed whitespace.
+    """
+    return " ".join(str(name).split()).casefold()
+
+
+def stop_name(stop):
+    return stop.get("stop") if isinstance(stop, dict) else stop
+
+
+def stop_times(stops):
+    """
+    Returns the minutes after midnight of the trip date at which a trip reaches each of its
+    stops, reading the stops' ``"HH:MM"`` times and rolling past midnight, or None when a stop
+    has no valid time.
+    """
+    minutes = []
+    for stop in stops or []:
+        try:
+            hours, mins = str(stop.get("time")).split(":")
+            value = int(hours) * 60 + int(mins)
+        except (AttributeError, TypeError, ValueError):
+            return None
+        while minutes and value < minutes[-1]:
+            value += 24 * 60
+        minutes.append(value)
+    return minutes or None
+
+
+def stop_keys(stops):
+    """
+    Precomputes the origin-destination keys of a trip from its ordered stops.
+
+    Every ordered pair of stops yields ``"from>to"``, every stop where passengers can board
+    yields ``"from>"`` and every stop where they can alight yields ``">to"``, so a search by
+    origin, destination or both is one equality match on a multikey index.
+    """
+    names = [normalize_city(stop_name(stop)) for stop in stops or [] if stop_name(stop)]
+    keys = set()
+    for i, origin in enumerate(names):
+        for destination in names[i + 1:]:
+            if destination != origin:
+                keys.add(f"{origin}>{destination}")
+                keys.add(f"{origin}>")
+                keys.add(f">{destination}")
+    return sorted(keys)
+
+
+def search_key(from_city=None, to_city=None):
+    """
+    Returns the stop key matching a search by origin and/or destination, or None.
+    """
+    if not from_city and not to_city:
+        return None
+    origin = normalize_city(from_city) if from_city else ""
+    destination = normalize_city(to_city) if to_city else ""
+    return f"{origin}>{destination}"
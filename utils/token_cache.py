@@ -0,0 +1,20 @@
+# utils/token_cache.py
+import hashlib
+import os
+
+from utils.cache import Cache, InProcessCacheBackend
+
+# Verified JWT claims by token digest, so that a token reused within its lifetime is verified
+# once per worker. Entries never outlive the token: lookups check the claims' ``exp``.
+token_claims_cache = Cache(InProcessCacheBackend(
+    max_entries=int(os.getenv("TOKEN_CACHE_SIZE", 10000)),
+    ttl=int(os.getenv("TOKEN_CACHE_TTL", 3600))
+))
+
+
+def token_cache_key(token, secret):
+    """
+    Digests a token together with the signing secret, so that raw tokens are not kept in memory
+    and rotating the secret invalidates every cached entry.
+    """
+    return hashlib.sha256(f"{secret}:{token}".encode()).hexdigest()
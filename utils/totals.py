@@ -0,0 +1,64 @@
+# utils/totals.py
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class CountCache:
+    """
+    Bounded cache of filtered document counts, keyed by collection and normalized query.
+    """
+
+    def __init__(self, max_entries=1000, ttl=30):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            total, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return total
+
+    def put(self, key, total):
+        with self._lock:
+            self._entries[key] = (total, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+count_cache = CountCache(
+    max_entries=int(os.getenv("COUNT_CACHE_SIZE", 1000)),
+    ttl=int(os.getenv("COUNT_CACHE_TTL", 30))
+)
+
+
+def count_total(collection, query):
+    """
+    Returns the number of documents matching ``query`` and whether that number is exact.
+
+    Unfiltered totals come from the collection metadata through ``estimated_document_count``.
+    Filtered totals are counted exactly and then served from ``count_cache`` for a short
+    while, during which they are reported as not exact.
+
+    :return: A ``(total, exact)`` tuple.
+    """
+    if not query:
+        return collection.estimated_document_count(), False
+    key = (collection.name, json.dumps(query, sort_keys=True, default=str))
+    total = count_cache.get(key)
+    if total is not None:
+        return total, False
+    total = collection.count_documents(query)
+    count_cache.put(key, total)
+    return total, True
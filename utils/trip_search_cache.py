@@ -0,0 +1,33 @@
+# utils/trip_search_cache.py
+import json
+
+from utils.cache import Cache
+
+trip_search_cache = Cache.from_env("TRIP_SEARCH")
+
+
+def search_cache_key(*parts):
+    return json.dumps(parts, default=str)
+
+
+def search_tag(date=None, route_key=None):
+    """
+    Tags a cached search with the date and stop key it filtered on, "*" standing for none.
+    """
+    return f"{date or '*'}|{route_key or '*'}"
+
+
+def invalidate_trip_searches(trips):
+    """
+    Drops the cached searches that could include any of the given trips.
+
+    :param trips: An iterable of ``(date, stopKeys)`` pairs describing the trips before and
+        after a write.
+    """
+    tags = set()
+    for date, keys in trips:
+        for search_date in {date, None}:
+            for route_key in [None, *(keys or [])]:
+                tags.add(search_tag(search_date, route_key))
+    if tags:
+        trip_search_cache.invalidate_tags(tags)
@@ -0,0 +1,94 @@
+# utils/validation.py
+import re
+
+_TYPES = {
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "array": (list,),
+    "object": (dict,),
+}
+
+
+def _compile_value(rules):
+    """
+    Compiles the rules of one value into a function returning an error message, or None when
+    the value is valid.
+    """
+    type_names = rules["type"] if isinstance(rules["type"], (list, tuple)) else (rules["type"],)
+    types = tuple(python_type for type_name in type_names for python_type in _TYPES[type_name])
+    # bool is a subclass of int, but true/false are not numbers in a request body.
+    rejects_bool = "boolean" not in type_names
+    type_name = type_names[0] if len(type_names) == 1 else None
+    tests = []
+    if "min" in rules:
+        minimum = rules["min"]
+        tests.append((lambda value: value >= minimum, f"must be at least {minimum}"))
+    if "max" in rules:
+        maximum = rules["max"]
+        tests.append((lambda value: value <= maximum, f"must be at most {maximum}"))
+    if "min_length" in rules:
+        min_length = rules["min_length"]
+        tests.append((lambda value: len(value) >= min_length, f"must have at least {min_length} items"
+                      if type_name == "array" else f"must be at least {min_length} characters"))
+    if "max_length" in rules:
+        max_length = rules["max_length"]
+        tests.append((lambda value: len(value) <= max_length, f"must have at most {max_length} items"
+                      if type_name == "array" else f"must be at most {max_length} characters"))
+    if "pattern" in rules:
+        pattern = rules["pattern"]
+        if isinstance(pattern, str):
+            pattern = re.compile(pattern)
+        tests.append((lambda value: pattern.match(value) is not None, rules.get("pattern_message", "has an invalid format")))
+    if "enum" in rules:
+        choices = frozenset(rules["enum"])
+        tests.append((lambda value: value in choices, f"must be one of {', '.join(map(str, rules['enum']))}"))
+    if "items" in rules:
+        check_item = _compile_value(rules["items"])
+
+        def items_valid(value):
+            return all(check_item(item) is None for item in value)
+        tests.append((items_valid, "must only contain valid items"))
+    type_message = f"must be of type {' or '.join(type_names)}"
+
+    def check(value):
+        if not isinstance(value, types) or (rejects_bool and isinstance(value, bool)):
+            return type_message
+        for test, message in tests:
+            if not test(value):
+                return message
+        return None
+    return check
+
+
+def compile_schema(schema):
+    """
+    Compiles a declarative request schema into a validator, once.
+
+    The schema maps each field of a JSON object to its rules: ``type`` (string, integer,
+    number, boolean, array or object, or a list of them), ``required``, ``min``/``max`` for numbers,
+    ``min_length``/``max_length`` for strings and arrays, ``pattern`` (a regex, matched from
+    the start), ``enum`` and ``items`` (the rules of array items). Optional fields may be
+    missing or null; unknown fields are ignored.
+
+    :return: A function taking the parsed body and returning a list of ``{"field", "message"}``
+        errors, empty when the body is valid.
+    """
+    fields = [(name, rules.get("required", False), _compile_value(rules)) for name, rules in schema.items()]
+
+    def validate(data):
+        if not isinstance(data, dict):
+            return [{"field": None, "message": "Request body must be a JSON object"}]
+        errors = []
+        for name, required, check in fields:
+            value = data.get(name)
+            if value is None:
+                if required:
+                    errors.append({"field": name, "message": "is required"})
+                continue
+            message = check(value)
+            if message:
+                errors.append({"field": name, "message": message})
+        return errors
+    return validate